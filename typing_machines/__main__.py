@@ -0,0 +1,284 @@
+"""
+Command-line interface: `python -m typing_machines {encode,check,simulate,experiment} ...`.
+
+Input words are given as arguments or, without arguments, read from the
+standard input one per line, and the results are written as soon as they
+are available. A word is a sequence of single-letter characters, or of
+letters separated by spaces. Every command imports only the modules it
+needs, so that short runs start fast.
+"""
+
+import os
+import sys
+from argparse import ArgumentParser, Namespace
+from itertools import chain
+from typing import List, Iterator, Iterable, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing_machines.abstract_machines.turing_machine import TuringMachine
+    from typing_machines.app import Algorithm
+    from typing_machines.checkers.backends import CheckerBackend
+
+ALGORITHMS: List[str] = ["grigore", "roth", "auto"]
+""" Algorithm names accepted by the commands, the lower case names of `app.Algorithm`. """
+
+CONSTRUCTIONS: List[str] = ["grigore", "roth"]
+""" Algorithm names accepted by experiments, the lower case names of `app.CONSTRUCTIONS`. """
+
+CHECKERS: List[str] = ["mypy", "mypy-api", "dmypy", "engine"]
+""" Checker names accepted by `check`: a fresh mypy process per module, pre-forked mypy workers calling `mypy.api`,
+a mypy daemon, or the subtyping engine of `checkers.subtyping`. """
+
+
+def parse_word(text: str) -> List[str]:
+    """
+    Returns the letters of a word: its characters, or its space-separated parts if it contains spaces.
+    """
+    return text.split() if " " in text.strip() else list(text.strip())
+
+
+def _words(arguments: Namespace) -> Iterator[str]:
+    """
+    Generates the words given as arguments, or else the lines of the standard input, as they arrive.
+    """
+    if arguments.words:
+        yield from arguments.words
+    else:
+        for line in sys.stdin:
+            yield line.rstrip("\n")
+
+
+def _chunks(words: Iterable[str], size: int) -> Iterator[List[str]]:
+    chunk: List[str] = []
+    for word in words:
+        chunk.append(word)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _machine(arguments: Namespace) -> "TuringMachine":
+    """
+    Returns the machine selected by the `--table`, `--family` or `--machine` option.
+    """
+    if arguments.table is not None:
+        from typing_machines.examples.families import from_standard_format
+        return from_standard_format(arguments.table)
+    if arguments.family is not None:
+        from typing_machines.examples.families import FAMILIES
+        return FAMILIES[arguments.family].machine(arguments.size)
+    from typing_machines.abstract_machines.turing_machine import TuringMachine
+    from typing_machines.examples import machines
+    machine = getattr(machines, arguments.machine, None)
+    if not isinstance(machine, TuringMachine):
+        raise ValueError(f"no machine named {arguments.machine!r} in typing_machines.examples.machines")
+    return machine
+
+
+def _letters(machine: "TuringMachine", word: str) -> List[str]:
+    """
+    Returns the letters of a word, checking that they are in the alphabet of the machine, which is
+    cheaper than validating the whole machine for every word.
+    """
+    letters: List[str] = parse_word(word)
+    for letter in letters:
+        if letter not in machine.letter_ids or letter == machine.BLANK:
+            raise ValueError(f"input letter {letter!r} of word {word!r} is not in the machine alphabet")
+    return letters
+
+
+def _algorithm(arguments: Namespace) -> "Algorithm":
+    from typing_machines.app import Algorithm
+    return Algorithm[arguments.algorithm.capitalize()]
+
+
+def _checker(arguments: Namespace) -> "CheckerBackend":
+    from typing_machines.checkers import backends
+    if arguments.checker == "engine":
+        return backends.SubtypingEngineBackend()
+    mypy_arguments = ("--no-incremental",)
+    if arguments.checker == "mypy-api":
+        return backends.MypyApiBackend(timeout=arguments.timeout, arguments=mypy_arguments)
+    if arguments.checker == "dmypy":
+        return backends.DmypyBackend(timeout=arguments.timeout, arguments=mypy_arguments)
+    return backends.MypySubprocessBackend(timeout=arguments.timeout, arguments=mypy_arguments)
+
+
+def encode_command(arguments: Namespace) -> int:
+    """
+    Writes the module encoding every word to `OUTPUT/word_<i>.py`, printing its path, or, without `--output`,
+    writes one module to the standard output with the class table and one query per word (`_0`, `_1`, ...).
+    With `--algorithm auto`, the construction is picked per word, or by the first word for the standard output.
+    """
+    from typing_machines.app import Algorithm, encode, write_machine, write_query, resolve_algorithm
+    algorithm: Algorithm = _algorithm(arguments)
+    machine: TuringMachine = _machine(arguments)
+    machine.validate()
+    words: Iterator[str] = _words(arguments)
+    if arguments.output is None:
+        if algorithm == Algorithm.Auto:
+            # the module has a single class table, so the first word picks the construction
+            first: Optional[str] = next(words, None)
+            words = chain([] if first is None else [first], words)
+            algorithm = resolve_algorithm(algorithm, machine, _letters(machine, first or ""))
+        write_machine(algorithm, machine, sys.stdout)
+        sys.stdout.write("\n")
+    else:
+        os.makedirs(arguments.output, exist_ok=True)
+    for i, word in enumerate(words):
+        letters: List[str] = _letters(machine, word)
+        if arguments.output is None:
+            write_query(algorithm, machine, letters, sys.stdout, f"_{i}")
+        else:
+            path: str = os.path.join(arguments.output, f"word_{i}.py")
+            with open(path, "w") as python_file:
+                python_file.write(encode(algorithm, machine, letters))
+            print(path)
+        sys.stdout.flush()
+    return 0
+
+
+def check_command(arguments: Namespace) -> int:
+    """
+    Checks the encoded words in chunks of `--chunk-size` words per module and prints a line
+    `word<TAB>ACCEPTED|REJECTED|INCONCLUSIVE` per word, in order, after every chunk.
+    """
+    from tempfile import TemporaryDirectory
+    from typing_machines.checkers.batch import QueryResult, check_batch
+    algorithm: Algorithm = _algorithm(arguments)
+    machine: TuringMachine = _machine(arguments)
+    machine.validate()
+    status: int = 0
+    with _checker(arguments) as checker, TemporaryDirectory(prefix="typing_machines_") as directory:
+        for chunk in _chunks(_words(arguments), arguments.chunk_size):
+            words: List[List[str]] = [_letters(machine, word) for word in chunk]
+            results: List[QueryResult] = check_batch(algorithm, machine, words, checker, directory,
+                                                     arguments.chunk_size)
+            for word, result in zip(chunk, results):
+                verdict: str = "INCONCLUSIVE" if result.accepted is None else \
+                    "ACCEPTED" if result.accepted else "REJECTED"
+                status = max(status, 2 if result.accepted is None else 0 if result.accepted else 1)
+                print(f"{word}\t{verdict}", flush=True)
+    return status
+
+
+def simulate_command(arguments: Namespace) -> int:
+    """
+    Simulates the machine on every word and prints a line `word<TAB>verdict<TAB>steps` per word.
+    """
+    from typing_machines.simulators.simulator import SimulationResult, Verdict, simulate
+    machine: TuringMachine = _machine(arguments)
+    status: int = 0
+    for word in _words(arguments):
+        result: SimulationResult = simulate(machine, parse_word(word), arguments.max_steps, arguments.max_tape)
+        status = max(status, 0 if result.verdict == Verdict.ACCEPT else 1 if result.verdict == Verdict.REJECT else 2)
+        print(f"{word}\t{result.verdict.name}\t{result.steps}", flush=True)
+    return status
+
+
+def experiment_command(arguments: Namespace) -> int:
+    """
+    Runs an experiment of `typing_machines.experiment` for the selected algorithms.
+    """
+    from typing_machines.app import Algorithm
+    algorithms: List[Algorithm] = [Algorithm[name.capitalize()] for name in arguments.algorithms or CONSTRUCTIONS]
+    if arguments.experiment == "stack-size":
+        from typing_machines.experiment.parallel_experiment import run_parallel_experiment
+        from typing_machines.experiment.result_store import ResultStore
+        from typing_machines.experiment.stack_size_experiment import plot_results
+        store: Optional[ResultStore] = None if arguments.store is None else ResultStore(arguments.store)
+        results = run_parallel_experiment({algorithm: arguments.lengths for algorithm in algorithms},
+                                          workers=arguments.workers, store=store, progress=sys.stderr)
+        for algorithm, algorithm_results in results.items():
+            for n, m in algorithm_results:
+                print(f"{algorithm.name}\t{n}\t{m.stack_size}\t{m.outcome.name}\t{m.wall_time:.2f}\t"
+                      f"{m.cpu_time:.2f}\t{m.peak_rss}")
+        if arguments.plot:
+            plot_results(results)
+    elif arguments.experiment == "fuzz":
+        from typing_machines.experiment.differential_fuzzer import run_fuzzer
+        status: int = 0
+        for algorithm in algorithms:
+            report = run_fuzzer(algorithm, arguments.seed, arguments.budget, arguments.checker, arguments.workers)
+            print(f"{algorithm.name} ({report.checker}): {report.cases} cases, {report.skipped} skipped, {report.agreements} "
+                  f"agreements, {report.inconclusive} inconclusive, {len(report.disagreements)} disagreements")
+            for disagreement in report.disagreements:
+                print(disagreement)
+            status = max(status, 1 if report.disagreements else 0)
+        return status
+    elif arguments.experiment == "profile":
+        from typing_machines.experiment.profile_experiment import profile_palindromes
+        for algorithm in algorithms:
+            profile_palindromes(algorithm, arguments.lengths, arguments.directory)
+    return 0
+
+
+def _add_machine_options(parser: ArgumentParser) -> None:
+    parser.add_argument("--machine", "-m", default="palindromes",
+                        help="machine of typing_machines.examples.machines (default: palindromes)")
+    parser.add_argument("--family", "-f", help="machine family of typing_machines.examples.families instead")
+    parser.add_argument("--size", "-s", type=int, default=2, help="size of the family machine (default: 2)")
+    parser.add_argument("--table", "-t", help="machine in the busy beaver text format instead, e.g., 1RB1LB_1LA1RZ")
+    parser.add_argument("words", nargs="*", help="input words (default: read from the standard input)")
+
+
+def parser() -> ArgumentParser:
+    """
+    Returns the parser of the command-line arguments.
+    """
+    main_parser: ArgumentParser = ArgumentParser(prog="python -m typing_machines", description=__doc__)
+    commands = main_parser.add_subparsers(dest="command", required=True)
+    encode_parser: ArgumentParser = commands.add_parser("encode", help="encode words as Python modules")
+    encode_parser.add_argument("--algorithm", "-a", choices=ALGORITHMS, default="roth")
+    encode_parser.add_argument("--output", "-o", help="directory for one module per word")
+    _add_machine_options(encode_parser)
+    encode_parser.set_defaults(run=encode_command)
+    check_parser: ArgumentParser = commands.add_parser("check", help="encode and type check words")
+    check_parser.add_argument("--algorithm", "-a", choices=ALGORITHMS, default="roth")
+    check_parser.add_argument("--checker", "-c", choices=CHECKERS, default="mypy")
+    check_parser.add_argument("--timeout", type=float, help="timeout of every check in seconds")
+    check_parser.add_argument("--chunk-size", type=int, default=100, help="words per checked module (default: 100)")
+    _add_machine_options(check_parser)
+    check_parser.set_defaults(run=check_command)
+    simulate_parser: ArgumentParser = commands.add_parser("simulate", help="simulate the machine on words")
+    simulate_parser.add_argument("--max-steps", type=int, default=1000000)
+    simulate_parser.add_argument("--max-tape", type=int, default=1000000)
+    _add_machine_options(simulate_parser)
+    simulate_parser.set_defaults(run=simulate_command)
+    experiment_parser: ArgumentParser = commands.add_parser("experiment", help="run an experiment")
+    experiment_parser.add_argument("experiment", choices=["stack-size", "fuzz", "profile"])
+    experiment_parser.add_argument("--algorithms", "-a", nargs="+", choices=CONSTRUCTIONS)
+    experiment_parser.add_argument("--lengths", "-n", nargs="+", type=int, default=[2, 4, 6],
+                                   help="half lengths of the palindromes (stack-size, profile)")
+    experiment_parser.add_argument("--workers", "-w", type=int, help="worker processes (stack-size, fuzz)")
+    experiment_parser.add_argument("--store", help="SQLite result store (stack-size)")
+    experiment_parser.add_argument("--plot", action="store_true", help="plot the results with matplotlib (stack-size)")
+    experiment_parser.add_argument("--seed", type=int, default=0, help="seed (fuzz)")
+    experiment_parser.add_argument("--budget", type=float, default=60, help="seconds per algorithm (fuzz)")
+    experiment_parser.add_argument("--checker", "-c", choices=["mypy", "engine"], default="mypy",
+                                   help="checker of the fuzzed programs, or the faster subtyping engine (fuzz)")
+    experiment_parser.add_argument("--directory", "-d", default="profiles", help="profile directory (profile)")
+    experiment_parser.set_defaults(run=experiment_command)
+    return main_parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Runs the command-line interface and returns its exit status: 0 if every
+    word is accepted, 1 if some word is rejected, 2 if some verdict is
+    inconclusive (e.g., the checker timed out).
+    """
+    arguments: Namespace = parser().parse_args(argv)
+    try:
+        return arguments.run(arguments)
+    except ValueError as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
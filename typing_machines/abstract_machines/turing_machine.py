@@ -1,7 +1,9 @@
-from dataclasses import dataclass
+import json
+from dataclasses import dataclass, field
 from enum import Enum
 from functools import cached_property
-from typing import List
+from hashlib import sha256
+from typing import List, Dict, Tuple, Iterable
 
 
 class Direction(Enum):
@@ -34,36 +36,111 @@ class TuringMachine:
     """
     Turing machine specifications.
     Accepts the input word immediately when reaching its single accepting state.
+    `letters` declares letters besides those of the transitions, e.g.,
+    input letters the machine never reads, so that they are encoded too.
     """
     BLANK = "@"
     initial_state: str
     termination_state: str
     transitions: List[Transition]
+    letters: List[str] = field(default_factory=list)
 
     @cached_property
     def alphabet(self) -> List[str]:
         """
         Returns the machine alphabet, i.e., the set of machine letters.
         """
-        alphabet = []
+        alphabet: Dict[str, None] = {}
         for transition in self.transitions:
-            if transition.read_letter not in alphabet and transition.read_letter != TuringMachine.BLANK:
-                alphabet.append(transition.read_letter)
-            if transition.write_letter not in alphabet and transition.write_letter != TuringMachine.BLANK:
-                alphabet.append(transition.write_letter)
-        return alphabet
+            alphabet[transition.read_letter] = None
+            alphabet[transition.write_letter] = None
+        for letter in self.letters:
+            alphabet[letter] = None
+        alphabet.pop(TuringMachine.BLANK, None)
+        return list(alphabet)
 
     @cached_property
     def states(self) -> List[str]:
         """
         Returns the set of machine states.
         """
-        states = [self.initial_state]
+        states: Dict[str, None] = {self.initial_state: None}
         for transition in self.transitions:
-            if transition.source_state not in states:
-                states.append(transition.source_state)
-            if transition.target_state not in states:
-                states.append(transition.target_state)
-        if self.termination_state not in states:
-            states.append(self.termination_state)
-        return states
+            states[transition.source_state] = None
+            states[transition.target_state] = None
+        states[self.termination_state] = None
+        return list(states)
+
+    @cached_property
+    def letter_ids(self) -> Dict[str, int]:
+        """
+        Maps the blank letter to 0 and the alphabet letters to 1, 2, ...
+        """
+        return {letter: i for i, letter in enumerate([TuringMachine.BLANK] + self.alphabet)}
+
+    @cached_property
+    def state_ids(self) -> Dict[str, int]:
+        """
+        Maps the machine states to 0, 1, ...
+        """
+        return {state: i for i, state in enumerate(self.states)}
+
+    @cached_property
+    def transition_index(self) -> Dict[Tuple[str, str], Transition]:
+        """
+        Maps a state and a letter to the transition taken when the machine
+        is in that state and reads that letter.
+        """
+        return {(transition.source_state, transition.read_letter): transition for transition in self.transitions}
+
+    @cached_property
+    def outgoing_transitions(self) -> Dict[str, List[Transition]]:
+        """
+        Maps every state to the transitions leaving it.
+        """
+        outgoing_transitions: Dict[str, List[Transition]] = {state: [] for state in self.states}
+        for transition in self.transitions:
+            outgoing_transitions[transition.source_state].append(transition)
+        return outgoing_transitions
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """
+        Returns a stable hash of the machine specification.
+        """
+        specification = [TuringMachine.BLANK, self.initial_state, self.termination_state,
+                         [[transition.source_state, transition.read_letter, transition.target_state,
+                           transition.write_letter, transition.move_direction.name]
+                          for transition in self.transitions]]
+        if self.letters:
+            specification.append(self.letters)
+        return sha256(json.dumps(specification).encode()).hexdigest()
+
+    def validate(self, input_word: Iterable[str] = ()) -> None:
+        """
+        Checks that the machine can be compiled, and that the given input
+        word is over its alphabet. Raises `ValueError` otherwise.
+        """
+        errors: List[str] = []
+        sources: Dict[Tuple[str, str], Transition] = {}
+        for transition in self.transitions:
+            key: Tuple[str, str] = (transition.source_state, transition.read_letter)
+            if key in sources:
+                errors.append(f"nondeterministic transitions {sources[key]} and {transition}")
+            sources[key] = transition
+            if transition.source_state == self.termination_state:
+                errors.append(f"transition {transition} leaves the termination state")
+            if transition.write_letter == TuringMachine.BLANK:
+                errors.append(f"transition {transition} writes the blank letter")
+        for letter in self.alphabet:
+            if not f"L_{letter}".isidentifier():
+                errors.append(f"letter {letter!r} cannot be part of a class name")
+        for state in self.states:
+            if not f"Q_{state}".isidentifier():
+                errors.append(f"state {state!r} cannot be part of a class name")
+        for letter in input_word:
+            if letter not in self.letter_ids or letter == TuringMachine.BLANK:
+                errors.append(f"input letter {letter!r} is not in the machine alphabet")
+                break
+        if errors:
+            raise ValueError("invalid Turing machine: " + "; ".join(errors))
@@ -1,27 +1,54 @@
+from array import array
 from enum import Enum
 from os import remove
-from subprocess import Popen
-from time import sleep
-from typing import Union, List
+from typing import Union, List, TextIO, Iterable, Optional, Callable, Tuple, Dict
 
 from typing_machines.abstract_machines.turing_machine import TuringMachine
-from typing_machines.compilers.compiler_g import compile_g, compile_query_g
-from typing_machines.compilers.compiler_r import compile_r, compile_query_r
+from typing_machines.compilers.compiler_g import compile_g, compile_query_g, write_g, write_query_g, \
+    compile_configuration_query_g, write_configuration_query_g
+from typing_machines.compilers.compiler_r import compile_r, compile_query_r, write_r, write_query_r, \
+    compile_configuration_query_r, write_configuration_query_r
+from typing_machines.compilers.compaction import SymbolMap, CompactWriter, compact
+from typing_machines.compilers.cost_model import CostModel, EncodingMetrics, Prediction, encoding_metrics, \
+    DEFAULT_COEFFICIENTS
+from typing_machines.compilers.encoding_cache import EncodingCache
+from typing_machines.compilers.writer import Writer
 from typing_machines.examples.machines import palindromes
+from typing_machines.simulators.simulator import Configuration, simulate
+from typing_machines.transformations.transformation import TransformedMachine
 
 
 class Algorithm(Enum):
     """
-    Supported encoding algorithms by author name.
+    Supported encoding algorithms by author name. `Auto` picks the
+    construction with the cheaper predicted check for every machine and
+    input word (see `choose_algorithm`).
     """
     Grigore = 1
     Roth = 2
+    Auto = 3
+
+
+CONSTRUCTIONS: List[Algorithm] = [Algorithm.Grigore, Algorithm.Roth]
+""" Algorithms that are constructions of their own, i.e., all but `Algorithm.Auto`. """
+
+
+def require_construction(algorithm: Algorithm) -> Algorithm:
+    """
+    Returns the given algorithm if it is a construction of its own. Raises `ValueError` for `Algorithm.Auto`,
+    which only picks a construction for a given input word (see `resolve_algorithm`).
+    """
+    if algorithm == Algorithm.Auto:
+        raise ValueError("Algorithm.Auto needs an input word to pick a construction; resolve it with "
+                         "resolve_algorithm first")
+    return algorithm
 
 
 def encode_machine(algorithm: Algorithm, machine: TuringMachine) -> str:
     """
     Encode a Turing machine as a Python class table with given algorithm.
     """
+    require_construction(algorithm)
     if algorithm == Algorithm.Grigore:
         return compile_g(machine)
     elif algorithm == Algorithm.Roth:
@@ -30,10 +57,39 @@ def encode_machine(algorithm: Algorithm, machine: TuringMachine) -> str:
         raise Exception(f"unrecognized algorithm {algorithm}")
 
 
+machine_cache: EncodingCache = EncodingCache()
+""" Default in-memory cache of encoded class tables used by `encode`. """
+
+
+def cached_encode_machine(algorithm: Algorithm, machine: TuringMachine,
+                          cache: Optional[EncodingCache] = None) -> str:
+    """
+    Encode a Turing machine as a Python class table with given algorithm,
+    reusing the class table cached for the same machine and algorithm.
+    """
+    cache = machine_cache if cache is None else cache
+    return cache.get_or_compile(EncodingCache.key(algorithm.name, machine), lambda: encode_machine(algorithm, machine))
+
+
+def write_machine(algorithm: Algorithm, machine: TuringMachine, output: Writer) -> None:
+    """
+    Write the class table encoding a Turing machine with given algorithm
+    to a file-like object, one class definition at a time.
+    """
+    require_construction(algorithm)
+    if algorithm == Algorithm.Grigore:
+        write_g(machine, output)
+    elif algorithm == Algorithm.Roth:
+        write_r(machine, output)
+    else:
+        raise Exception(f"unrecognized algorithm {algorithm}")
+
+
 def encode_query(algorithm: Algorithm, machine: TuringMachine, input_word: Union[str, List[str]]) -> str:
     """
     Encode an input word as a Python subtyping query with given algorithm.
     """
+    require_construction(algorithm)
     if algorithm == Algorithm.Grigore:
         return compile_query_g(input_word, machine)
     elif algorithm == Algorithm.Roth:
@@ -42,26 +98,207 @@ def encode_query(algorithm: Algorithm, machine: TuringMachine, input_word: Union
         raise Exception(f"unrecognized algorithm {algorithm}")
 
 
-def encode(algorithm: Algorithm, machine: TuringMachine, input_word: Union[str, List[str]]) -> str:
+def write_query(algorithm: Algorithm, machine: TuringMachine, input_word: Iterable[str], output: Writer,
+                variable: str = "_") -> None:
+    """
+    Write the subtyping query encoding an input word with given algorithm
+    to a file-like object, as an assignment to the given variable.
+    The input word may be any iterable of letters.
+    """
+    require_construction(algorithm)
+    if algorithm == Algorithm.Grigore:
+        write_query_g(input_word, machine, output, variable)
+    elif algorithm == Algorithm.Roth:
+        write_query_r(input_word, machine, output, variable)
+    else:
+        raise Exception(f"unrecognized algorithm {algorithm}")
+
+
+def encode_configuration_query(algorithm: Algorithm, machine: TuringMachine, configuration: Configuration) -> str:
+    """
+    Encode a machine configuration (e.g., a checkpoint of `simulators.simulator.simulate`)
+    as a Python subtyping query with given algorithm, simulating the machine from it.
+    """
+    require_construction(algorithm)
+    if algorithm == Algorithm.Grigore:
+        return compile_configuration_query_g(configuration.state, configuration.tape, configuration.head, machine)
+    elif algorithm == Algorithm.Roth:
+        return compile_configuration_query_r(configuration.state, configuration.tape, configuration.head, machine)
+    else:
+        raise Exception(f"unrecognized algorithm {algorithm}")
+
+
+def write_configuration_query(algorithm: Algorithm, machine: TuringMachine, configuration: Configuration,
+                              output: Writer, variable: str = "_") -> None:
+    """
+    Write the subtyping query encoding a machine configuration with given algorithm
+    to a file-like object, as an assignment to the given variable.
+    """
+    require_construction(algorithm)
+    if algorithm == Algorithm.Grigore:
+        write_configuration_query_g(configuration.state, configuration.tape, configuration.head, machine, output,
+                                    variable)
+    elif algorithm == Algorithm.Roth:
+        write_configuration_query_r(configuration.state, configuration.tape, configuration.head, machine, output,
+                                    variable)
+    else:
+        raise Exception(f"unrecognized algorithm {algorithm}")
+
+
+cost_model: CostModel = CostModel(DEFAULT_COEFFICIENTS)
+""" Cost model used by `Algorithm.Auto`. Replace it with, e.g., `CostModel.load(path)` after calibrating. """
+
+
+_metrics_cache: Dict[Tuple[str, str], List[EncodingMetrics]] = {}
+""" Metrics of the class table and of the queries for words of zero, one and two letters, by algorithm and machine. """
+
+
+def estimate_metrics(algorithm: Algorithm, machine: TuringMachine, length: int) -> EncodingMetrics:
+    """
+    Returns the static metrics of the encoding of a machine and an input word of given length, without
+    encoding the word: the metrics of the class table are computed once per machine, and the nesting and size
+    of the query grow linearly with the word from one letter on, as from a one-letter to a two-letter word.
+    """
+    key: Tuple[str, str] = (algorithm.name, machine.fingerprint)
+    if key not in _metrics_cache:
+        _metrics_cache[key] = [encoding_metrics(cached_encode_machine(algorithm, machine))] + \
+            [encoding_metrics(encode_query(algorithm, machine, machine.alphabet[:1] * n)) for n in range(3)]
+    table, empty, one, two = _metrics_cache[key]
+    query: EncodingMetrics = empty if length == 0 else \
+        EncodingMetrics(0, 0, 0, one.max_nesting + (length - 1) * (two.max_nesting - one.max_nesting),
+                        one.bytes + (length - 1) * (two.bytes - one.bytes))
+    return EncodingMetrics(table.classes, table.max_bases, table.total_bases,
+                           max(table.max_nesting, query.max_nesting), table.bytes + 1 + query.bytes)
+
+
+def predict_cost(algorithm: Algorithm, machine: TuringMachine, length: int, steps: int,
+                 model: Optional[CostModel] = None) -> Prediction:
+    """
+    Predicts the stack size, CPU time and peak memory of checking the encoding of a machine and an input word
+    of given length, on which the machine takes the given number of steps, using `model` (by default,
+    `cost_model`).
+    """
+    metrics: EncodingMetrics = estimate_metrics(require_construction(algorithm), machine, length)
+    return (cost_model if model is None else model).predict(algorithm.name, metrics, steps)
+
+
+def estimate_cost(algorithm: Algorithm, machine: TuringMachine, input_word: Union[str, List[str]],
+                  max_steps: int = 100000, model: Optional[CostModel] = None) -> Prediction:
+    """
+    Predicts the stack size, CPU time and peak memory of checking the encoding of a machine and input word with
+    given algorithm (see `predict_cost`), simulating the machine natively, up to `max_steps`, for its steps.
+    """
+    return predict_cost(algorithm, machine, len(input_word), simulate(machine, input_word, max_steps=max_steps).steps,
+                        model)
+
+
+def choose_algorithm(machine: TuringMachine, input_word: Union[str, List[str]], stack_limit: float = 8,
+                     model: Optional[CostModel] = None, max_steps: int = 100000) -> Algorithm:
+    """
+    Returns the construction whose check is predicted to be the cheapest for a machine and input word:
+    the fastest one among those predicted to need at most `stack_limit` megabytes of stack (by default,
+    the usual 8M of Linux), or else the one predicted to need the least stack.
+    """
+    steps: int = simulate(machine, input_word, max_steps=max_steps).steps
+    predictions: List[Tuple[Algorithm, Prediction]] = [(algorithm, predict_cost(algorithm, machine, len(input_word),
+                                                                                steps, model))
+                                                       for algorithm in CONSTRUCTIONS]
+    fitting: List[Tuple[Algorithm, Prediction]] = [(algorithm, prediction) for algorithm, prediction in predictions
+                                                   if prediction.stack_size <= stack_limit]
+    if fitting:
+        return min(fitting, key=lambda item: item[1].cpu_time)[0]
+    return min(predictions, key=lambda item: item[1].stack_size)[0]
+
+
+def resolve_algorithm(algorithm: Algorithm, machine: TuringMachine, input_word: Union[str, List[str]]) -> Algorithm:
+    """
+    Returns the given algorithm, or the construction `Algorithm.Auto` picks for the machine and input word.
+    """
+    return choose_algorithm(machine, input_word) if algorithm == Algorithm.Auto else algorithm
+
+
+Transformation = Callable[[TuringMachine], TransformedMachine]
+""" Transformation of a machine before encoding, e.g., `typing_machines.transformations.minimization.minimize`. """
+
+
+def encode(algorithm: Algorithm, machine: TuringMachine, input_word: Union[str, List[str]],
+           cache: Optional[EncodingCache] = None, transform: Optional[Transformation] = None,
+           symbols: Optional[SymbolMap] = None) -> str:
     """
     Encode a Turing machine and its input using Python typing hints with given algorithm.
+    The class table is taken from `cache` (by default, `machine_cache`) when possible.
+    If `transform` is given, encodes the transformed machine and the translated input instead.
+    If `symbols` is given, class names are replaced by the short identifiers it assigns.
+    """
+    if transform is not None:
+        transformed: TransformedMachine = transform(machine)
+        machine, input_word = transformed.machine, transformed.translate_word(input_word)
+    algorithm = resolve_algorithm(algorithm, machine, input_word)
+    program: str = cached_encode_machine(algorithm, machine, cache) + "\n" + encode_query(algorithm, machine, input_word)
+    return program if symbols is None else compact(program, symbols)
+
+
+def encode_configuration(algorithm: Algorithm, machine: TuringMachine, configuration: Configuration,
+                         cache: Optional[EncodingCache] = None) -> str:
+    """
+    Encode a Turing machine and one of its configurations using Python typing hints with given algorithm,
+    so that checking the program simulates the machine from that configuration.
+    """
+    return cached_encode_machine(algorithm, machine, cache) + "\n" + \
+        encode_configuration_query(algorithm, machine, configuration)
+
+
+def write(algorithm: Algorithm, machine: TuringMachine, input_word: Iterable[str], output: TextIO,
+          transform: Optional[Transformation] = None, symbols: Optional[SymbolMap] = None) -> None:
+    """
+    Write a Turing machine and its input encoded with given algorithm to a file-like object.
+    If `transform` is given, writes the transformed machine and the translated input instead.
+    If `symbols` is given, class names are replaced by the short identifiers it assigns.
+    """
+    if transform is not None:
+        transformed: TransformedMachine = transform(machine)
+        machine, input_word = transformed.machine, transformed.translate_word(input_word)
+    if algorithm == Algorithm.Auto:
+        # the choice depends on the whole run, so buffer the word as compact letter ids, as write_query_g does,
+        # and write the query from an iterator over them
+        letters: Dict[str, int] = {}
+        ids: array = array("I", (letters.setdefault(letter, len(letters)) for letter in input_word))
+        names: List[str] = [*letters]
+        algorithm = choose_algorithm(machine, [names[i] for i in ids])
+        input_word = (names[i] for i in ids)
+    writer: Writer = output if symbols is None else CompactWriter(output, symbols)
+    write_machine(algorithm, machine, writer)
+    write_query(algorithm, machine, input_word, writer)
+    writer.flush()
+
+
+SYMBOLS_SUFFIX: str = ".symbols.json"
+""" Suffix of the symbol map that `write_compact` saves next to a module. """
+
+
+def write_compact(algorithm: Algorithm, machine: TuringMachine, input_word: Iterable[str], path: str,
+                  transform: Optional[Transformation] = None) -> SymbolMap:
+    """
+    Write a Turing machine and its input encoded with given algorithm to a file, with compact identifiers,
+    and save its symbol map next to it (`path + SYMBOLS_SUFFIX`). Returns the symbol map.
     """
-    return encode_machine(algorithm, machine) + "\n" + encode_query(algorithm, machine, input_word)
+    symbols: SymbolMap = SymbolMap()
+    with open(path, "w") as python_file:
+        write(algorithm, machine, input_word, python_file, transform, symbols)
+    symbols.save(path + SYMBOLS_SUFFIX)
+    return symbols
 
 
 if __name__ == '__main__':
+    from typing_machines.checkers.backends import CheckerBackend, MypySubprocessBackend
+    # without the incremental cache, mypy cannot mistake a rewritten file of the same size for an unchanged one
+    checker: CheckerBackend = MypySubprocessBackend(timeout=10, arguments=("--no-incremental",))
     print("Is 'abbabba' a palindrome?")
     with open("example.py", "w") as python_file:
         python_file.write(encode(Algorithm.Grigore, palindromes, "abbabba"))
-    sleep(1)
-    with Popen(["mypy", "example.py"]) as p:
-        retcode = p.wait(timeout=10)
-    assert retcode == 0  # abbabba is a palindrome
+    assert checker.check(["example.py"]).accepted  # abbabba is a palindrome
     print("Is 'abbbaba' a palindrome?")
     with open("example.py", "w") as python_file:
         python_file.write(encode(Algorithm.Grigore, palindromes, "abbbaba"))
-    sleep(1)
-    with Popen(["mypy", "example.py"]) as p:
-        retcode = p.wait(timeout=10)
-    assert retcode != 0  # abbbaba is not a palindrome
+    assert not checker.check(["example.py"]).accepted  # abbbaba is not a palindrome
     remove("example.py")
@@ -0,0 +1,398 @@
+"""
+Type checker backends. A backend checks generated modules and returns a
+structured result; long-lived backends keep a warm checker across queries
+instead of starting a fresh `mypy` process for each one.
+"""
+
+import os
+import signal
+from dataclasses import dataclass
+from enum import Enum
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from queue import Queue
+from resource import RLIMIT_STACK, RLIMIT_AS, RLIMIT_CPU, RUSAGE_SELF, setrlimit, getrusage, struct_rusage
+from subprocess import Popen, PIPE
+from tempfile import mkdtemp
+from threading import Thread, Timer, Lock
+from time import perf_counter, process_time
+from typing import List, Optional, Tuple, Dict, IO, Set
+
+from typing_machines.checkers.subtyping import parse_module, Judgement, is_subtype, ClassTable, Query, Term, ANY
+
+
+class Outcome(Enum):
+    """
+    Classification of a checker run.
+    """
+    ACCEPTED = 1
+    REJECTED = 2
+    STACK_OVERFLOW = 3
+    TIMEOUT = 4
+    OOM = 5
+    CRASH = 6
+
+
+_STACK_OVERFLOW_MESSAGES: Tuple[str, ...] = ("RecursionError", "maximum recursion depth", "stack overflow",
+                                             "Stack overflow")
+_OOM_MESSAGES: Tuple[str, ...] = ("MemoryError", "Cannot allocate memory", "out of memory", "can't start new thread")
+_TIMEOUT_MESSAGES: Tuple[str, ...] = ("step limit exceeded",)
+_BROKEN_MODULE_MESSAGES: Tuple[str, ...] = ("[name-defined]", "[import-not-found]")
+
+
+@dataclass
+class CheckResult:
+    """
+    Result of type checking generated modules, with the wall time, CPU
+    time (in seconds) and peak resident set size (in bytes) of the checker.
+    """
+    returncode: int
+    stdout: str
+    stderr: str
+    wall_time: float
+    cpu_time: float = 0.0
+    peak_rss: int = 0
+    timed_out: bool = False
+
+    @property
+    def accepted(self) -> bool:
+        """
+        Returns true iff the modules are correctly typed.
+        """
+        return self.returncode == 0
+
+    @property
+    def outcome(self) -> Outcome:
+        """
+        Classifies the run: a type error means the input word is rejected,
+        while crashes are told apart by signal and error message. Undefined
+        names and missing modules mean the module itself is broken, so they
+        count as crashes rather than rejections.
+        """
+        output: str = self.stdout + self.stderr
+        if self.timed_out or self.returncode == -signal.SIGXCPU or any(m in output for m in _TIMEOUT_MESSAGES):
+            return Outcome.TIMEOUT
+        if any(message in output for message in _STACK_OVERFLOW_MESSAGES) or \
+                self.returncode in (-signal.SIGSEGV, -signal.SIGBUS):
+            return Outcome.STACK_OVERFLOW
+        if any(message in output for message in _OOM_MESSAGES) or self.returncode == -signal.SIGKILL:
+            return Outcome.OOM
+        if any(message in output for message in _BROKEN_MODULE_MESSAGES):
+            return Outcome.CRASH
+        if self.returncode == 0:
+            return Outcome.ACCEPTED
+        if self.returncode == 1:
+            return Outcome.REJECTED
+        return Outcome.CRASH
+
+
+class CheckerBackend:
+    """
+    Type checker backend. Backends hold resources until closed,
+    and can be used as context managers.
+    """
+
+    def check(self, paths: List[str], cache_directory: Optional[str] = None) -> CheckResult:
+        """
+        Type checks the given modules, using the given cache directory if the backend supports one.
+        """
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        """
+        Releases the resources held by the backend.
+        """
+
+    def __enter__(self) -> "CheckerBackend":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def _set_limits(stack_size: Optional[int], memory_limit: Optional[int], cpu_limit: Optional[int]) -> None:
+    if stack_size is not None:
+        setrlimit(RLIMIT_STACK, (stack_size, stack_size))
+    if memory_limit is not None:
+        setrlimit(RLIMIT_AS, (memory_limit, memory_limit))
+    if cpu_limit is not None:
+        # exceeding the soft limit sends SIGXCPU, telling timeouts apart from the SIGKILL of the OOM killer
+        setrlimit(RLIMIT_CPU, (cpu_limit, cpu_limit + 1))
+
+
+def _read(stream: IO[str], chunks: List[str]) -> None:
+    chunks.append(stream.read())
+
+
+def run_checker(command: List[str], timeout: Optional[float] = None, stack_size: Optional[int] = None,
+                memory_limit: Optional[int] = None, cpu_limit: Optional[int] = None,
+                cwd: Optional[str] = None) -> CheckResult:
+    """
+    Runs a checker command with optional limits: `timeout` seconds of wall
+    time, after which the checker is killed, a call stack of `stack_size`
+    bytes, an address space of `memory_limit` bytes and `cpu_limit` seconds
+    of CPU time. The CPU time and peak memory of the checker are taken from
+    `wait4`, so they account for this process alone.
+    """
+    start: float = perf_counter()
+    limited: bool = stack_size is not None or memory_limit is not None or cpu_limit is not None
+    p: Popen = Popen(command, stdout=PIPE, stderr=PIPE, text=True, cwd=cwd,
+                     preexec_fn=(lambda: _set_limits(stack_size, memory_limit, cpu_limit)) if limited else None)
+    stdout: List[str] = []
+    stderr: List[str] = []
+    readers: List[Thread] = [Thread(target=_read, args=(p.stdout, stdout)), Thread(target=_read, args=(p.stderr, stderr))]
+    for reader in readers:
+        reader.start()
+    lock: Lock = Lock()
+    exited: List[bool] = []
+
+    def kill() -> None:
+        with lock:
+            if not exited:
+                exited.append(False)
+                os.kill(p.pid, signal.SIGKILL)
+
+    timer: Optional[Timer] = None if timeout is None else Timer(timeout, kill)
+    if timer is not None:
+        timer.start()
+    # wait without reaping first, so the timer never signals a reaped (and possibly reused) pid
+    os.waitid(os.P_PID, p.pid, os.WEXITED | os.WNOWAIT)
+    with lock:
+        timed_out: bool = bool(exited)
+        exited.append(True)
+    _, status, usage = os.wait4(p.pid, 0)
+    p.returncode = os.waitstatus_to_exitcode(status)
+    if timer is not None:
+        timer.cancel()
+    for reader in readers:
+        reader.join()
+    assert p.stdout is not None and p.stderr is not None
+    p.stdout.close()
+    p.stderr.close()
+    return CheckResult(p.returncode, "".join(stdout), "".join(stderr), perf_counter() - start,
+                       usage.ru_utime + usage.ru_stime, usage.ru_maxrss * 1024, timed_out)
+
+
+class MypySubprocessBackend(CheckerBackend):
+    """
+    Runs a fresh `mypy` process for every check, with the limits of `run_checker`.
+    Crashes print a traceback, so that their outcome can be classified.
+    """
+
+    def __init__(self, stack_size: Optional[int] = None, timeout: Optional[float] = None,
+                 arguments: Tuple[str, ...] = (), memory_limit: Optional[int] = None, cpu_limit: Optional[int] = None):
+        self.stack_size: Optional[int] = stack_size
+        self.timeout: Optional[float] = timeout
+        self.arguments: Tuple[str, ...] = arguments
+        self.memory_limit: Optional[int] = memory_limit
+        self.cpu_limit: Optional[int] = cpu_limit
+
+    def check(self, paths: List[str], cache_directory: Optional[str] = None) -> CheckResult:
+        cache_arguments: List[str] = [] if cache_directory is None else ["--cache-dir", cache_directory]
+        return run_checker(["mypy", "--show-traceback", *self.arguments, *cache_arguments, *paths], self.timeout,
+                           self.stack_size, self.memory_limit, self.cpu_limit)
+
+
+class DmypyBackend(CheckerBackend):
+    """
+    Checks modules with a long-lived `dmypy` daemon, started on creation
+    and stopped on close. The daemon keeps its state in memory, so the
+    cache directory is ignored. The reported CPU time and memory are those
+    of the `dmypy` client.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, arguments: Tuple[str, ...] = ()):
+        self.timeout: Optional[float] = timeout
+        self.status_file: str = os.path.join(mkdtemp(prefix="dmypy_"), "status.json")
+        run_checker(["dmypy", "--status-file", self.status_file, "start", "--", *arguments], timeout)
+
+    def check(self, paths: List[str], cache_directory: Optional[str] = None) -> CheckResult:
+        return run_checker(["dmypy", "--status-file", self.status_file, "check", *paths], self.timeout)
+
+    def close(self) -> None:
+        run_checker(["dmypy", "--status-file", self.status_file, "stop"], self.timeout)
+        try:
+            os.remove(self.status_file)
+            os.rmdir(os.path.dirname(self.status_file))
+        except OSError:
+            pass
+
+
+def _serve_mypy_api(connection: Connection) -> None:
+    """
+    Worker loop running `mypy.api.run` on the arguments received through the connection.
+    """
+    from mypy import api
+    while True:
+        arguments: Optional[List[str]] = connection.recv()
+        if arguments is None:
+            break
+        start: float = perf_counter()
+        cpu_start: float = process_time()
+        stdout, stderr, returncode = api.run(arguments)
+        usage: struct_rusage = getrusage(RUSAGE_SELF)
+        connection.send((stdout, stderr, returncode, perf_counter() - start, process_time() - cpu_start,
+                         usage.ru_maxrss * 1024))
+
+
+class _MypyApiWorker:
+    """
+    Pre-forked worker process that has already imported mypy. The reported
+    peak memory is that of the worker over its lifetime.
+    """
+
+    def __init__(self):
+        self.connection, child_connection = Pipe()
+        self.process: Process = Process(target=_serve_mypy_api, args=(child_connection,), daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def run(self, arguments: List[str], timeout: Optional[float]) -> CheckResult:
+        start: float = perf_counter()
+        self.connection.send(arguments)
+        if not self.connection.poll(timeout):
+            self.stop()
+            return CheckResult(-signal.SIGKILL, "", "", perf_counter() - start, timed_out=True)
+        try:
+            stdout, stderr, returncode, wall_time, cpu_time, peak_rss = self.connection.recv()
+        except EOFError:
+            # the worker died, e.g., on a stack overflow
+            self.process.join()
+            return CheckResult(self.process.exitcode or -1, "", "mypy worker crashed\n", perf_counter() - start)
+        return CheckResult(returncode, stdout, stderr, wall_time, cpu_time, peak_rss)
+
+    def stop(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class MypyApiBackend(CheckerBackend):
+    """
+    Checks modules with `workers` pre-forked worker processes that have
+    already imported mypy and call `mypy.api.run`. Concurrent checks from
+    different threads run on different workers. A worker that crashes or
+    times out is replaced by a fresh one.
+    """
+
+    def __init__(self, workers: int = 1, timeout: Optional[float] = None, arguments: Tuple[str, ...] = ()):
+        self.timeout: Optional[float] = timeout
+        self.arguments: Tuple[str, ...] = arguments
+        self._workers: "Queue[_MypyApiWorker]" = Queue()
+        for _ in range(workers):
+            self._workers.put(_MypyApiWorker())
+        self._size: int = workers
+
+    def check(self, paths: List[str], cache_directory: Optional[str] = None) -> CheckResult:
+        cache_arguments: List[str] = [] if cache_directory is None else ["--cache-dir", cache_directory]
+        worker: _MypyApiWorker = self._workers.get()
+        try:
+            return worker.run(["--show-traceback", *self.arguments, *cache_arguments, *paths], self.timeout)
+        finally:
+            if not worker.process.is_alive():
+                worker.stop()
+                worker = _MypyApiWorker()
+            self._workers.put(worker)
+
+    def close(self) -> None:
+        for _ in range(self._size):
+            worker: _MypyApiWorker = self._workers.get()
+            if worker.process.is_alive():
+                worker.connection.send(None)
+                worker.process.join(1)
+            worker.stop()
+
+
+class SubtypingEngineBackend(CheckerBackend):
+    """
+    Checks modules in-process with the subtyping engine of
+    `typing_machines.checkers.subtyping`, reporting errors like mypy does.
+    Modules imported with `from module import *` are looked up next to the
+    importing module; missing modules and undefined class names are reported
+    like mypy does, with return code 1. A query exceeding `max_steps`
+    subtyping steps is reported as an internal error with return code 2.
+    """
+
+    def __init__(self, max_steps: int = 1000000):
+        self.max_steps: int = max_steps
+
+    def check(self, paths: List[str], cache_directory: Optional[str] = None) -> CheckResult:
+        start: float = perf_counter()
+        cpu_start: float = process_time()
+        errors: List[str] = []
+        returncode: int = 0
+        for path in paths:
+            with open(path) as python_file:
+                source: str = python_file.read()
+            class_table, queries = parse_module(source)
+            missing: List[Tuple[int, str]] = self._import(class_table, source, os.path.dirname(path))
+            errors += [f"{path}:{line}: error: Cannot find implementation or library stub for module named "
+                       f"\"{module}\"  [import-not-found]" for line, module in missing]
+            # names a missing module would define are not reported separately
+            undefined: List[Tuple[int, str]] = [] if missing else \
+                self._undefined_names(class_table, source, queries)
+            errors += [f"{path}:{line}: error: Name \"{name}\" is not defined  [name-defined]"
+                       for line, name in undefined]
+            if missing or undefined:
+                returncode = max(returncode, 1)
+                continue
+            for query in queries:
+                judgement: Judgement = is_subtype(class_table, query.value, query.annotation, self.max_steps).judgement
+                if judgement == Judgement.NOT_SUBTYPE:
+                    errors.append(f"{path}:{query.line}: error: Incompatible types in assignment  [assignment]")
+                    returncode = max(returncode, 1)
+                elif judgement == Judgement.STEP_LIMIT:
+                    errors.append(f"{path}:{query.line}: error: subtyping step limit exceeded")
+                    returncode = 2
+        summary: str = f"Found {len(errors)} errors in {len(paths)} files" if errors else \
+            f"Success: no issues found in {len(paths)} source files"
+        return CheckResult(returncode, "".join(f"{error}\n" for error in errors) + summary + "\n", "",
+                           perf_counter() - start, process_time() - cpu_start, getrusage(RUSAGE_SELF).ru_maxrss * 1024)
+
+    @staticmethod
+    def _import(class_table: ClassTable, source: str, directory: str) -> List[Tuple[int, str]]:
+        """
+        Adds the classes of the modules the source imports with `from module import *` to its class table.
+        Returns the line numbers and names of the modules that cannot be found.
+        """
+        missing: List[Tuple[int, str]] = []
+        for number, line in enumerate(source.splitlines(), start=1):
+            if line.startswith("from ") and line.endswith(" import *"):
+                module: str = line[len("from "):-len(" import *")].strip()
+                missing.append((number, module))
+                for extension in (".pyi", ".py"):
+                    path: str = os.path.join(directory, *module.split(".")) + extension
+                    if os.path.exists(path):
+                        with open(path) as module_file:
+                            imported_table, _ = parse_module(module_file.read())
+                        bases: Dict = dict(imported_table.bases)
+                        bases.update(class_table.bases)
+                        class_table.bases = bases
+                        class_table.generic |= imported_table.generic
+                        class_table.type_variable = imported_table.type_variable
+                        missing.pop()
+                        break
+        return missing
+
+    @staticmethod
+    def _undefined_names(class_table: ClassTable, source: str, queries: List[Query]) -> List[Tuple[int, str]]:
+        """
+        Returns the line numbers and names of the classes that the class definitions and queries of the source
+        refer to, but that neither the source nor its imports define.
+        """
+        defined: Set[str] = set(class_table.bases) | {ANY, class_table.type_variable}
+        terms: List[Tuple[int, Term]] = []
+        for number, line in enumerate(source.splitlines(), start=1):
+            if line.startswith("class "):
+                name: str = line[len("class "):].partition("(")[0].partition(":")[0].strip()
+                terms += [(number, base) for base in class_table.bases.get(name, [])]
+        terms += [(query.line, term) for query in queries for term in (query.annotation, query.value)]
+        undefined: List[Tuple[int, str]] = []
+        for number, term in terms:
+            current: Optional[Term] = term
+            while current is not None:
+                if current[0] not in defined and (number, current[0]) not in undefined:
+                    undefined.append((number, current[0]))
+                current = current[1]
+        return undefined
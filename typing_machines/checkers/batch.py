@@ -0,0 +1,138 @@
+"""
+Batch checking of many input words against one machine. Every chunk of
+words becomes a single module with one class table followed by one query
+assignment per word, and checker diagnostics are attributed back to the
+words by line number.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from tempfile import mkdtemp
+from typing import List, Optional, Sequence, TextIO, Union, Dict, Pattern
+
+from typing_machines.abstract_machines.turing_machine import TuringMachine
+from typing_machines.app import Algorithm, cached_encode_machine, write_query, resolve_algorithm
+from typing_machines.checkers.backends import CheckerBackend, CheckResult, Outcome
+from typing_machines.checkers.layout import SplitLayout
+
+DIAGNOSTIC: Pattern = re.compile(r"^(?P<path>.+?):(?P<line>\d+)(?::\d+)?: (?P<severity>error|note): (?P<message>.*)$")
+""" Diagnostic line in mypy's output format. """
+
+
+@dataclass
+class QueryResult:
+    """
+    Verdict of the checker on one input word of a batch. `accepted` is
+    `None` if the checker crashed (or timed out) even on the word alone.
+    """
+    input_word: Union[str, List[str]]
+    accepted: Optional[bool]
+    diagnostics: List[str] = field(default_factory=list)
+
+
+def write_batch(algorithm: Algorithm, machine: TuringMachine, input_words: Sequence[Union[str, List[str]]],
+                output: TextIO, layout: Optional[SplitLayout] = None) -> List[int]:
+    """
+    Writes a module with the class table of a machine followed by one
+    query per input word, assigning the variables `_0`, `_1`, ... If a
+    layout is given, the module imports the class table from it instead,
+    so the algorithm must be the construction of that class table.
+    `Algorithm.Auto` picks one construction for all the words, by the longest one.
+    Returns the line number of every query.
+    """
+    if algorithm == Algorithm.Auto and layout is not None:
+        raise ValueError(f"the class table of {layout.machine_module} is encoded with a fixed construction, "
+                         f"pass it instead of Algorithm.Auto")
+    if algorithm == Algorithm.Auto and input_words:
+        algorithm = resolve_algorithm(algorithm, machine, max(input_words, key=len))
+    header: str = f"from {layout.machine_module} import *\n" if layout is not None else \
+        cached_encode_machine(algorithm, machine) + "\n"
+    output.write(header)
+    first_line: int = header.count("\n") + 1
+    for i, input_word in enumerate(input_words):
+        write_query(algorithm, machine, input_word, output, f"_{i}")
+    return list(range(first_line, first_line + len(input_words)))
+
+
+def _attribute(result: CheckResult, path: str, lines: List[int]) -> Optional[List[List[str]]]:
+    """
+    Maps the diagnostics of a check to the queries in the given lines.
+    Returns `None` if the check did not complete normally, i.e., it crashed
+    or reported errors that cannot be attributed to any query.
+    """
+    if result.outcome not in (Outcome.ACCEPTED, Outcome.REJECTED):
+        return None
+    queries: Dict[int, int] = {line: i for i, line in enumerate(lines)}
+    diagnostics: List[List[str]] = [[] for _ in lines]
+    errors: int = 0
+    for output_line in result.stdout.splitlines():
+        match = DIAGNOSTIC.match(output_line)
+        if match is None:
+            continue
+        line: int = int(match.group("line"))
+        if os.path.abspath(match.group("path")) != os.path.abspath(path) or line not in queries:
+            return None
+        diagnostics[queries[line]].append(output_line)
+        errors += match.group("severity") == "error"
+    if result.returncode == 1 and errors == 0:
+        return None
+    return diagnostics
+
+
+def check_batch(algorithm: Algorithm, machine: TuringMachine, input_words: Sequence[Union[str, List[str]]],
+                checker: CheckerBackend, directory: str, chunk_size: int = 100,
+                layout: Optional[SplitLayout] = None) -> List[QueryResult]:
+    """
+    Checks many input words in chunks of `chunk_size` words per module.
+    A chunk on which the checker crashes, times out, or reports errors
+    outside the queries is bisected until the offending words are checked
+    on their own. Modules are written to a fresh subdirectory of `directory`,
+    or, with a layout, next to its class table module so that they can import it.
+    `Algorithm.Auto` picks one construction for the whole batch, by the longest word.
+    """
+    if algorithm == Algorithm.Auto and layout is None and input_words:
+        algorithm = resolve_algorithm(algorithm, machine, max(input_words, key=len))
+    os.makedirs(directory, exist_ok=True)
+    workspace: str = mkdtemp(prefix="batch_", dir=directory)
+    # chunk modules importing the class table must be on the checker's search path along with it
+    module_directory: str = workspace if layout is None else layout.directory
+    results: List[Optional[QueryResult]] = [None] * len(input_words)
+    pending: List[range] = [range(start, min(start + chunk_size, len(input_words)))
+                            for start in range(0, len(input_words), chunk_size)]
+    modules: int = 0
+    while pending:
+        chunk: range = pending.pop()
+        path: str = os.path.join(module_directory, f"{os.path.basename(workspace)}_chunk_{modules}.py")
+        modules += 1
+        with open(path, "w") as python_file:
+            lines: List[int] = write_batch(algorithm, machine, [input_words[i] for i in chunk], python_file, layout)
+        result: CheckResult = checker.check([path], None if layout is None else layout.cache_directory)
+        diagnostics: Optional[List[List[str]]] = _attribute(result, path, lines)
+        if diagnostics is not None:
+            for i, query_diagnostics in zip(chunk, diagnostics):
+                accepted: bool = not any(": error: " in diagnostic for diagnostic in query_diagnostics)
+                results[i] = QueryResult(input_words[i], accepted, query_diagnostics)
+        elif len(chunk) == 1:
+            results[chunk[0]] = QueryResult(input_words[chunk[0]], None, (result.stdout + result.stderr).splitlines())
+        else:
+            middle: int = len(chunk) // 2
+            pending += [chunk[middle:], chunk[:middle]]
+        os.remove(path)
+    os.rmdir(workspace)
+    return [result for result in results if result is not None]
+
+
+if __name__ == '__main__':
+    from tempfile import TemporaryDirectory
+    from typing_machines.checkers.backends import SubtypingEngineBackend
+    from typing_machines.checkers.layout import write_machine_module
+    from typing_machines.examples.machines import palindromes
+    from typing_machines.simulators.simulator import simulate, Verdict
+    batch_words: List[Union[str, List[str]]] = ["abba", "abbabba", "ab", "a", ""]
+    expected: List[bool] = [simulate(palindromes, word).verdict == Verdict.ACCEPT for word in batch_words]
+    with TemporaryDirectory() as batch_directory, SubtypingEngineBackend() as engine:
+        for batch_layout in [None, write_machine_module(Algorithm.Roth, palindromes, batch_directory)]:
+            batch_results: List[QueryResult] = check_batch(Algorithm.Roth, palindromes, batch_words, engine,
+                                                           batch_directory, chunk_size=2, layout=batch_layout)
+            assert [result.accepted for result in batch_results] == expected
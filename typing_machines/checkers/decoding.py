@@ -0,0 +1,177 @@
+"""
+Decoding of type terms back to the machine configurations they encode.
+
+In both encodings, a subtyping goal at a step boundary splits the tape
+between its two terms: one term starts with a state class and holds the
+cells on one side of the split, nearest first, and the other term holds the
+rest. In Grigore's encoding, the state classes `QLW_q` / `QRW_q` sweep the
+whole tape, listed from left to right / from right to left, and the marker
+`MR` / `ML` sits right before / after the head cell (in left-to-right order).
+In Roth's encoding, `QR_q` / `QL_q` hold the cells to the left / right of
+the head, and the other term starts with the head cell.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Iterable, Iterator, Tuple, Pattern, Dict
+
+from typing_machines.abstract_machines.turing_machine import TuringMachine, Direction
+from typing_machines.app import Algorithm, require_construction
+from typing_machines.compilers.compaction import SymbolMap
+from typing_machines.compilers.compiler_r import TAPE_END
+from typing_machines.simulators.simulator import Configuration
+
+STATE_CLASSES: Dict[Algorithm, Tuple[str, str]] = {Algorithm.Grigore: ("QLW", "QRW"), Algorithm.Roth: ("QL", "QR")}
+""" Prefixes of the left / right state classes that start a term at a step boundary, by algorithm. """
+
+_MARKERS: Tuple[str, str] = ("ML", "MR")
+
+_TERM: Pattern = re.compile(r"[A-Za-z_]\w*\[[\w\[\"']*\]+")
+""" Type term in a log line, e.g., in a mypy message or a line of `subtyping.write_trace`. """
+
+
+@dataclass
+class DecodedConfiguration:
+    """
+    Machine configuration decoded from type terms, in the format of
+    `simulators.simulator.Configuration`. `head` is `None` if the terms
+    do not tell where the head is, and `direction` is the side of the
+    state class (see `STATE_CLASSES`).
+    """
+    state: str
+    tape: List[str]
+    head: Optional[int]
+    direction: Direction
+
+    def configuration(self) -> Configuration:
+        """
+        Returns the decoded configuration. Raises `ValueError` if the head position is unknown.
+        """
+        if self.head is None:
+            raise ValueError("the head position is unknown")
+        return Configuration(self.state, self.tape, self.head)
+
+
+def type_names(text: str) -> List[str]:
+    """
+    Returns the class names of a type expression such as `A["B[C]"]`, outermost first.
+    Splits the text instead of recursing, so terms may be nested arbitrarily deep.
+    """
+    text = text.replace("\"", "").replace("'", "").replace(" ", "")
+    return text.rstrip("]").split("[")
+
+
+def _state_class(algorithm: Algorithm, name: str) -> Optional[Tuple[Direction, str]]:
+    """
+    Returns the side and state of a state class starting a term at a step boundary.
+    """
+    prefix, _, state = name.partition("_")
+    left, right = STATE_CLASSES[require_construction(algorithm)]
+    if not state or prefix not in (left, right):
+        return None
+    return Direction.LEFT if prefix == left else Direction.RIGHT, state
+
+
+def _cells(names: Iterable[str]) -> List[str]:
+    """
+    Returns the letters (with blanks for the ends of the tape) and head markers in a chain of class names.
+    """
+    cells: List[str] = []
+    for name in names:
+        if name == f"L_{TAPE_END}":
+            cells.append(TuringMachine.BLANK)
+        elif name.startswith("L_"):
+            cells.append(name[2:])
+        elif name in _MARKERS:
+            cells.append(name)
+    return cells
+
+
+def _decode(state: str, direction: Direction, cells: List[str], head: Optional[int]) -> DecodedConfiguration:
+    """
+    Builds the configuration of a state and its cells from left to right, locating the head by its marker
+    if there is one, and trimming the blanks at the ends of the tape.
+    """
+    tape: List[str] = []
+    for cell in cells:
+        if cell == "MR":
+            head = len(tape)
+        elif cell == "ML":
+            head = len(tape) - 1
+        else:
+            tape.append(cell)
+    start: int = 0
+    while start < len(tape) and tape[start] == TuringMachine.BLANK:
+        start += 1
+    end: int = len(tape)
+    while end > start and tape[end - 1] == TuringMachine.BLANK:
+        end -= 1
+    return DecodedConfiguration(state, tape[start:end], None if head is None else head - start, direction)
+
+
+def decode_term(algorithm: Algorithm, text: str) -> Optional[DecodedConfiguration]:
+    """
+    Decodes a type term that starts with a state class (see `STATE_CLASSES`),
+    e.g., `QRW_q3[L_a[N[...]]]`, into the state and the cells the term holds.
+    Returns `None` for other terms.
+    """
+    names: List[str] = type_names(text)
+    state_class: Optional[Tuple[Direction, str]] = _state_class(algorithm, names[0])
+    if state_class is None:
+        return None
+    direction, state = state_class
+    cells: List[str] = _cells(names[1:])
+    if direction == Direction.RIGHT:
+        cells.reverse()
+    if algorithm == Algorithm.Roth:
+        return _decode(state, direction, cells, len(cells) if direction == Direction.RIGHT else -1)
+    return _decode(state, direction, cells, None)
+
+
+def decode_goal(algorithm: Algorithm, subtype: str, supertype: str) -> Optional[DecodedConfiguration]:
+    """
+    Decodes a subtyping goal at a step boundary (e.g., a query) into the
+    whole configuration. Returns `None` if neither term starts with a state
+    class, i.e., in the middle of a step.
+    """
+    names: List[str] = type_names(subtype)
+    other: List[str] = type_names(supertype)
+    state_class: Optional[Tuple[Direction, str]] = _state_class(algorithm, names[0])
+    if state_class is None:
+        names, other = other, names
+        state_class = _state_class(algorithm, names[0])
+        if state_class is None:
+            return None
+    direction, state = state_class
+    cells: List[str] = _cells(names[1:])
+    other_cells: List[str] = _cells(other)
+    left, right = (cells, other_cells) if direction == Direction.RIGHT else (other_cells, cells)
+    left.reverse()
+    if algorithm == Algorithm.Roth:
+        head: int = len(left) if direction == Direction.RIGHT else len(left) - 1
+        return _decode(state, direction, left + right, head)
+    return _decode(state, direction, left + right, None)
+
+
+def decode_log(algorithm: Algorithm, lines: Iterable[str],
+               symbols: Optional[SymbolMap] = None) -> Iterator[Tuple[int, DecodedConfiguration]]:
+    """
+    Decodes the type terms in a log, e.g., checker messages or a trace of
+    `subtyping.write_trace`, line by line, and generates the line numbers
+    (from 1) and the decoded configurations. A line with two terms is
+    decoded as a goal (the subtype first), falling back to its terms on
+    their own. If `symbols` is given, compact identifiers are decoded first.
+    """
+    for number, line in enumerate(lines, start=1):
+        if symbols is not None:
+            line = symbols.decode(line)
+        terms: List[str] = [match.group(0) for match in _TERM.finditer(line)]
+        if len(terms) == 2:
+            decoded: Optional[DecodedConfiguration] = decode_goal(algorithm, *terms)
+            if decoded is not None:
+                yield number, decoded
+                continue
+        for term in terms:
+            decoded = decode_term(algorithm, term)
+            if decoded is not None:
+                yield number, decoded
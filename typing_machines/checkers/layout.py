@@ -0,0 +1,78 @@
+"""
+Split module layout for type checking many queries against one machine.
+The class table is written once to a stable module (or stub) named after
+the machine fingerprint, and every query goes into a small module that
+imports it, so the checker's incremental cache keeps the class table warm.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from typing_machines.abstract_machines.turing_machine import TuringMachine
+from typing_machines.app import Algorithm, cached_encode_machine, write_query
+from typing_machines.compilers.encoding_cache import EncodingCache
+
+
+@dataclass
+class SplitLayout:
+    """
+    Location of a class table module and the checker cache directory
+    dedicated to it.
+    """
+    directory: str
+    machine_module: str
+    machine_path: str
+    cache_directory: str
+
+    def query_path(self, name: str) -> str:
+        """
+        Returns the path of the query module with the given name.
+        """
+        return os.path.join(self.directory, f"{name}.py")
+
+    def mypy_command(self, *paths: str) -> List[str]:
+        """
+        Returns the mypy command checking the given query modules with the
+        cache directory of this layout.
+        """
+        return ["mypy", "--cache-dir", self.cache_directory, *paths]
+
+
+def machine_module_name(algorithm: Algorithm, machine: TuringMachine) -> str:
+    """
+    Returns the stable module name of the class table of a machine.
+    """
+    return f"machine_{algorithm.name.lower()}_{machine.fingerprint[:16]}"
+
+
+def write_machine_module(algorithm: Algorithm, machine: TuringMachine, directory: str, stub: bool = False,
+                         cache: Optional[EncodingCache] = None) -> SplitLayout:
+    """
+    Writes the class table of a machine to a module (or a `.pyi` stub if
+    `stub` is set) in the given directory, unless it is already there, and
+    returns its layout.
+    """
+    os.makedirs(directory, exist_ok=True)
+    module: str = machine_module_name(algorithm, machine)
+    path: str = os.path.join(directory, module + (".pyi" if stub else ".py"))
+    text: str = cached_encode_machine(algorithm, machine, cache) + "\n"
+    if not os.path.exists(path) or os.path.getsize(path) != len(text):
+        # keep the file (and its modification time) untouched if it exists, so the cache stays valid
+        temporary_path: str = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as machine_file:
+            machine_file.write(text)
+        os.replace(temporary_path, path)
+    return SplitLayout(directory, module, path, os.path.join(directory, f".mypy_cache_{module}"))
+
+
+def write_query_module(layout: SplitLayout, algorithm: Algorithm, machine: TuringMachine,
+                       input_word: Iterable[str], name: str = "query") -> str:
+    """
+    Writes a query module importing the class table of the layout and returns its path.
+    """
+    path: str = layout.query_path(name)
+    with open(path, "w") as query_file:
+        query_file.write(f"from {layout.machine_module} import *\n")
+        write_query(algorithm, machine, input_word, query_file)
+    return path
@@ -0,0 +1,266 @@
+"""
+Profiling of mypy runs, to tell whether checking a generated module spends
+its time parsing, in semantic analysis or in subtype checks. The profiled
+run calls `mypy.api.run` in a fresh process under cProfile, which records
+per-function statistics, while a sampler records the call stacks in the
+collapsed format of flame graph tools (one `frame;frame;... count` line
+per distinct stack).
+
+Released mypy wheels are compiled with mypyc, and compiled functions are
+invisible to profilers. The profiled process therefore imports mypy from
+the Python sources installed next to the compiled modules. Interpreted mypy
+is several times slower, but attributes the time to mypy's own functions,
+e.g., those of `mypy.subtypes`.
+"""
+
+import os
+import pstats
+import signal
+import sys
+from collections import Counter
+from cProfile import Profile
+from dataclasses import dataclass
+from importlib.abc import MetaPathFinder
+from importlib.machinery import PathFinder, ExtensionFileLoader, ModuleSpec
+from importlib.util import spec_from_file_location
+from multiprocessing import get_context
+from multiprocessing.connection import Connection
+from resource import RUSAGE_SELF, getrusage
+from threading import Thread, stack_size as set_thread_stack_size
+from time import perf_counter, process_time, sleep
+from types import FrameType
+from typing import List, Optional, Tuple, Dict, Sequence, Any
+
+from typing_machines.checkers.backends import CheckerBackend, CheckResult
+
+STATS_SUFFIX: str = ".pstats"
+""" Suffix of the per-function statistics of a profile, readable with `pstats.Stats`. """
+
+STACKS_SUFFIX: str = ".folded"
+""" Suffix of the collapsed stacks of a profile, e.g., for `flamegraph.pl` or speedscope. """
+
+PHASES: List[Tuple[str, str]] = [("mypy.fastparse", "parsing"), ("mypy.nativeparse", "parsing"),
+                                 ("mypy.parse", "parsing"), ("ast", "parsing"),
+                                 ("mypy.semanal", "semantic analysis"), ("mypy.typeanal", "semantic analysis"),
+                                 ("mypy.subtypes", "subtype checks"), ("mypy.expandtype", "subtype checks"),
+                                 ("mypy.maptype", "subtype checks"), ("mypy.typeops", "subtype checks"),
+                                 ("mypy.check", "type checking")]
+""" Phases of a mypy run by module prefix, first match first. Functions of other modules count as `other`. """
+
+
+class _InterpretedMypyFinder(MetaPathFinder):
+    """
+    Finds the Python sources of mypy's modules instead of their compiled versions.
+    """
+
+    def find_spec(self, fullname: str, path: Optional[Sequence[str]], target: Any = None) -> Optional[ModuleSpec]:
+        if fullname.partition(".")[0] != "mypy":
+            return None
+        spec: Optional[ModuleSpec] = PathFinder.find_spec(fullname, path)
+        if spec is None or spec.origin is None or not isinstance(spec.loader, ExtensionFileLoader):
+            return spec
+        name: str = "__init__" if spec.submodule_search_locations is not None else fullname.rpartition(".")[2]
+        source: str = os.path.join(os.path.dirname(spec.origin), f"{name}.py")
+        if not os.path.exists(source):
+            return spec
+        return spec_from_file_location(fullname, source,
+                                       submodule_search_locations=spec.submodule_search_locations)
+
+
+def module_name(filename: str) -> str:
+    """
+    Returns the name of the module of a source file, by the longest matching entry of `sys.path`.
+    Built-in functions, which `pstats` lists under the file name `~`, are in `builtins`.
+    """
+    if filename == "~":
+        return "builtins"
+    directories: List[str] = [directory for directory in sys.path
+                              if directory and filename.startswith(os.path.join(directory, ""))]
+    relative: str = filename[len(os.path.join(max(directories, key=len), "")):] if directories else \
+        os.path.basename(filename)
+    module: str = os.path.splitext(relative)[0].replace(os.sep, ".")
+    return module[:-len(".__init__")] if module.endswith(".__init__") else module
+
+
+def phase(module: str) -> str:
+    """
+    Returns the phase of a mypy run that the functions of a module belong to (see `PHASES`).
+    """
+    return next((name for prefix, name in PHASES if module.startswith(prefix)), "other")
+
+
+def _collapse(frame: Optional[FrameType]) -> str:
+    names: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{module_name(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _profile_mypy(arguments: List[str], base_path: str, interval: float, thread_stack_size: int,
+                  connection: Connection) -> None:
+    """
+    Runs `mypy.api.run` on the given arguments under cProfile in a thread with the given stack size, while
+    sampling its stack every `interval` seconds, writes the statistics and stacks next to `base_path`,
+    and sends the output and measurements through the connection.
+    """
+    sys.meta_path.insert(0, _InterpretedMypyFinder())
+    from mypy import api
+    outputs: List[Tuple[str, str, int]] = []
+    profile: Profile = Profile()
+
+    def run() -> None:
+        profile.enable()
+        try:
+            outputs.append(api.run(arguments))
+        finally:
+            profile.disable()
+
+    set_thread_stack_size(thread_stack_size)
+    start: float = perf_counter()
+    cpu_start: float = process_time()
+    thread: Thread = Thread(target=run)
+    thread.start()
+    stacks: Counter = Counter()
+    while thread.is_alive():
+        frame: Optional[FrameType] = sys._current_frames().get(thread.ident or 0)
+        if frame is not None:
+            stacks[_collapse(frame)] += 1
+        del frame
+        sleep(interval)
+    thread.join()
+    wall_time: float = perf_counter() - start
+    cpu_time: float = process_time() - cpu_start
+    profile.dump_stats(base_path + STATS_SUFFIX)
+    with open(base_path + STACKS_SUFFIX, "w") as stacks_file:
+        for stack, samples in stacks.most_common():
+            stacks_file.write(f"{stack} {samples}\n")
+    stdout, stderr, returncode = outputs[0] if outputs else ("", "mypy crashed in the profiled thread\n", 2)
+    connection.send((stdout, stderr, returncode, wall_time, cpu_time, getrusage(RUSAGE_SELF).ru_maxrss * 1024))
+
+
+class MypyProfilingBackend(CheckerBackend):
+    """
+    Checks modules with interpreted mypy under the profiler, in a fresh
+    process per check, and keeps the profile of the i-th check at
+    `profiles[i]` (the path prefix of its statistics and stacks, see
+    `STATS_SUFFIX` and `STACKS_SUFFIX`) in the given directory. The
+    reported times include the overhead of profiling. mypy runs in a thread
+    of `thread_stack_size` bytes, which plays the role of the stack size
+    limit of `MypySubprocessBackend`.
+    """
+
+    def __init__(self, directory: str, timeout: Optional[float] = None, arguments: Tuple[str, ...] = (),
+                 interval: float = 0.005, thread_stack_size: int = 512 * 1024 * 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.directory: str = directory
+        self.timeout: Optional[float] = timeout
+        self.arguments: Tuple[str, ...] = arguments
+        self.interval: float = interval
+        self.thread_stack_size: int = thread_stack_size
+        self.profiles: List[str] = []
+
+    def check(self, paths: List[str], cache_directory: Optional[str] = None) -> CheckResult:
+        cache_arguments: List[str] = [] if cache_directory is None else ["--cache-dir", cache_directory]
+        base_path: str = os.path.join(self.directory, f"profile_{len(self.profiles)}")
+        self.profiles.append(base_path)
+        # a spawned process has not imported the compiled mypy yet
+        context = get_context("spawn")
+        connection, child_connection = context.Pipe()
+        process = context.Process(target=_profile_mypy, daemon=True,
+                                  args=(["--show-traceback", *self.arguments, *cache_arguments, *paths], base_path,
+                                        self.interval, self.thread_stack_size, child_connection))
+        start: float = perf_counter()
+        process.start()
+        child_connection.close()
+        try:
+            if not connection.poll(self.timeout):
+                process.kill()
+                return CheckResult(-signal.SIGKILL, "", "", perf_counter() - start, timed_out=True)
+            try:
+                stdout, stderr, returncode, wall_time, cpu_time, peak_rss = connection.recv()
+            except EOFError:
+                # the profiled process died, e.g., on a stack overflow (a signal), or with a Python exception
+                # (a positive exit code), which must not pass for a type error
+                process.join()
+                exitcode: Optional[int] = process.exitcode
+                return CheckResult(exitcode if exitcode is not None and exitcode < 0 else 2, "",
+                                   "mypy worker crashed\n", perf_counter() - start)
+            return CheckResult(returncode, stdout, stderr, wall_time, cpu_time, peak_rss)
+        finally:
+            process.join()
+            connection.close()
+
+
+@dataclass
+class HotSpot:
+    """
+    Function of a profile, with its number of calls, its own time and its
+    cumulative time (in seconds, including the functions it calls).
+    """
+    module: str
+    function: str
+    line: int
+    calls: int
+    own_time: float
+    cumulative_time: float
+
+    def __str__(self) -> str:
+        return f"{self.own_time:8.3f}s {self.cumulative_time:8.3f}s {self.calls:9} " \
+               f"{self.module}:{self.line}({self.function})"
+
+
+@dataclass
+class ProfileSummary:
+    """
+    Summary of a profile: the total time, the time spent in every phase
+    (see `PHASES`), and the hot spots by own time.
+    """
+    total_time: float
+    phases: Dict[str, float]
+    hot_spots: List[HotSpot]
+
+    def __str__(self) -> str:
+        phases: str = ", ".join(f"{name} {time / (self.total_time or 1):.0%}"
+                                for name, time in sorted(self.phases.items(), key=lambda item: -item[1]))
+        return f"total {self.total_time:.2f}s: {phases}\n    own time   cumul.     calls function\n" + \
+            "\n".join(str(hot_spot) for hot_spot in self.hot_spots)
+
+
+def _stack_phase(stack: str) -> str:
+    """
+    Returns the phase of the innermost frame of a collapsed stack that belongs to one, so that the time of
+    shared helpers (e.g., `mypy.types`) counts for the phase calling them.
+    """
+    for frame in reversed(stack.split(";")):
+        name: str = phase(frame.partition(":")[0])
+        if name != "other":
+            return name
+    return "other"
+
+
+def summarize(base_path: str, top: int = 10, prefix: str = "") -> ProfileSummary:
+    """
+    Summarizes the profile at the given path prefix, with the `top` hot
+    spots among the functions of the modules whose names start with
+    `prefix`, e.g., `mypy.subtypes`. The total time is split between the
+    phases in proportion to the samples of their stacks.
+    """
+    stats: Dict = pstats.Stats(base_path + STATS_SUFFIX).stats  # type: ignore[attr-defined]
+    total_time: float = 0.0
+    hot_spots: List[HotSpot] = []
+    for (filename, line, function), (_, calls, own_time, cumulative_time, _) in stats.items():
+        module: str = module_name(filename)
+        total_time += own_time
+        if module.startswith(prefix):
+            hot_spots.append(HotSpot(module, function, line, calls, own_time, cumulative_time))
+    hot_spots.sort(key=lambda hot_spot: -hot_spot.own_time)
+    samples: Counter = Counter()
+    with open(base_path + STACKS_SUFFIX) as stacks_file:
+        for line in stacks_file:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            samples[_stack_phase(stack)] += int(count)
+    total_samples: int = sum(samples.values()) or 1
+    phases: Dict[str, float] = {name: total_time * count / total_samples for name, count in samples.items()}
+    return ProfileSummary(total_time, phases, hot_spots[:top])
@@ -0,0 +1,236 @@
+"""
+Segmented verification of long runs. A native simulation cuts the run of a
+machine on an input word into segments of a bounded number of steps, and
+every segment is checked on its own, starting from the configuration the
+simulation reached, so the depth of each check is bounded by the segment
+length rather than by the length of the whole run.
+
+The check of an intermediate segment simulates a segment machine: the
+product of the machine with a step counter that, after the given number of
+steps, compares the state and the tape around the head with the next
+checkpoint, and accepts iff they match. The final segment is checked with
+the machine itself, so its verdict is the verdict of the whole run.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass
+from shutil import rmtree
+from tempfile import mkdtemp
+from typing import List, Optional, Union, Iterator, Set, Deque, Tuple, Dict
+
+from typing_machines.abstract_machines.turing_machine import TuringMachine, Transition, Direction
+from typing_machines.app import Algorithm, write_machine, write_configuration_query
+from typing_machines.checkers.backends import CheckerBackend, CheckResult, Outcome
+from typing_machines.simulators.simulator import Configuration, SimulationResult, Verdict, simulate, resume
+
+
+@dataclass
+class Segment:
+    """
+    Part of a run, starting in configuration `start` and taking `steps`
+    steps. An intermediate segment ends in configuration `end`, where the
+    next segment starts. The final segment has no `end`, and `verdict` is
+    the verdict of the run.
+    """
+    index: int
+    start: Configuration
+    steps: int
+    end: Optional[Configuration] = None
+    verdict: Optional[Verdict] = None
+
+
+@dataclass
+class SegmentResult:
+    """
+    Result of checking one segment.
+    """
+    segment: Segment
+    result: CheckResult
+
+    @property
+    def verified(self) -> bool:
+        """
+        Returns true iff the checker confirms the segment: an intermediate
+        segment must be accepted, and the final segment must be accepted
+        or rejected like the native simulation accepted or rejected the run.
+        """
+        if self.segment.end is not None:
+            return self.result.outcome == Outcome.ACCEPTED
+        if self.segment.verdict not in (Verdict.ACCEPT, Verdict.REJECT):
+            return False
+        expected: Outcome = Outcome.ACCEPTED if self.segment.verdict == Verdict.ACCEPT else Outcome.REJECTED
+        return self.result.outcome == expected
+
+
+@dataclass
+class SegmentedVerification:
+    """
+    Results of checking the segments of a run, in order, and the verdict
+    of the native simulation (`STEP_LIMIT` if the run was cut off).
+    """
+    verdict: Verdict
+    results: List[SegmentResult]
+
+    @property
+    def verified(self) -> bool:
+        """
+        Returns true iff the checker confirms every segment, and thus the run.
+        """
+        return all(result.verified for result in self.results)
+
+
+def split_run(turing_machine: TuringMachine, input_word: Union[str, List[str]], segment_steps: int,
+              max_steps: int = 1000000, max_tape: int = 1000000) -> Iterator[Segment]:
+    """
+    Simulates a machine on an input word and generates the segments of its
+    run, each of `segment_steps` steps except the final one. Generates no
+    final segment if the run is cut off after `max_steps` steps. Only the
+    configuration of the current checkpoint is kept in memory.
+    """
+    if segment_steps < 1:
+        raise ValueError("segments must take at least one step")
+    configuration: Configuration = simulate(turing_machine, input_word, max_steps=0, max_tape=max_tape).configuration
+    index: int = 0
+    while max_steps > 0:
+        result: SimulationResult = resume(turing_machine, configuration, min(segment_steps, max_steps), max_tape)
+        if result.verdict != Verdict.STEP_LIMIT:
+            yield Segment(index, configuration, result.steps, verdict=result.verdict)
+            return
+        yield Segment(index, configuration, result.steps, end=result.configuration)
+        configuration = result.configuration
+        max_steps -= result.steps
+        index += 1
+
+
+def _displacement(turing_machine: TuringMachine, segment: Segment) -> int:
+    """
+    Replays an intermediate segment and returns how far the head moves, which
+    aligns the tapes of its configurations.
+    """
+    tape: Dict[int, str] = dict(enumerate(segment.start.tape))
+    state: str = segment.start.state
+    head: int = segment.start.head
+    for _ in range(segment.steps):
+        transition: Transition = turing_machine.transition_index[(state, tape.get(head, TuringMachine.BLANK))]
+        tape[head] = transition.write_letter
+        state = transition.target_state
+        head += -1 if transition.move_direction == Direction.LEFT else 1
+    return head - segment.start.head
+
+
+SEGMENT_PREFIX: str = "segment"
+""" Prefix of the states a segment machine adds to the product with the step counter. """
+
+
+def segment_machine(turing_machine: TuringMachine, segment: Segment) -> Tuple[TuringMachine, Configuration]:
+    """
+    Returns the segment machine of an intermediate segment and the
+    configuration to check it from. The segment machine is in state
+    `f"{state}__{i}"` when the machine is in `state` after `i` steps of the
+    segment, so only states the machine can be in after exactly `i` steps
+    are kept. After the last step, it sweeps the cells that the segment may
+    have changed, i.e., those at most `segment.steps` cells away from the
+    initial head position, comparing them with `segment.end`.
+    """
+    assert segment.end is not None
+    end: Configuration = segment.end
+    steps: int = segment.steps
+    transitions: List[Transition] = []
+    layer: Set[str] = {segment.start.state}
+    for i in range(steps):
+        following: Set[str] = set()
+        for state in layer:
+            for transition in turing_machine.outgoing_transitions[state]:
+                if transition.target_state == turing_machine.termination_state:
+                    continue
+                if i + 1 < steps:
+                    target: str = f"{transition.target_state}__{i + 1}"
+                    following.add(transition.target_state)
+                elif transition.target_state == end.state:
+                    target = f"{SEGMENT_PREFIX}__right0"
+                else:
+                    continue
+                transitions.append(Transition(f"{state}__{i}", transition.read_letter, target,
+                                              transition.write_letter, transition.move_direction))
+        layer = following
+    # sweep right from the head and back left over the window; blank cells are filled on the way right,
+    # so the way back expects the filling letter on them
+    filling: str = turing_machine.alphabet[0]
+    low: int = -steps - _displacement(turing_machine, segment)
+    high: int = low + 2 * steps
+    accept: str = f"{SEGMENT_PREFIX}__accept"
+
+    def expected(offset: int) -> str:
+        position: int = end.head + offset
+        return end.tape[position] if 0 <= position < len(end.tape) else TuringMachine.BLANK
+
+    for offset in range(high + 1):
+        letter: str = expected(offset)
+        target, move = (f"{SEGMENT_PREFIX}__right{offset + 1}", Direction.RIGHT) if offset < high else \
+            (f"{SEGMENT_PREFIX}__left{high - 1 - low}", Direction.LEFT)
+        transitions.append(Transition(f"{SEGMENT_PREFIX}__right{offset}", letter, target,
+                                      filling if letter == TuringMachine.BLANK else letter, move))
+    for offset in range(high - 1, low - 1, -1):
+        letter = expected(offset)
+        if offset >= 0 and letter == TuringMachine.BLANK:
+            letter = filling
+        target = f"{SEGMENT_PREFIX}__left{offset - 1 - low}" if offset > low else accept
+        transitions.append(Transition(f"{SEGMENT_PREFIX}__left{offset - low}", letter, target,
+                                      filling if letter == TuringMachine.BLANK else letter, Direction.LEFT))
+    # an unreachable state keeps every letter of the machine in the alphabet, since the tape may hold any of them
+    transitions += [Transition(f"{SEGMENT_PREFIX}__letters", letter, accept, letter, Direction.RIGHT)
+                    for letter in turing_machine.alphabet]
+    machine: TuringMachine = TuringMachine(f"{segment.start.state}__0", accept, transitions)
+    return machine, Configuration(machine.initial_state, segment.start.tape, segment.start.head)
+
+
+def write_segment(algorithm: Algorithm, turing_machine: TuringMachine, segment: Segment, path: str) -> None:
+    """
+    Writes the module checking a segment to the given path.
+    """
+    machine, configuration = (turing_machine, segment.start) if segment.end is None else \
+        segment_machine(turing_machine, segment)
+    with open(path, "w") as python_file:
+        write_machine(algorithm, machine, python_file)
+        write_configuration_query(algorithm, machine, configuration, python_file)
+
+
+def _check_segment(algorithm: Algorithm, turing_machine: TuringMachine, segment: Segment, checker: CheckerBackend,
+                   workspace: str) -> SegmentResult:
+    path: str = os.path.join(workspace, f"segment_{segment.index}.py")
+    write_segment(algorithm, turing_machine, segment, path)
+    try:
+        return SegmentResult(segment, checker.check([path], os.path.join(workspace, f"cache_{segment.index}")))
+    finally:
+        os.remove(path)
+
+
+def verify_run(algorithm: Algorithm, turing_machine: TuringMachine, input_word: Union[str, List[str]],
+               checker: CheckerBackend, directory: str, segment_steps: int = 200, workers: int = 4,
+               max_steps: int = 1000000, max_tape: int = 1000000) -> SegmentedVerification:
+    """
+    Checks the run of a machine on an input word segment by segment (see
+    `split_run`), with up to `workers` checks at a time, while the native
+    simulation produces the next segments. The checks run in threads, so
+    they only overlap with backends that check in other processes (e.g.,
+    `MypySubprocessBackend`). Modules are written to a fresh subdirectory
+    of `directory`.
+    """
+    os.makedirs(directory, exist_ok=True)
+    workspace: str = mkdtemp(prefix="segments_", dir=directory)
+    results: List[SegmentResult] = []
+    verdict: Verdict = Verdict.STEP_LIMIT
+    pending: Deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for segment in split_run(turing_machine, input_word, segment_steps, max_steps, max_tape):
+            if segment.end is None:
+                assert segment.verdict is not None
+                verdict = segment.verdict
+            if len(pending) >= 2 * workers:
+                results.append(pending.popleft().result())
+            pending.append(executor.submit(_check_segment, algorithm, turing_machine, segment, checker, workspace))
+        results += [future.result() for future in pending]
+    rmtree(workspace)
+    return SegmentedVerification(verdict, results)
@@ -0,0 +1,249 @@
+"""
+Variance-aware subtyping engine for the class tables emitted by the compilers.
+The engine supports the restricted fragment the compilers use: nominal
+classes with a single contravariant type parameter `T` (or none at all),
+`Any`, and variable assignments `_: X = Y()` that invoke the query `Y <: X`.
+"""
+
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Iterator, Callable, TextIO
+
+Term = Tuple[str, Any]
+"""
+A type term `name[argument]` as a cons cell `(name, argument)`,
+where `argument` is another term or `None`.
+"""
+
+ANY: str = "Any"
+
+
+class Judgement(Enum):
+    """
+    Outcome of a subtyping query.
+    """
+    SUBTYPE = 1
+    NOT_SUBTYPE = 2
+    STEP_LIMIT = 3
+
+
+@dataclass
+class Query:
+    """
+    Subtyping query `value <: annotation` invoked by the assignment in line `line`.
+    """
+    variable: str
+    annotation: Term
+    value: Term
+    line: int
+
+
+@dataclass
+class ClassTable:
+    """
+    Class table mapping every class to its (non-`Generic`) base types,
+    and the set of classes taking a type parameter.
+    """
+    type_variable: str = "T"
+    bases: Dict[str, List[Term]] = field(default_factory=dict)
+    generic: set = field(default_factory=set)
+    _supertypes: Dict[str, Dict[str, List[Term]]] = field(default_factory=dict, repr=False)
+
+    def supertypes(self, name: str) -> Dict[str, List[Term]]:
+        """
+        Returns the (transitive) supertypes of the given class, mapping every
+        superclass to the templates, in the type variable, of all inheritance paths.
+        """
+        if name in self._supertypes:
+            return self._supertypes[name]
+        # post-order traversal of the inheritance graph
+        pending: List[Tuple[str, bool]] = [(name, False)]
+        visiting: set = set()
+        while pending:
+            current, expanded = pending.pop()
+            if current in self._supertypes:
+                continue
+            if not expanded:
+                if current in visiting:
+                    raise ValueError(f"cyclic inheritance through class {current}")
+                visiting.add(current)
+                pending.append((current, True))
+                pending.extend((base[0], False) for base in self.bases.get(current, [])
+                               if base[0] not in self._supertypes)
+                continue
+            visiting.discard(current)
+            supertypes: Dict[str, List[Term]] = {}
+            for base in self.bases.get(current, []):
+                supertypes.setdefault(base[0], []).append(base)
+                for superclass, templates in self._supertypes.get(base[0], {}).items():
+                    supertypes.setdefault(superclass, []).extend(
+                        substitute(template, self.type_variable, base[1]) for template in templates)
+            self._supertypes[current] = supertypes
+        return self._supertypes[name]
+
+
+@dataclass
+class SubtypingResult:
+    """
+    Result of a subtyping query, with the number of subtyping steps
+    and the maximum depth of the subtyping derivation.
+    """
+    judgement: Judgement
+    steps: int
+    max_depth: int
+
+
+def parse_type(text: str) -> Term:
+    """
+    Parses a type expression such as `A["B[C]"]` into a term.
+    """
+    text = text.replace("\"", "").replace("'", "").replace(" ", "")
+    stripped: str = text.rstrip("]")
+    names: List[str] = stripped.split("[")
+    if len(names) != len(text) - len(stripped) + 1 or not all(names):
+        raise ValueError(f"unsupported type expression {text[:80]!r}")
+    term: Optional[Term] = None
+    for name in reversed(names):
+        term = (name, term)
+    assert term is not None
+    return term
+
+
+def render_type(term: Term) -> str:
+    """
+    Renders a term as a type expression.
+    """
+    names: List[str] = []
+    current: Optional[Term] = term
+    while current is not None:
+        names.append(current[0])
+        current = current[1]
+    return "[".join(names) + "]" * (len(names) - 1)
+
+
+def substitute(template: Term, variable: str, argument: Optional[Term]) -> Term:
+    """
+    Replaces the type variable at the bottom of the template with the argument.
+    """
+    names: List[str] = []
+    current: Optional[Term] = template
+    while current is not None and current[0] != variable:
+        names.append(current[0])
+        current = current[1]
+    result: Optional[Term] = argument if current is not None else None
+    for name in reversed(names):
+        result = (name, result)
+    assert result is not None
+    return result
+
+
+def parse_module(source: str) -> Tuple[ClassTable, List[Query]]:
+    """
+    Parses a module generated by the compilers into a class table and
+    the subtyping queries it invokes.
+    """
+    class_table: ClassTable = ClassTable()
+    queries: List[Query] = []
+    for number, line in enumerate(source.splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#") or line.startswith("from ") or line.startswith("import "):
+            continue
+        if line.startswith("class "):
+            header: str = line[len("class "):line.rindex(":")]
+            name, _, bases = header.partition("(")
+            class_table.bases[name] = []
+            for base in bases.rstrip(")").split(","):
+                base = base.strip()
+                if not base:
+                    continue
+                if base.startswith("Generic["):
+                    class_table.generic.add(name)
+                else:
+                    class_table.bases[name].append(parse_type(base))
+        elif "TypeVar(" in line:
+            class_table.type_variable = line.split("=")[0].strip()
+        elif ":" in line and "=" in line:
+            variable, _, assignment = line.partition(":")
+            annotation, _, value = assignment.partition("=")
+            value = value.strip()
+            if not value.endswith("()"):
+                raise ValueError(f"unsupported assignment in line {number}")
+            queries.append(Query(variable.strip(), parse_type(annotation), parse_type(value[:-2]), number))
+        else:
+            raise ValueError(f"unsupported statement in line {number}")
+    return class_table, queries
+
+
+def _reduce(class_table: ClassTable, subtype: Term, supertype: Term) -> Optional[List[Tuple[Term, Term]]]:
+    """
+    Reduces the subtyping goal `subtype <: supertype` by one step.
+    Returns `None` if the goal holds, or else the alternative subgoals that would imply it.
+    """
+    if subtype[0] == ANY or supertype[0] == ANY:
+        return None
+    if subtype[0] == supertype[0]:
+        if subtype[1] is None or supertype[1] is None:
+            return None
+        # the type parameter is contravariant
+        return [(supertype[1], subtype[1])]
+    templates: List[Term] = class_table.supertypes(subtype[0]).get(supertype[0], [])
+    if supertype[1] is None:
+        return None if templates else []
+    return [(supertype[1], substitute(template, class_table.type_variable, subtype[1])[1]) for template in templates]
+
+
+Tracer = Callable[[int, int, Term, Term], None]
+""" Callback receiving the step number, derivation depth, subtype and supertype of every goal the engine reduces. """
+
+
+def is_subtype(class_table: ClassTable, subtype: Term, supertype: Term, max_steps: int = 1000000,
+               trace: Optional[Tracer] = None) -> SubtypingResult:
+    """
+    Decides `subtype <: supertype` with an explicit stack of alternative
+    subgoals, so deep derivations do not exhaust the Python call stack.
+    Gives up with `STEP_LIMIT` after `max_steps` reduction steps.
+    """
+    stack: List[Iterator[Tuple[Term, Term]]] = [iter([(subtype, supertype)])]
+    steps: int = 0
+    max_depth: int = 0
+    while stack:
+        goal: Optional[Tuple[Term, Term]] = next(stack[-1], None)
+        if goal is None:
+            stack.pop()
+            continue
+        if steps >= max_steps:
+            return SubtypingResult(Judgement.STEP_LIMIT, steps, max_depth)
+        steps += 1
+        max_depth = max(max_depth, len(stack))
+        if trace is not None:
+            trace(steps, len(stack), *goal)
+        subgoals: Optional[List[Tuple[Term, Term]]] = _reduce(class_table, *goal)
+        if subgoals is None:
+            return SubtypingResult(Judgement.SUBTYPE, steps, max_depth)
+        if subgoals:
+            stack.append(iter(subgoals))
+    return SubtypingResult(Judgement.NOT_SUBTYPE, steps, max_depth)
+
+
+def check_module(source: str, max_steps: int = 1000000) -> List[Tuple[Query, SubtypingResult]]:
+    """
+    Decides every subtyping query in a module generated by the compilers.
+    """
+    class_table, queries = parse_module(source)
+    return [(query, is_subtype(class_table, query.value, query.annotation, max_steps)) for query in queries]
+
+
+def write_trace(source: str, output: TextIO, every: int = 1, max_steps: int = 1000000) -> None:
+    """
+    Decides every subtyping query in a module generated by the compilers,
+    writing every `every`-th goal to a file-like object, one line per goal
+    with the query line number, step number, derivation depth, subtype and
+    supertype separated by tabs (see `typing_machines.checkers.decoding`).
+    """
+    class_table, queries = parse_module(source)
+    for query in queries:
+        def trace(step: int, depth: int, subtype: Term, supertype: Term) -> None:
+            if step % every == 0:
+                output.write(f"{query.line}\t{step}\t{depth}\t{render_type(subtype)}\t{render_type(supertype)}\n")
+
+        is_subtype(class_table, query.value, query.annotation, max_steps, trace)
@@ -0,0 +1,179 @@
+"""
+Compact identifier mode for generated modules. Every class of a module
+gets a short, deterministic identifier, in order of first occurrence, and
+quoted type arguments are unquoted when they hold no forward references.
+The symbol map, saved next to the module, decodes the short identifiers
+(e.g., in checker messages) back to the names the compilers use.
+"""
+
+import json
+import re
+from io import StringIO
+from itertools import count, product
+from string import ascii_uppercase, ascii_letters, digits
+from typing import Dict, Iterator, Iterable, Set, Pattern, List, Match
+
+from typing_machines.compilers.writer import Writer
+
+KEPT: Set[str] = {"from", "typing", "import", "TypeVar", "Generic", "Any", "T", "class", "contravariant", "True"}
+""" Identifiers of generated modules that are not class names. Names starting with an underscore are kept too. """
+
+_MAX_NESTING: int = 190
+""" Bracket nesting up to which arguments are unquoted, safely below the limit of the Python parser (200). """
+
+_TOKEN: Pattern = re.compile(r"\"[^\"]*\"|[A-Za-z_][A-Za-z0-9_]*|[^\"A-Za-z_]+")
+_IDENTIFIER: Pattern = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def _short_names() -> Iterator[str]:
+    """
+    Generates identifiers of increasing length, starting with an upper case letter, except the kept ones.
+    """
+    for length in count():
+        for first in ascii_uppercase:
+            for rest in product(ascii_letters + digits, repeat=length):
+                name: str = first + "".join(rest)
+                if name not in KEPT:
+                    yield name
+
+
+class SymbolMap:
+    """
+    Maps the class names of generated modules to short identifiers, assigned
+    in order of first occurrence, so the same module always gets the same
+    identifiers. One map may be shared by several modules.
+    """
+
+    def __init__(self, symbols: Iterable[str] = ()):
+        self.short_names: Dict[str, str] = {}
+        self.long_names: Dict[str, str] = {}
+        self._names: Iterator[str] = _short_names()
+        for name in symbols:
+            self.shorten(name)
+
+    def shorten(self, name: str) -> str:
+        """
+        Returns the short identifier of a class name, assigning the next one on first use.
+        """
+        short_name: str = self.short_names.get(name, "")
+        if not short_name:
+            short_name = next(self._names)
+            self.short_names[name] = short_name
+            self.long_names[short_name] = name
+        return short_name
+
+    def decode(self, text: str) -> str:
+        """
+        Replaces the short identifiers in a text (e.g., a checker message) by the original class names.
+        """
+        return _IDENTIFIER.sub(lambda match: self.long_names.get(match.group(0), match.group(0)), text)
+
+    def save(self, path: str) -> None:
+        """
+        Writes the map to a JSON file, as a list of the original class names in order of assignment.
+        """
+        with open(path, "w") as symbols_file:
+            json.dump(list(self.short_names), symbols_file, indent=0)
+
+    @staticmethod
+    def load(path: str) -> "SymbolMap":
+        """
+        Reads a map written by `save`.
+        """
+        with open(path) as symbols_file:
+            return SymbolMap(json.load(symbols_file))
+
+
+def _nesting(text: str) -> int:
+    """
+    Returns the maximum bracket nesting in a text.
+    """
+    depth: int = 0
+    maximum: int = 0
+    for character in text:
+        if character in "([{":
+            depth += 1
+            maximum = max(maximum, depth)
+        elif character in ")]}":
+            depth -= 1
+    return maximum
+
+
+def compact_line(line: str, symbols: SymbolMap, defined: Set[str]) -> str:
+    """
+    Shortens the class names in a line of a generated module and unquotes
+    the type arguments whose classes are all in `defined`. Adds the class
+    a line defines to `defined`.
+    """
+    parts: List[str] = []
+    depth: int = 0
+    for match in _TOKEN.finditer(line):
+        token: str = match.group(0)
+        if token.startswith("\""):
+            names: Set[str] = set()
+
+            def shorten(name_match: Match) -> str:
+                name: str = name_match.group(0)
+                if name in KEPT or name.startswith("_"):
+                    return name
+                names.add(name)
+                return symbols.shorten(name)
+
+            argument: str = _IDENTIFIER.sub(shorten, token[1:-1])
+            # only type arguments are quoted forward references, other strings are names, e.g., of type variables
+            if parts and parts[-1].endswith("[") and names <= defined and depth + _nesting(argument) < _MAX_NESTING:
+                parts.append(argument)
+            else:
+                parts.append(f"\"{argument}\"")
+        elif token[0].isalpha() or token[0] == "_":
+            parts.append(token if token in KEPT or token.startswith("_") else symbols.shorten(token))
+        else:
+            depth += sum(token.count(bracket) for bracket in "([{") - sum(token.count(bracket) for bracket in ")]}")
+            parts.append(token)
+    if line.startswith("class "):
+        defined.add(symbols.long_names[parts[2]])
+    return "".join(parts)
+
+
+class CompactWriter:
+    """
+    File-like object that compacts generated lines (see `compact_line`)
+    before writing them to `output`. Every line is buffered until it is
+    complete, so the queries of a module are held in memory one at a time.
+    """
+
+    def __init__(self, output: Writer, symbols: SymbolMap):
+        self.output: Writer = output
+        self.symbols: SymbolMap = symbols
+        self.defined: Set[str] = set()
+        self._line: StringIO = StringIO()
+
+    def write(self, text: str) -> int:
+        lines: List[str] = text.split("\n")
+        self._line.write(lines[0])
+        for line in lines[1:]:
+            self.output.write(compact_line(self._line.getvalue(), self.symbols, self.defined))
+            self.output.write("\n")
+            self._line = StringIO()
+            self._line.write(line)
+        return len(text)
+
+    def flush(self) -> None:
+        """
+        Writes an incomplete last line, if any.
+        """
+        rest: str = self._line.getvalue()
+        if rest:
+            self.output.write(compact_line(rest, self.symbols, self.defined))
+            self._line = StringIO()
+
+
+def compact(source: str, symbols: SymbolMap) -> str:
+    """
+    Compacts a generated module.
+    """
+    output: StringIO = StringIO()
+    writer: CompactWriter = CompactWriter(output, symbols)
+    writer.write(source)
+    writer.flush()
+    return output.getvalue()
@@ -1,6 +1,9 @@
-from typing import List, Union
+from array import array
+from io import StringIO
+from typing import List, Union, Iterator, Dict, Iterable, Sequence
 
 from typing_machines.abstract_machines.turing_machine import TuringMachine, Direction
+from typing_machines.compilers.writer import Writer
 
 
 def _render_type(*types: str, stringify_argument=True) -> str:
@@ -8,7 +11,38 @@ def _render_type(*types: str, stringify_argument=True) -> str:
     if len(types) == 1:
         return types[0]
     quotation: str = "\"" if stringify_argument else ""
-    return f"{types[0]}[{quotation}{_render_type(*types[1:], stringify_argument=False)}{quotation}]"
+    return f"{types[0]}[{quotation}{'['.join(types[1:])}{']' * (len(types) - 2)}{quotation}]"
+
+
+_BUFFER_SIZE: int = 1 << 16
+
+
+def _write_type(output: Writer, types: Iterable[str], stringify_argument=True) -> None:
+    """
+    Streaming counterpart of `_render_type` that writes the type to a
+    file-like object in bounded-size chunks.
+    """
+    quotation: str = "\"" if stringify_argument else ""
+    buffer: List[str] = []
+    count: int = 0
+    for name in types:
+        if count == 1:
+            buffer.append(f"[{quotation}")
+        elif count > 1:
+            buffer.append("[")
+        buffer.append(name)
+        count += 1
+        if len(buffer) >= _BUFFER_SIZE:
+            output.write("".join(buffer))
+            buffer.clear()
+    assert count > 0
+    output.write("".join(buffer))
+    closing: int = count - 2
+    while closing > 0:
+        output.write("]" * min(closing, _BUFFER_SIZE))
+        closing -= _BUFFER_SIZE
+    if count > 1:
+        output.write(f"{quotation}]")
 
 
 TAPE_END: str = "__TAPE_END__"
@@ -20,27 +54,46 @@ def compile_g(turing_machine: TuringMachine) -> str:
     Implementation of Grigore's original construction, see here for more details:
     https://arxiv.org/abs/1605.05274
     """
-    typing_machine: str = ""
+    return "\n".join(generate_g(turing_machine))
+
+
+def write_g(turing_machine: TuringMachine, output: Writer) -> None:
+    """
+    Writes the class table of `compile_g` to a file-like object,
+    one definition at a time, each followed by a line break.
+    """
+    for line in generate_g(turing_machine):
+        output.write(line)
+        output.write("\n")
+
+
+def generate_g(turing_machine: TuringMachine) -> Iterator[str]:
+    """
+    Generates the lines of the class table of `compile_g` one by one.
+    """
     # render imports and type variable
-    typing_machine += "from typing import TypeVar, Generic\n"
-    typing_machine += "T = TypeVar(\"T\", contravariant=True)\n"
+    yield "from typing import TypeVar, Generic"
+    yield "T = TypeVar(\"T\", contravariant=True)"
     # render Z / N / ML / MR
-    typing_machine += "class Z: ...\n"
-    typing_machine += "class N(Generic[T]): ...\n"
-    typing_machine += "class ML(Generic[T]): ...\n"
-    typing_machine += "class MR(Generic[T]): ...\n"
+    yield "class Z: ..."
+    yield "class N(Generic[T]): ..."
+    yield "class ML(Generic[T]): ..."
+    yield "class MR(Generic[T]): ..."
     # render L_s
-    typing_machine += "\n".join(f"class L_{letter}(Generic[T]): ..." for letter in turing_machine.alphabet) + "\n"
-    typing_machine += f"class L_{TAPE_END}(Generic[T]): ...\n"
+    for letter in turing_machine.alphabet:
+        yield f"class L_{letter}(Generic[T]): ..."
+    yield f"class L_{TAPE_END}(Generic[T]): ..."
     # render q_lr / q_rl
-    typing_machine += "\n".join(f"class QLR_{state}(Generic[T]): ..." for state in turing_machine.states) + "\n"
-    typing_machine += "\n".join(f"class QRL_{state}(Generic[T]): ..." for state in turing_machine.states) + "\n"
+    for state in turing_machine.states:
+        yield f"class QLR_{state}(Generic[T]): ..."
+    for state in turing_machine.states:
+        yield f"class QRL_{state}(Generic[T]): ..."
     # render E
     supers_e: List[str] = []
     supers_e += [_render_type(f"QLR_{state}", "N", f"QRW_{state}", "E", "E", "T") for state in turing_machine.states]
     supers_e += [_render_type(f"QRL_{state}", "N", f"QLW_{state}", "E", "E", "T") for state in turing_machine.states]
     super_clause: str = "" if len(supers_e) == 0 else ", " + ", ".join(supers_e)
-    typing_machine += f"class E(Generic[T]{super_clause}): ...\n"
+    yield f"class E(Generic[T]{super_clause}): ..."
     # render q_lw / q_rw
     for state in turing_machine.states:
         supers_lw: List[str] = []
@@ -60,50 +113,48 @@ def compile_g(turing_machine: TuringMachine) -> str:
             supers_lw.append(_render_type("E", "E", "Z"))
             supers_rw.append(_render_type("E", "E", "Z"))
         super_clause: str = "" if len(supers_lw) == 0 else ", " + ", ".join(supers_lw)
-        typing_machine += f"class QLW_{state}(Generic[T]{super_clause}): ...\n"
+        yield f"class QLW_{state}(Generic[T]{super_clause}): ..."
         super_clause = "" if len(supers_rw) == 0 else ", " + ", ".join(supers_rw)
-        typing_machine += f"class QRW_{state}(Generic[T]{super_clause}): ...\n"
+        yield f"class QRW_{state}(Generic[T]{super_clause}): ..."
     # render q_l / q_r
     for state in turing_machine.states:
         supers_l: List[str] = []
         supers_r: List[str] = []
-        for transition in turing_machine.transitions:
-            if transition.source_state == state:
-                if transition.read_letter != TuringMachine.BLANK:
-                    if transition.move_direction == Direction.LEFT:
-                        supers_l.append(_render_type(f"L_{transition.read_letter}", "N",
-                                                     f"QLW_{transition.target_state}", "ML", "N",
-                                                     f"L_{transition.write_letter}", "N", "T"))
-                        supers_r.append(_render_type(f"L_{transition.read_letter}", "N",
-                                                     f"QRW_{transition.target_state}", f"L_{transition.write_letter}",
-                                                     "N", "ML", "N", "T"))
-                    else:
-                        supers_l.append(_render_type(f"L_{transition.read_letter}", "N",
-                                                     f"QLW_{transition.target_state}", f"L_{transition.write_letter}",
-                                                     "N", "MR", "N", "T"))
-                        supers_r.append(_render_type(f"L_{transition.read_letter}", "N",
-                                                     f"QRW_{transition.target_state}", "MR", "N",
-                                                     f"L_{transition.write_letter}", "N", "T"))
+        for transition in turing_machine.outgoing_transitions[state]:
+            if transition.read_letter != TuringMachine.BLANK:
+                if transition.move_direction == Direction.LEFT:
+                    supers_l.append(_render_type(f"L_{transition.read_letter}", "N",
+                                                 f"QLW_{transition.target_state}", "ML", "N",
+                                                 f"L_{transition.write_letter}", "N", "T"))
+                    supers_r.append(_render_type(f"L_{transition.read_letter}", "N",
+                                                 f"QRW_{transition.target_state}", f"L_{transition.write_letter}",
+                                                 "N", "ML", "N", "T"))
+                else:
+                    supers_l.append(_render_type(f"L_{transition.read_letter}", "N",
+                                                 f"QLW_{transition.target_state}", f"L_{transition.write_letter}",
+                                                 "N", "MR", "N", "T"))
+                    supers_r.append(_render_type(f"L_{transition.read_letter}", "N",
+                                                 f"QRW_{transition.target_state}", "MR", "N",
+                                                 f"L_{transition.write_letter}", "N", "T"))
+            else:
+                if transition.move_direction == Direction.LEFT:
+                    supers_l.append(_render_type(f"L_{TAPE_END}", "N", f"QLW_{transition.target_state}",
+                                                 f"L_{TAPE_END}", "N", "ML", "N",
+                                                 f"L_{transition.write_letter}", "N", "T"))
+                    supers_r.append(_render_type(f"L_{TAPE_END}", "N", f"QRW_{transition.target_state}",
+                                                 f"L_{TAPE_END}", "N", f"L_{transition.write_letter}",
+                                                 "N", "ML", "N", "T"))
                 else:
-                    if transition.move_direction == Direction.LEFT:
-                        supers_l.append(_render_type(f"L_{TAPE_END}", "N", f"QLW_{transition.target_state}",
-                                                     f"L_{TAPE_END}", "N", "ML", "N",
-                                                     f"L_{transition.write_letter}", "N", "T"))
-                        supers_r.append(_render_type(f"L_{TAPE_END}", "N", f"QRW_{transition.target_state}",
-                                                     f"L_{TAPE_END}", "N", f"L_{transition.write_letter}",
-                                                     "N", "ML", "N", "T"))
-                    else:
-                        supers_l.append(_render_type(f"L_{TAPE_END}", "N", f"QLW_{transition.target_state}",
-                                                     f"L_{TAPE_END}", "N", f"L_{transition.write_letter}",
-                                                     "N", "MR", "N", "T"))
-                        supers_r.append(_render_type(f"L_{TAPE_END}", "N", f"QRW_{transition.target_state}",
-                                                     f"L_{TAPE_END}", "N", "MR", "N",
-                                                     f"L_{transition.write_letter}", "N", "T"))
+                    supers_l.append(_render_type(f"L_{TAPE_END}", "N", f"QLW_{transition.target_state}",
+                                                 f"L_{TAPE_END}", "N", f"L_{transition.write_letter}",
+                                                 "N", "MR", "N", "T"))
+                    supers_r.append(_render_type(f"L_{TAPE_END}", "N", f"QRW_{transition.target_state}",
+                                                 f"L_{TAPE_END}", "N", "MR", "N",
+                                                 f"L_{transition.write_letter}", "N", "T"))
         super_clause: str = "" if len(supers_l) == 0 else ", " + ", ".join(supers_l)
-        typing_machine += f"class QL_{state}(Generic[T]{super_clause}): ...\n"
+        yield f"class QL_{state}(Generic[T]{super_clause}): ..."
         super_clause = "" if len(supers_r) == 0 else ", " + ", ".join(supers_r)
-        typing_machine += f"class QR_{state}(Generic[T]{super_clause}): ...\n"
-    return typing_machine.rstrip()
+        yield f"class QR_{state}(Generic[T]{super_clause}): ..."
 
 
 def compile_query_g(input_word: Union[str, List[str]],
@@ -112,22 +163,109 @@ def compile_query_g(input_word: Union[str, List[str]],
     Compiles an input word into a variable assignments which invokes a
     subtyping query.
     """
-    if isinstance(input_word, str):
-        return compile_query_g(list(input_word), turing_machine)
-    input_word = input_word[::-1]
-    tape: List[str] = []
-    tape.append(f"QRW_{turing_machine.initial_state}")
-    tape.append(f"L_{TAPE_END}")
-    tape.append("N")
-    for letter in input_word:
-        tape.append(f"L_{letter}")
-        tape.append("N")
-    tape.append("MR")
-    tape.append("N")
-    tape.append(f"L_{TAPE_END}")
-    tape.append("N")
-    tape.append("E")
-    tape.append("E")
-    tape.append("Z")
-    tape_type: str = "[".join(tape) + "]" * (len(tape) - 1)
-    return f"_: E[E[Z]] = {tape_type}()"
+    output: StringIO = StringIO()
+    write_query_g(input_word, turing_machine, output)
+    return output.getvalue().rstrip()
+
+
+def write_query_g(input_word: Iterable[str], turing_machine: TuringMachine, output: Writer,
+                  variable: str = "_") -> None:
+    """
+    Writes the query of `compile_query_g`, assigning `variable`, to a
+    file-like object, followed by a line break. The tape is encoded in
+    reverse, so input words that are not sequences (e.g., generators) are
+    first buffered as compact letter ids.
+    """
+    if not isinstance(input_word, Sequence):
+        letters: Dict[str, int] = {}
+        ids: array = array("I", (letters.setdefault(letter, len(letters)) for letter in input_word))
+        input_word = [*letters]
+        reversed_word: Iterable[str] = (input_word[i] for i in reversed(ids))
+    else:
+        reversed_word = reversed(input_word)
+
+    def tape() -> Iterator[str]:
+        yield f"QRW_{turing_machine.initial_state}"
+        yield f"L_{TAPE_END}"
+        yield "N"
+        for letter in reversed_word:
+            yield f"L_{letter}"
+            yield "N"
+        yield "MR"
+        yield "N"
+        yield f"L_{TAPE_END}"
+        yield "N"
+        yield "E"
+        yield "E"
+        yield "Z"
+
+    output.write(f"{variable}: E[E[Z]] = ")
+    _write_type(output, tape(), stringify_argument=False)
+    output.write("()\n")
+
+
+def _check_configuration(tape: Sequence[str], head: int) -> None:
+    """
+    Raises `ValueError` unless the tape has no blank cells and the head lies on it or next to it.
+    """
+    if TuringMachine.BLANK in tape:
+        raise ValueError("blank cells inside the tape cannot be encoded")
+    if not -1 <= head <= len(tape):
+        raise ValueError(f"head position {head} is not on the tape or next to it")
+
+
+def compile_configuration_query_g(state: str, tape: Sequence[str], head: int, turing_machine: TuringMachine) -> str:
+    """
+    Compiles a machine configuration into a variable assignment which invokes
+    a subtyping query, simulating the machine from that configuration.
+    """
+    output: StringIO = StringIO()
+    write_configuration_query_g(state, tape, head, turing_machine, output)
+    return output.getvalue().rstrip()
+
+
+def write_configuration_query_g(state: str, tape: Sequence[str], head: int, turing_machine: TuringMachine,
+                                output: Writer, variable: str = "_") -> None:
+    """
+    Writes the query of `compile_configuration_query_g`, assigning `variable`,
+    to a file-like object, followed by a line break. The machine is in the
+    given state, with the head at position `head` of the tape, which may be
+    the blank cell just before or after the tape. The query of an input
+    word is that of the initial state with the head on the first letter.
+    """
+    _check_configuration(tape, head)
+
+    def cells() -> Iterator[str]:
+        # the tape from right to left, with MR right after the head cell
+        if head >= 0:
+            yield f"QRW_{state}"
+            yield f"L_{TAPE_END}"
+            yield "N"
+            if head == len(tape):
+                yield "MR"
+                yield "N"
+            for i in range(len(tape) - 1, -1, -1):
+                yield f"L_{tape[i]}"
+                yield "N"
+                if i == head:
+                    yield "MR"
+                    yield "N"
+        # the tape from left to right, with ML right after the blank head cell before the tape
+        else:
+            yield f"QLW_{state}"
+            yield f"L_{TAPE_END}"
+            yield "N"
+            yield "ML"
+            yield "N"
+            for letter in tape:
+                yield f"L_{letter}"
+                yield "N"
+        yield f"L_{TAPE_END}"
+        yield "N"
+        yield "E"
+        yield "E"
+        yield "Z"
+
+    output.write(f"{variable}: E[E[Z]] = ")
+    _write_type(output, cells(), stringify_argument=False)
+    output.write("()\n")
@@ -1,6 +1,8 @@
-from typing import List, Union
+from io import StringIO
+from typing import List, Union, Iterator, Iterable, Sequence
 
 from typing_machines.abstract_machines.turing_machine import TuringMachine, Direction
+from typing_machines.compilers.writer import Writer
 
 
 def _render_type(*types: str, stringify_argument=True) -> str:
@@ -8,7 +10,38 @@ def _render_type(*types: str, stringify_argument=True) -> str:
     if len(types) == 1:
         return types[0]
     quotation: str = "\"" if stringify_argument else ""
-    return f"{types[0]}[{quotation}{_render_type(*types[1:], stringify_argument=False)}{quotation}]"
+    return f"{types[0]}[{quotation}{'['.join(types[1:])}{']' * (len(types) - 2)}{quotation}]"
+
+
+_BUFFER_SIZE: int = 1 << 16
+
+
+def _write_type(output: Writer, types: Iterable[str], stringify_argument=True) -> None:
+    """
+    Streaming counterpart of `_render_type` that writes the type to a
+    file-like object in bounded-size chunks.
+    """
+    quotation: str = "\"" if stringify_argument else ""
+    buffer: List[str] = []
+    count: int = 0
+    for name in types:
+        if count == 1:
+            buffer.append(f"[{quotation}")
+        elif count > 1:
+            buffer.append("[")
+        buffer.append(name)
+        count += 1
+        if len(buffer) >= _BUFFER_SIZE:
+            output.write("".join(buffer))
+            buffer.clear()
+    assert count > 0
+    output.write("".join(buffer))
+    closing: int = count - 2
+    while closing > 0:
+        output.write("]" * min(closing, _BUFFER_SIZE))
+        closing -= _BUFFER_SIZE
+    if count > 1:
+        output.write(f"{quotation}]")
 
 
 TAPE_END: str = "__TAPE_END__"
@@ -19,62 +52,78 @@ def compile_r(turing_machine: TuringMachine) -> str:
     Compiles a Turing machine into Python type hints that simulate it
     in real time.
     """
-    typing_machine: str = ""
+    return "\n".join(generate_r(turing_machine))
+
+
+def write_r(turing_machine: TuringMachine, output: Writer) -> None:
+    """
+    Writes the class table of `compile_r` to a file-like object,
+    one definition at a time, each followed by a line break.
+    """
+    for line in generate_r(turing_machine):
+        output.write(line)
+        output.write("\n")
+
+
+def generate_r(turing_machine: TuringMachine) -> Iterator[str]:
+    """
+    Generates the lines of the class table of `compile_r` one by one.
+    """
     # render imports and type variable
-    typing_machine += "from typing import TypeVar, Generic, Any\n"
-    typing_machine += "T = TypeVar(\"T\", contravariant=True)\n"
+    yield "from typing import TypeVar, Generic, Any"
+    yield "T = TypeVar(\"T\", contravariant=True)"
     # render Z
-    typing_machine += "class Z: ...\n"
+    yield "class Z: ..."
     # render L_s
-    typing_machine += "\n".join(f"class L_{letter}(Generic[T]): ..." for letter in turing_machine.alphabet) + "\n"
-    typing_machine += f"class L_{TAPE_END}(Generic[T]): ...\n"
+    for letter in turing_machine.alphabet:
+        yield f"class L_{letter}(Generic[T]): ..."
+    yield f"class L_{TAPE_END}(Generic[T]): ..."
     # render q_l / q_r
     for state in turing_machine.states:
         if state == turing_machine.termination_state:
             continue
         supers_l = []
         supers_r = []
-        for transition in turing_machine.transitions:
-            if transition.source_state == state:
-                if transition.read_letter != TuringMachine.BLANK:
-                    if transition.move_direction == Direction.LEFT:
-                        supers_l.append(_render_type(f"L_{transition.read_letter}", "N",
-                                                     f"QL_{transition.target_state}",
-                                                     f"L_{transition.write_letter}", "N", "T"))
-                        supers_r.append(_render_type(f"L_{transition.read_letter}",
-                                                     f"QWRL_{transition.target_state}",
-                                                     "N", f"L_{transition.write_letter}", "N", "T"))
-                    else:
-                        supers_l.append(_render_type(f"L_{transition.read_letter}",
-                                                     f"QWLR_{transition.target_state}",
-                                                     "N", f"L_{transition.write_letter}", "N", "T"))
-                        supers_r.append(_render_type(f"L_{transition.read_letter}", "N",
-                                                     f"QR_{transition.target_state}",
-                                                     f"L_{transition.write_letter}", "N", "T"))
+        for transition in turing_machine.outgoing_transitions[state]:
+            if transition.read_letter != TuringMachine.BLANK:
+                if transition.move_direction == Direction.LEFT:
+                    supers_l.append(_render_type(f"L_{transition.read_letter}", "N",
+                                                 f"QL_{transition.target_state}",
+                                                 f"L_{transition.write_letter}", "N", "T"))
+                    supers_r.append(_render_type(f"L_{transition.read_letter}",
+                                                 f"QWRL_{transition.target_state}",
+                                                 "N", f"L_{transition.write_letter}", "N", "T"))
+                else:
+                    supers_l.append(_render_type(f"L_{transition.read_letter}",
+                                                 f"QWLR_{transition.target_state}",
+                                                 "N", f"L_{transition.write_letter}", "N", "T"))
+                    supers_r.append(_render_type(f"L_{transition.read_letter}", "N",
+                                                 f"QR_{transition.target_state}",
+                                                 f"L_{transition.write_letter}", "N", "T"))
+            else:
+                if transition.move_direction == Direction.LEFT:
+                    supers_l.append(_render_type(f"L_{TAPE_END}", f"QLSL_{transition.target_state}",
+                                                 "N", f"L_{transition.write_letter}", "N", "T"))
+                    supers_r.append(_render_type(f"L_{TAPE_END}", f"QRSL_{transition.target_state}",
+                                                 "N", f"L_{transition.write_letter}", "N", "T"))
                 else:
-                    if transition.move_direction == Direction.LEFT:
-                        supers_l.append(_render_type(f"L_{TAPE_END}", f"QLSL_{transition.target_state}",
-                                                     "N", f"L_{transition.write_letter}", "N", "T"))
-                        supers_r.append(_render_type(f"L_{TAPE_END}", f"QRSL_{transition.target_state}",
-                                                     "N", f"L_{transition.write_letter}", "N", "T"))
-                    else:
-                        supers_l.append(_render_type(f"L_{TAPE_END}", f"QLSR_{transition.target_state}",
-                                                     "N", f"L_{transition.write_letter}", "N", "T"))
-                        supers_r.append(_render_type(f"L_{TAPE_END}", f"QRSR_{transition.target_state}",
-                                                     "N", f"L_{transition.write_letter}", "N", "T"))
+                    supers_l.append(_render_type(f"L_{TAPE_END}", f"QLSR_{transition.target_state}",
+                                                 "N", f"L_{transition.write_letter}", "N", "T"))
+                    supers_r.append(_render_type(f"L_{TAPE_END}", f"QRSR_{transition.target_state}",
+                                                 "N", f"L_{transition.write_letter}", "N", "T"))
         super_clause: str = "" if len(supers_l) == 0 else ", " + ", ".join(supers_l)
-        typing_machine += f"class QL_{state}(Generic[T]{super_clause}): ...\n"
+        yield f"class QL_{state}(Generic[T]{super_clause}): ..."
         super_clause = "" if len(supers_r) == 0 else ", " + ", ".join(supers_r)
-        typing_machine += f"class QR_{state}(Generic[T]{super_clause}): ...\n"
+        yield f"class QR_{state}(Generic[T]{super_clause}): ..."
     supers_hl = []
     supers_hr = []
     for letter in turing_machine.alphabet + [TAPE_END]:
         supers_hl.append(_render_type(f"L_{letter}", "Any"))
         supers_hr.append(_render_type(f"L_{letter}", "Any"))
     super_clause: str = "" if len(supers_hl) == 0 else ", " + ", ".join(supers_hl)
-    typing_machine += f"class QL_{turing_machine.termination_state}(Generic[T]{super_clause}): ...\n"
+    yield f"class QL_{turing_machine.termination_state}(Generic[T]{super_clause}): ..."
     super_clause = "" if len(supers_hr) == 0 else ", " + ", ".join(supers_hr)
-    typing_machine += f"class QR_{turing_machine.termination_state}(Generic[T]{super_clause}): ...\n"
+    yield f"class QR_{turing_machine.termination_state}(Generic[T]{super_clause}): ..."
     # render q_wl / q_wr
     for state in turing_machine.states:
         supers_wl = []
@@ -83,19 +132,19 @@ def compile_r(turing_machine: TuringMachine) -> str:
             supers_wl.append(_render_type(f"L_{letter}", "N", f"QL_{state}", f"L_{letter}", "N", "T"))
             supers_wr.append(_render_type(f"L_{letter}", "N", f"QR_{state}", f"L_{letter}", "N", "T"))
         super_clause: str = "" if len(supers_wl) == 0 else ", " + ", ".join(supers_wl)
-        typing_machine += f"class QWL_{state}(Generic[T]{super_clause}): ...\n"
+        yield f"class QWL_{state}(Generic[T]{super_clause}): ..."
         super_clause = "" if len(supers_wr) == 0 else ", " + ", ".join(supers_wr)
-        typing_machine += f"class QWR_{state}(Generic[T]{super_clause}): ...\n"
+        yield f"class QWR_{state}(Generic[T]{super_clause}): ..."
     # render q_rl / q_lr / q_wlr / q_wrl / q_lsl / q_rsr / q_lsr / q_rsl
     for state in turing_machine.states:
-        typing_machine += f"class QRL_{state}(Generic[T]): ...\n"
-        typing_machine += f"class QLR_{state}(Generic[T]): ...\n"
-        typing_machine += f"class QWLR_{state}(Generic[T]): ...\n"
-        typing_machine += f"class QWRL_{state}(Generic[T]): ...\n"
-        typing_machine += f"class QLSL_{state}(Generic[T]): ...\n"
-        typing_machine += f"class QRSR_{state}(Generic[T]): ...\n"
-        typing_machine += f"class QLSR_{state}(Generic[T]): ...\n"
-        typing_machine += f"class QRSL_{state}(Generic[T]): ...\n"
+        yield f"class QRL_{state}(Generic[T]): ..."
+        yield f"class QLR_{state}(Generic[T]): ..."
+        yield f"class QWLR_{state}(Generic[T]): ..."
+        yield f"class QWRL_{state}(Generic[T]): ..."
+        yield f"class QLSL_{state}(Generic[T]): ..."
+        yield f"class QRSR_{state}(Generic[T]): ..."
+        yield f"class QLSR_{state}(Generic[T]): ..."
+        yield f"class QRSL_{state}(Generic[T]): ..."
     # render N
     supers_n = []
     for state in turing_machine.states:
@@ -108,8 +157,7 @@ def compile_r(turing_machine: TuringMachine) -> str:
         supers_n.append(_render_type(f"QLR_{state}", "N", f"QR_{state}", "T"))
         supers_n.append(_render_type(f"QRL_{state}", "N", f"QL_{state}", "T"))
     super_clause: str = "" if len(supers_n) == 0 else ", " + ", ".join(supers_n)
-    typing_machine += f"class N(Generic[T]{super_clause}): ..."
-    return typing_machine
+    yield f"class N(Generic[T]{super_clause}): ..."
 
 
 def compile_query_r(input_word: Union[str, List[str]],
@@ -118,14 +166,81 @@ def compile_query_r(input_word: Union[str, List[str]],
     Compiles an input word into a variable assignments which invokes a
     subtyping query.
     """
-    if isinstance(input_word, str):
-        return compile_query_r(list(input_word), turing_machine)
-    tape: List[str] = []
-    for letter in input_word:
-        tape.append(f"L_{letter}")
-        tape.append("N")
-    tape.append(f"L_{TAPE_END}")
-    tape.append("N")
-    tape.append("Z")
+    output: StringIO = StringIO()
+    write_query_r(input_word, turing_machine, output)
+    return output.getvalue().rstrip()
+
+
+def write_query_r(input_word: Iterable[str], turing_machine: TuringMachine, output: Writer,
+                  variable: str = "_") -> None:
+    """
+    Writes the query of `compile_query_r`, assigning `variable`, to a
+    file-like object, followed by a line break, consuming the input word
+    letter by letter.
+    """
+
+    def tape() -> Iterator[str]:
+        for letter in input_word:
+            yield f"L_{letter}"
+            yield "N"
+        yield f"L_{TAPE_END}"
+        yield "N"
+        yield "Z"
+
+    output.write(f"{variable}: ")
+    _write_type(output, tape())
     value: str = _render_type(f"QR_{turing_machine.initial_state}", f"L_{TAPE_END}", "N", "Z")
-    return f"_: {_render_type(*tape)} = {value}()"
+    output.write(f" = {value}()\n")
+
+
+def _check_configuration(tape: Sequence[str], head: int) -> None:
+    """
+    Raises `ValueError` unless the tape has no blank cells and the head lies on it or next to it.
+    """
+    if TuringMachine.BLANK in tape:
+        raise ValueError("blank cells inside the tape cannot be encoded")
+    if not -1 <= head <= len(tape):
+        raise ValueError(f"head position {head} is not on the tape or next to it")
+
+
+def compile_configuration_query_r(state: str, tape: Sequence[str], head: int, turing_machine: TuringMachine) -> str:
+    """
+    Compiles a machine configuration into a variable assignment which invokes
+    a subtyping query, simulating the machine from that configuration.
+    """
+    output: StringIO = StringIO()
+    write_configuration_query_r(state, tape, head, turing_machine, output)
+    return output.getvalue().rstrip()
+
+
+def write_configuration_query_r(state: str, tape: Sequence[str], head: int, turing_machine: TuringMachine,
+                                output: Writer, variable: str = "_") -> None:
+    """
+    Writes the query of `compile_configuration_query_r`, assigning `variable`,
+    to a file-like object, followed by a line break. The machine is in the
+    given state, with the head at position `head` of the tape, which may be
+    the blank cell just before or after the tape. The query of an input
+    word is that of the initial state with the head on the first letter.
+    """
+    _check_configuration(tape, head)
+
+    def cells(indices: Iterable[int]) -> Iterator[str]:
+        for i in indices:
+            yield f"L_{tape[i]}"
+            yield "N"
+        yield f"L_{TAPE_END}"
+        yield "N"
+        yield "Z"
+
+    # the tape is split at the head: the value holds one part and the annotation holds the other,
+    # starting with the head cell; a head on the blank cell before the tape needs the left part
+    output.write(f"{variable}: ")
+    if head >= 0:
+        _write_type(output, cells(range(head, len(tape))))
+        output.write(" = ")
+        _write_type(output, (f"QR_{state}", *cells(range(head - 1, -1, -1))))
+    else:
+        _write_type(output, cells(()))
+        output.write(" = ")
+        _write_type(output, (f"QL_{state}", *cells(range(len(tape)))))
+    output.write("()\n")
@@ -0,0 +1,194 @@
+"""
+Cost model of the encodings. The static metrics of a generated module,
+together with the number of steps the machine takes on the input word,
+predict the stack size, CPU time and peak memory of checking the module,
+by a power law per algorithm and quantity:
+`log(y) = c0 + c1 log(steps + 1) + c2 log(bytes) + c3 log(max_nesting + 1)`.
+The coefficients are fitted to measurements of the stack size experiment
+(see `typing_machines/experiment/calibration.py`).
+"""
+
+import json
+from dataclasses import dataclass
+from math import log, exp
+from typing import List, Dict, Iterable, Tuple
+
+QUANTITIES: Tuple[str, ...] = ("stack_size", "cpu_time", "peak_rss")
+""" Predicted quantities, as named in `Prediction`. """
+
+MINIMUM_STACK_SIZE: int = 5
+""" Smallest stack size (in megabytes) the stack size experiment measures; checks needing less also measure it. """
+
+DEFAULT_COEFFICIENTS: Dict[str, Dict[str, List[float]]] = {
+    "Grigore": {
+        "stack_size": [-6.2173, 1.2350, 0.0156, 0.5481],
+        "cpu_time": [-0.1960, 0.0694, -0.0026, 0.0529],
+        "peak_rss": [17.5741, 0.1390, 0.0399, 0.0381]
+    },
+    "Roth": {
+        "stack_size": [2.1271, 0.0187, -0.0648, -0.0088],
+        "cpu_time": [0.1488, 0.0091, -0.0008, 0.0018],
+        "peak_rss": [18.5715, 0.0144, -0.0204, -0.0032]
+    }
+}
+""" Coefficients calibrated by `typing_machines/experiment/calibration.py` with mypy 2.4.0 (compiled). """
+
+
+@dataclass
+class EncodingMetrics:
+    """
+    Static metrics of a generated module: the number of classes, the
+    maximum and total widths of their base lists (without `Generic[T]`),
+    the maximum bracket nesting of its type expressions, and its size in
+    bytes.
+    """
+    classes: int
+    max_bases: int
+    total_bases: int
+    max_nesting: int
+    bytes: int
+
+
+def _bases(line: str) -> int:
+    """
+    Returns the number of base classes of a class definition line, except `Generic`.
+    """
+    start: int = line.find("(")
+    if start < 0:
+        return 0
+    bases: int = 0
+    depth: int = 0
+    base_start: int = start + 1
+    for i in range(start + 1, len(line)):
+        if line[i] in "[(":
+            depth += 1
+        elif line[i] == "]" or (line[i] == ")" and depth > 0):
+            depth -= 1
+        elif line[i] in ",)":
+            base: str = line[base_start:i].strip()
+            if base and not base.startswith("Generic"):
+                bases += 1
+            base_start = i + 1
+            if line[i] == ")":
+                break
+    return bases
+
+
+def encoding_metrics(program: str) -> EncodingMetrics:
+    """
+    Returns the static metrics of a generated module.
+    """
+    classes: int = 0
+    max_bases: int = 0
+    total_bases: int = 0
+    max_nesting: int = 0
+    for line in program.splitlines():
+        if line.startswith("class "):
+            classes += 1
+            bases: int = _bases(line)
+            max_bases = max(max_bases, bases)
+            total_bases += bases
+        depth: int = 0
+        for character in line:
+            if character == "[":
+                depth += 1
+                max_nesting = max(max_nesting, depth)
+            elif character == "]":
+                depth -= 1
+    return EncodingMetrics(classes, max_bases, total_bases, max_nesting, len(program.encode()))
+
+
+def features(metrics: EncodingMetrics, steps: int) -> List[float]:
+    """
+    Returns the features of the cost model for a module and the number of steps of the run it encodes.
+    """
+    return [1.0, log(steps + 1), log(max(metrics.bytes, 1)), log(metrics.max_nesting + 1)]
+
+
+@dataclass
+class Prediction:
+    """
+    Stack size (in megabytes), CPU time (in seconds) and peak resident set size (in bytes) of a check.
+    """
+    stack_size: float
+    cpu_time: float
+    peak_rss: float
+
+
+@dataclass
+class CalibrationPoint:
+    """
+    Measured check of a module encoded with the named algorithm.
+    """
+    algorithm: str
+    metrics: EncodingMetrics
+    steps: int
+    measured: Prediction
+
+
+class CostModel:
+    """
+    Power laws predicting the quantities of `Prediction`, with coefficients
+    for the features of `features` by algorithm name and quantity.
+    """
+
+    def __init__(self, coefficients: Dict[str, Dict[str, List[float]]]):
+        self.coefficients: Dict[str, Dict[str, List[float]]] = coefficients
+
+    def predict(self, algorithm_name: str, metrics: EncodingMetrics, steps: int) -> Prediction:
+        """
+        Predicts the cost of checking a module encoded with the named algorithm.
+        Raises `ValueError` if the model has no coefficients for the algorithm.
+        """
+        if algorithm_name not in self.coefficients:
+            raise ValueError(f"the cost model is not calibrated for algorithm {algorithm_name}")
+        values: List[float] = features(metrics, steps)
+        return Prediction(*(exp(sum(c * v for c, v in zip(self.coefficients[algorithm_name][quantity], values)))
+                            for quantity in QUANTITIES))
+
+    @staticmethod
+    def calibrate(points: Iterable[CalibrationPoint], regularization: float = 0.01) -> "CostModel":
+        """
+        Fits the model to measured checks, by ridge regression of the logarithms of the measured quantities
+        on the features, separately per algorithm. Points with non-positive measurements are ignored, and so
+        are stack sizes at `MINIMUM_STACK_SIZE`, which only bound the requirement, if enough others remain.
+        """
+        import numpy as np
+        by_algorithm: Dict[str, List[CalibrationPoint]] = {}
+        for point in points:
+            by_algorithm.setdefault(point.algorithm, []).append(point)
+        coefficients: Dict[str, Dict[str, List[float]]] = {}
+        for algorithm_name, algorithm_points in by_algorithm.items():
+            coefficients[algorithm_name] = {}
+            for quantity in QUANTITIES:
+                usable: List[CalibrationPoint] = [point for point in algorithm_points
+                                                  if getattr(point.measured, quantity) > 0]
+                if not usable:
+                    raise ValueError(f"no measurements of {quantity} for algorithm {algorithm_name}")
+                if quantity == "stack_size":
+                    above: List[CalibrationPoint] = [point for point in usable
+                                                     if point.measured.stack_size > MINIMUM_STACK_SIZE]
+                    usable = above if len(above) >= len(features(usable[0].metrics, 0)) else usable
+                x = np.array([features(point.metrics, point.steps) for point in usable])
+                y = np.array([log(getattr(point.measured, quantity)) for point in usable])
+                # the intercept is not regularized
+                penalty = regularization * np.diag([0.0] + [1.0] * (x.shape[1] - 1))
+                coefficients[algorithm_name][quantity] = [float(c) for c in
+                                                          np.linalg.solve(x.T @ x + penalty, x.T @ y)]
+        return CostModel(coefficients)
+
+    def save(self, path: str) -> None:
+        """
+        Writes the coefficients to a JSON file.
+        """
+        with open(path, "w") as model_file:
+            json.dump(self.coefficients, model_file, indent=2)
+
+    @staticmethod
+    def load(path: str) -> "CostModel":
+        """
+        Reads a model written by `save`.
+        """
+        with open(path) as model_file:
+            return CostModel(json.load(model_file))
+
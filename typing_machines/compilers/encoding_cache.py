@@ -0,0 +1,137 @@
+import os
+import re
+from collections import OrderedDict
+from tempfile import NamedTemporaryFile
+from typing import Optional, Callable, List, Tuple, Pattern
+
+from typing_machines.abstract_machines.turing_machine import TuringMachine
+
+CACHE_VERSION: int = 1
+""" Bump when the compilers change their output, to invalidate cached class tables. """
+
+ENTRY_NAME: Pattern = re.compile(r"^[a-z]+_v\d+_[0-9a-f]{64}\.py$")
+"""
+Name of a cached class table file (see `EncodingCache.key`), of any cache version. Other files in the cache
+directory are never evicted or cleared.
+"""
+
+
+class EncodingCache:
+    """
+    Two-tier cache of encoded class tables, keyed by the encoding algorithm
+    and the machine fingerprint. The in-memory tier keeps the `max_entries`
+    most recently used class tables; the optional on-disk tier keeps one
+    file per class table in `directory` and evicts the least recently used
+    files when their total size exceeds `max_disk_bytes`.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_entries: int = 16, max_disk_bytes: int = 1 << 30):
+        self.directory: Optional[str] = directory
+        self.max_entries: int = max_entries
+        self.max_disk_bytes: int = max_disk_bytes
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(algorithm_name: str, machine: TuringMachine) -> str:
+        """
+        Returns the cache key of a machine encoded with the given algorithm.
+        """
+        return f"{algorithm_name.lower()}_v{CACHE_VERSION}_{machine.fingerprint}"
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached class table, or `None` on a miss.
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        if self.directory is None:
+            return None
+        path: str = self._path(key)
+        try:
+            with open(path) as cached_file:
+                text: str = cached_file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        self._remember(key, text)
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """
+        Stores a class table in both tiers.
+        """
+        self._remember(key, text)
+        if self.directory is None:
+            return
+        # write to a temporary file first, so concurrent readers never see partial files
+        temporary_file = NamedTemporaryFile("w", dir=self.directory, suffix=".tmp", delete=False)
+        try:
+            with temporary_file:
+                temporary_file.write(text)
+            os.replace(temporary_file.name, self._path(key))
+        except BaseException:
+            try:
+                os.remove(temporary_file.name)
+            except FileNotFoundError:
+                pass
+            raise
+        self._evict()
+
+    def get_or_compile(self, key: str, compile_machine: Callable[[], str]) -> str:
+        """
+        Returns the cached class table, compiling and storing it on a miss.
+        """
+        text: Optional[str] = self.get(key)
+        if text is None:
+            text = compile_machine()
+            self.put(key, text)
+        return text
+
+    def clear(self) -> None:
+        """
+        Removes all cached class tables, of any cache version, leaving other files in the directory alone.
+        """
+        self._memory.clear()
+        if self.directory is not None:
+            for path, _, _ in self._disk_entries():
+                os.remove(path)
+
+    def _path(self, key: str) -> str:
+        assert self.directory is not None
+        return os.path.join(self.directory, f"{key}.py")
+
+    def _remember(self, key: str, text: str) -> None:
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_entries(self) -> List[Tuple[str, float, int]]:
+        """
+        Returns the path, access time and size of every cached file, i.e., every file named like a cache entry.
+        """
+        assert self.directory is not None
+        entries: List[Tuple[str, float, int]] = []
+        for entry in os.scandir(self.directory):
+            if ENTRY_NAME.match(entry.name) is not None:
+                try:
+                    stat: os.stat_result = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((entry.path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _evict(self) -> None:
+        entries: List[Tuple[str, float, int]] = sorted(self._disk_entries(), key=lambda entry: entry[1])
+        total: int = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,14 @@
+from typing import Protocol
+
+
+class Writer(Protocol):
+    """
+    Text output the compilers write generated code to, e.g., a file, a
+    `StringIO` or a `typing_machines.compilers.compaction.CompactWriter`.
+    """
+
+    def write(self, text: str, /) -> int:
+        ...
+
+    def flush(self) -> None:
+        ...
@@ -0,0 +1,260 @@
+"""
+Parameterised families of Turing machines for benchmarks, with matching
+input generators. The size parameter of a family scales its machines (in
+states, alphabet size or running time), independently of the length of the
+input words, so benchmarks can sweep both separately.
+"""
+
+from dataclasses import dataclass
+from random import Random
+from typing import List, Callable, Dict
+
+from typing_machines.abstract_machines.turing_machine import TuringMachine, Transition, Direction
+from typing_machines.examples.machines import palindromes_over
+
+ACCEPT: str = "accept"
+""" Termination state of the machines of the families. """
+
+
+def letters(size: int) -> List[str]:
+    """
+    Returns the letters `l0`, `l1`, ... of an alphabet of the given size.
+    """
+    return [f"l{i}" for i in range(size)]
+
+
+def counter(base: int = 2) -> TuringMachine:
+    """
+    Returns a machine that counts up from the number on the tape (most
+    significant digit first, over the digits `d0`, `d1`, ... of the given
+    base) until it overflows, and then accepts. It accepts every word, in
+    about `base ** n` steps for words of length n, and has three states.
+    """
+    digits: List[str] = [f"d{i}" for i in range(base)]
+    transitions: List[Transition] = []
+    for i, digit in enumerate(digits):
+        # walk to the right end, then add one with carry, going left
+        transitions.append(Transition("seek", digit, "seek", digit, Direction.RIGHT))
+        if i + 1 < base:
+            transitions.append(Transition("increment", digit, "seek", digits[i + 1], Direction.RIGHT))
+        else:
+            transitions.append(Transition("increment", digit, "increment", digits[0], Direction.LEFT))
+    transitions += [Transition("seek", TuringMachine.BLANK, "increment", "end", Direction.LEFT),
+                    Transition("seek", "end", "increment", "end", Direction.LEFT),
+                    Transition("increment", TuringMachine.BLANK, ACCEPT, "end", Direction.RIGHT)]
+    return TuringMachine("seek", ACCEPT, transitions)
+
+
+def get_counter_word(base: int, n: int) -> List[str]:
+    """
+    Returns a random number of n digits in the given base for `counter`.
+    Always returns the same word for given base and n.
+    """
+    random: Random = Random(base * n)
+    return [f"d{random.randrange(base)}" for _ in range(n)]
+
+
+def unary_adder(summands: int = 2) -> TuringMachine:
+    """
+    Returns a machine recognizing the correct unary sums of the given
+    number of summands, `1^a p 1^b p ... e 1^c` (`p` for plus, `e` for
+    equals). It checks the format with one state per summand, and then
+    crosses off the ones on both sides in pairs, in quadratic time.
+    """
+    transitions: List[Transition] = []
+    for i in range(summands):
+        transitions.append(Transition(f"summand{i}", "1", f"summand{i}", "1", Direction.RIGHT))
+        if i + 1 < summands:
+            transitions.append(Transition(f"summand{i}", "p", f"summand{i + 1}", "p", Direction.RIGHT))
+        else:
+            transitions.append(Transition(f"summand{i}", "e", "sum", "e", Direction.RIGHT))
+    transitions += [Transition("sum", "1", "sum", "1", Direction.RIGHT),
+                    Transition("sum", TuringMachine.BLANK, "back", "y", Direction.LEFT)]
+    # go back to the ones crossed off on the left (x), or the left end
+    transitions += [Transition("back", letter, "back", letter, Direction.LEFT) for letter in ("1", "p", "e", "y")]
+    transitions += [Transition("back", "x", "find", "x", Direction.RIGHT),
+                    Transition("back", TuringMachine.BLANK, "find", "x", Direction.RIGHT)]
+    # cross off the next one on the left, and then the next one on the right (y)
+    transitions += [Transition("find", "x", "find", "x", Direction.RIGHT),
+                    Transition("find", "p", "find", "p", Direction.RIGHT),
+                    Transition("find", "1", "seek", "x", Direction.RIGHT),
+                    Transition("find", "e", "check", "e", Direction.RIGHT),
+                    Transition("seek", "1", "seek", "1", Direction.RIGHT),
+                    Transition("seek", "p", "seek", "p", Direction.RIGHT),
+                    Transition("seek", "e", "match", "e", Direction.RIGHT),
+                    Transition("match", "y", "match", "y", Direction.RIGHT),
+                    Transition("match", "1", "back", "y", Direction.LEFT)]
+    # no ones are left on the left, so none may be left on the right
+    transitions += [Transition("check", "y", "check", "y", Direction.RIGHT),
+                    Transition("check", TuringMachine.BLANK, ACCEPT, "y", Direction.RIGHT)]
+    return TuringMachine("summand0", ACCEPT, transitions)
+
+
+def get_unary_sum(summands: int, n: int, correct: bool = True) -> List[str]:
+    """
+    Returns a random unary sum of the given number of summands for
+    `unary_adder`, whose summands add up to n, and whose result is n if
+    `correct` and n + 1 otherwise. Always returns the same word for given
+    arguments.
+    """
+    random: Random = Random(summands * n)
+    cuts: List[int] = sorted(random.randint(0, n) for _ in range(summands - 1))
+    word: List[str] = []
+    for i, (start, end) in enumerate(zip([0] + cuts, cuts + [n])):
+        word += (["p"] if i > 0 else []) + ["1"] * (end - start)
+    return word + ["e"] + ["1"] * (n if correct else n + 1)
+
+
+def copy_machine(alphabet: List[str]) -> TuringMachine:
+    """
+    Returns a machine that copies its input word w to the right of it,
+    leaving `w' e w` on the tape (`w'` marks the letters of w), and then
+    accepts. It accepts every word over the given letters, in quadratic
+    time, and has two states per letter.
+    """
+    marked: Dict[str, str] = {letter: f"m_{letter}" for letter in alphabet}
+    transitions: List[Transition] = [Transition("pick", TuringMachine.BLANK, ACCEPT, "e", Direction.RIGHT),
+                                     Transition("pick", "e", ACCEPT, "e", Direction.RIGHT),
+                                     Transition("rewind", "e", "rewind", "e", Direction.LEFT)]
+    for letter in alphabet:
+        # mark the next letter, carry it past the end of the copy, and come back
+        transitions += [Transition("pick", letter, f"carry_{letter}", marked[letter], Direction.RIGHT),
+                        Transition(f"carry_{letter}", "e", f"append_{letter}", "e", Direction.RIGHT),
+                        Transition(f"carry_{letter}", TuringMachine.BLANK, f"append_{letter}", "e", Direction.RIGHT),
+                        Transition(f"append_{letter}", TuringMachine.BLANK, "rewind", letter, Direction.LEFT),
+                        Transition("rewind", letter, "rewind", letter, Direction.LEFT),
+                        Transition("rewind", marked[letter], "pick", marked[letter], Direction.RIGHT)]
+        transitions += [Transition(f"carry_{letter}", other, f"carry_{letter}", other, Direction.RIGHT)
+                        for other in alphabet]
+        transitions += [Transition(f"append_{letter}", other, f"append_{letter}", other, Direction.RIGHT)
+                        for other in alphabet]
+    return TuringMachine("pick", ACCEPT, transitions)
+
+
+def get_random_word(alphabet: List[str], n: int) -> List[str]:
+    """
+    Returns a random word over the given letters of length n.
+    Always returns the same word for given letters and n.
+    """
+    random: Random = Random(n * len(alphabet))
+    return [random.choice(alphabet) for _ in range(n)]
+
+
+BUSY_BEAVERS: List[str] = ["1RZ---",
+                           "1RB1LB_1LA1RZ",
+                           "1RB1RZ_1LB0RC_1LC1LA",
+                           "1RB1LB_1LA0LC_1RZ1LD_1RD0RA",
+                           "1RB1LC_1RC1RB_1RD0LE_1LA1LD_1RZ0LA"]
+""" Two-symbol busy beaver champions with 1 to 5 states, in the standard text format (see `from_standard_format`). """
+
+
+def from_standard_format(table: str) -> TuringMachine:
+    """
+    Returns the machine of a transition table in the standard text format
+    of busy beaver research, e.g., `1RB1LB_1LA1RZ`: one group per state
+    (`A`, `B`, ...), separated by `_`, with one write / move / target
+    triple per symbol (`0`, `1`, ...), where `Z` is the halting state and
+    `---` is a missing transition. Symbol 0 is the blank: the machine
+    reads it as blank or `0`, and writes `0` for it.
+    """
+    transitions: List[Transition] = []
+    for i, group in enumerate(table.split("_")):
+        for symbol in range(len(group) // 3):
+            write, move, target = group[3 * symbol], group[3 * symbol + 1], group[3 * symbol + 2]
+            if target == "-":
+                continue
+            target_state: str = ACCEPT if target == "Z" else f"q{target}"
+            direction: Direction = Direction.LEFT if move == "L" else Direction.RIGHT
+            read_letters: List[str] = [TuringMachine.BLANK, "0"] if symbol == 0 else [str(symbol)]
+            transitions += [Transition(f"q{chr(ord('A') + i)}", read_letter, target_state, write, direction)
+                            for read_letter in read_letters]
+    return TuringMachine("qA", ACCEPT, transitions)
+
+
+def busy_beaver(states: int) -> TuringMachine:
+    """
+    Returns the two-symbol busy beaver champion with the given number of
+    states (1 to 5), which halts on the blank tape after 1, 6, 21, 107 and
+    47,176,870 steps, respectively.
+    """
+    return from_standard_format(BUSY_BEAVERS[states - 1])
+
+
+def busy_beaver_candidate(states: int, symbols: int = 2, seed: int = 0) -> TuringMachine:
+    """
+    Returns a random machine in the busy beaver format with the given
+    numbers of states and symbols, with one halting transition. Most
+    candidates never halt. Always returns the same machine for given
+    arguments.
+    """
+    random: Random = Random(seed * 10000 + states * 100 + symbols)
+    triples: List[str] = [f"{random.randrange(symbols)}{random.choice('LR')}{chr(ord('A') + random.randrange(states))}"
+                          for _ in range(states * symbols)]
+    triples[random.randrange(len(triples))] = "1RZ"
+    return from_standard_format("_".join("".join(triples[state * symbols:(state + 1) * symbols])
+                                         for state in range(states)))
+
+
+def get_zeros(n: int) -> List[str]:
+    """
+    Returns n zeros, which busy beaver machines read as the blank tape.
+    """
+    return ["0"] * n
+
+
+def sorted_words(alphabet: List[str]) -> TuringMachine:
+    """
+    Returns a machine recognizing the words whose letters are sorted in
+    the order of the given letters, with one state per letter and
+    transitions for every pair of letters, in linear time.
+    """
+    transitions: List[Transition] = []
+    for i, letter in enumerate(alphabet):
+        transitions += [Transition(f"after_{letter}", other, f"after_{other}", other, Direction.RIGHT)
+                        for other in alphabet[i:]]
+        transitions.append(Transition(f"after_{letter}", TuringMachine.BLANK, ACCEPT, letter, Direction.RIGHT))
+    return TuringMachine(f"after_{alphabet[0]}", ACCEPT, transitions)
+
+
+def get_random_sorted_word(alphabet: List[str], n: int) -> List[str]:
+    """
+    Returns a random sorted word over the given letters of length n.
+    Always returns the same word for given letters and n.
+    """
+    random: Random = Random(n * len(alphabet))
+    return sorted((random.choice(alphabet) for _ in range(n)), key=alphabet.index)
+
+
+def get_random_palindrome_over(alphabet: List[str], n: int) -> List[str]:
+    """
+    Returns a random palindrome over the given letters of length 2n.
+    Always returns the same word for given letters and n.
+    """
+    random: Random = Random(n * len(alphabet))
+    half: List[str] = [random.choice(alphabet) for _ in range(n)]
+    return half + half[::-1]
+
+
+@dataclass
+class Family:
+    """
+    Parameterised family of machines: `machine(size)` returns the machine
+    of the given size, and `word(size, n)` an input word of length about n
+    for it.
+    """
+    machine: Callable[[int], TuringMachine]
+    word: Callable[[int, int], List[str]]
+
+
+FAMILIES: Dict[str, Family] = {
+    "palindromes": Family(lambda size: palindromes_over(letters(size)),
+                          lambda size, n: get_random_palindrome_over(letters(size), n // 2)),
+    "counter": Family(counter, get_counter_word),
+    "unary_adder": Family(unary_adder, get_unary_sum),
+    "copy": Family(lambda size: copy_machine(letters(size)), lambda size, n: get_random_word(letters(size), n)),
+    "busy_beaver": Family(busy_beaver, lambda size, n: get_zeros(n)),
+    "sorted_words": Family(lambda size: sorted_words(letters(size)),
+                           lambda size, n: get_random_sorted_word(letters(size), n)),
+}
+""" Machine families by name. The size is the alphabet size, except for `counter` (the base), `unary_adder` (the
+number of summands) and `busy_beaver` (the number of states, up to 5). """
@@ -2,6 +2,8 @@
 Turing machine examples.
 """
 
+from typing import List
+
 from typing_machines.abstract_machines.turing_machine import TuringMachine, Transition, Direction
 
 anbn: TuringMachine = TuringMachine("q0", "q4", [
@@ -49,3 +51,28 @@ palindromes: TuringMachine = TuringMachine("q0", "q8", [
     Transition("q0", "c", "q8", "c", Direction.RIGHT),
 ])
 """ Recognizes { w | w is a palindrome over {a,b} } """
+
+
+def palindromes_over(letters: List[str], marker: str = "c") -> TuringMachine:
+    """
+    Returns a machine recognizing the palindromes over the given letters,
+    generalizing `palindromes`. The machine marks the letters it has matched
+    with `marker`, which must not be one of the letters.
+    """
+    transitions: List[Transition] = []
+    for letter in letters:
+        # remember the first letter, find the last one, and compare them
+        transitions += [Transition("q0", letter, f"q1_{letter}", marker, Direction.RIGHT),
+                        Transition(f"q1_{letter}", TuringMachine.BLANK, "q8", marker, Direction.RIGHT),
+                        Transition(f"q1_{letter}", marker, "q8", marker, Direction.RIGHT),
+                        Transition(f"q2_{letter}", TuringMachine.BLANK, f"q3_{letter}", marker, Direction.LEFT),
+                        Transition(f"q2_{letter}", marker, f"q3_{letter}", marker, Direction.LEFT),
+                        Transition(f"q3_{letter}", letter, "q4", marker, Direction.LEFT)]
+        transitions += [Transition(f"q1_{letter}", other, f"q2_{letter}", other, Direction.RIGHT) for other in letters]
+        transitions += [Transition(f"q2_{letter}", other, f"q2_{letter}", other, Direction.RIGHT) for other in letters]
+        transitions.append(Transition("q4", letter, "q4", letter, Direction.LEFT))
+    transitions += [Transition("q4", TuringMachine.BLANK, "q0", marker, Direction.RIGHT),
+                    Transition("q4", marker, "q0", marker, Direction.RIGHT),
+                    Transition("q0", TuringMachine.BLANK, "q8", marker, Direction.RIGHT),
+                    Transition("q0", marker, "q8", marker, Direction.RIGHT)]
+    return TuringMachine("q0", "q8", transitions)
@@ -0,0 +1,63 @@
+from dataclasses import dataclass
+from os import path
+from tempfile import TemporaryDirectory
+from typing import List, Optional
+
+from typing_machines.abstract_machines.turing_machine import TuringMachine
+from typing_machines.app import Algorithm, encode, Transformation, CONSTRUCTIONS
+from typing_machines.checkers.backends import MypySubprocessBackend, CheckResult
+from typing_machines.checkers.subtyping import check_module
+from typing_machines.examples.families import get_random_palindrome_over
+from typing_machines.examples.machines import palindromes_over
+from typing_machines.transformations.binary_alphabet import binary_alphabet
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Size (in characters) of an encoded program, the number of subtyping steps
+    the subtyping engine takes to check it, and the outcome and latency
+    (in seconds) of mypy.
+    """
+    algorithm: str
+    letters: int
+    transformation: str
+    size: int
+    steps: int
+    outcome: str
+    wall_time: float
+
+
+def run_benchmark(algorithm: Algorithm, alphabet_sizes: List[int], n: int = 3,
+                  timeout: Optional[float] = 60) -> List[BenchmarkResult]:
+    """
+    Checks a palindrome of length 2n with the palindromes machine over
+    alphabets of the given sizes, encoded directly and after reducing the
+    machine to the binary alphabet.
+    """
+    results: List[BenchmarkResult] = []
+    checker: MypySubprocessBackend = MypySubprocessBackend(timeout=timeout, arguments=("--no-incremental",))
+    for size in alphabet_sizes:
+        letters: List[str] = [f"l{i}" for i in range(size)]
+        machine: TuringMachine = palindromes_over(letters)
+        word: List[str] = get_random_palindrome_over(letters, n)
+        transformations: List[Optional[Transformation]] = [None, binary_alphabet]
+        for transformation in transformations:
+            program: str = encode(algorithm, machine, word, transform=transformation)
+            steps: int = sum(result.steps for _, result in check_module(program, 10000000))
+            with TemporaryDirectory() as directory:
+                program_path: str = path.join(directory, "test.py")
+                with open(program_path, "w") as python_file:
+                    python_file.write(program)
+                result: CheckResult = checker.check([program_path], path.join(directory, ".mypy_cache"))
+            results.append(BenchmarkResult(algorithm.name, size, "none" if transformation is None else "binary",
+                                           len(program), steps, result.outcome.name, result.wall_time))
+            print(f"{algorithm.name}\t{size}\t{results[-1].transformation}\t{len(program)}\t{steps}\t"
+                  f"{result.outcome.name}\t{result.wall_time:.2f}")
+    return results
+
+
+if __name__ == '__main__':
+    print("algorithm\tletters\ttransformation\tsize\tsteps\toutcome\tmypy time")
+    for benchmark_algorithm in CONSTRUCTIONS:
+        run_benchmark(benchmark_algorithm, [2, 4, 8], timeout=30)
@@ -0,0 +1,62 @@
+from dataclasses import dataclass
+from tempfile import TemporaryDirectory
+from typing import List, Optional
+
+from typing_machines.app import Algorithm, CONSTRUCTIONS, cached_encode_machine, encode_query
+from typing_machines.checkers.subtyping import check_module
+from typing_machines.compilers.cost_model import encoding_metrics
+from typing_machines.examples.machines import palindromes
+from typing_machines.experiment.result_store import Measurement
+from typing_machines.experiment.stack_size_experiment import measure_stack_size, get_random_palindrome
+from typing_machines.transformations.block_machine import BlockMachine, block_machine
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Size of the class table encoding the block machine with blocks of k
+    cells (in classes and characters), the number of subtyping steps and the
+    maximum derivation depth of the subtyping engine, and the stack size
+    (in megabytes), outcome and CPU time (in seconds) of mypy.
+    """
+    algorithm: str
+    k: int
+    classes: int
+    table_size: int
+    steps: int
+    max_depth: int
+    stack_size: int
+    outcome: str
+    cpu_time: float
+
+
+def run_benchmark(algorithm: Algorithm, block_sizes: List[int], n: int = 8,
+                  timeout: Optional[float] = 60) -> List[BenchmarkResult]:
+    """
+    Checks a palindrome of length 2n with the block machines of the
+    palindromes machine for the given block sizes, where k = 1 is the
+    machine itself up to renaming. Larger blocks trade a larger class table
+    for fewer subtyping steps and a shallower derivation.
+    """
+    results: List[BenchmarkResult] = []
+    word: str = get_random_palindrome(n)
+    for k in block_sizes:
+        transformed: BlockMachine = block_machine(palindromes, k, input_alphabet="ab")
+        input_word: List[str] = transformed.translate_word(word)
+        table: str = cached_encode_machine(algorithm, transformed.machine)
+        (_, result), = check_module(table + "\n" + encode_query(algorithm, transformed.machine, input_word), 10000000)
+        with TemporaryDirectory() as directory:
+            measurement: Measurement = measure_stack_size(algorithm, input_word, directory, timeout=timeout,
+                                                          machine=transformed.machine)
+        results.append(BenchmarkResult(algorithm.name, k, encoding_metrics(table).classes, len(table), result.steps,
+                                       result.max_depth, measurement.stack_size, measurement.outcome.name,
+                                       measurement.cpu_time))
+        print(f"{algorithm.name}\t{k}\t{results[-1].classes}\t{len(table)}\t{result.steps}\t{result.max_depth}\t"
+              f"{measurement.stack_size}\t{measurement.outcome.name}\t{measurement.cpu_time:.2f}")
+    return results
+
+
+if __name__ == '__main__':
+    print("algorithm\tk\tclasses\ttable size\tsteps\tmax depth\tstack size\toutcome\tCPU time")
+    for benchmark_algorithm in CONSTRUCTIONS:
+        run_benchmark(benchmark_algorithm, [1, 2, 3, 4])
@@ -0,0 +1,75 @@
+from typing import List, Union, Optional, Iterable, Tuple
+
+from typing_machines.abstract_machines.turing_machine import TuringMachine
+from typing_machines.app import Algorithm, CONSTRUCTIONS, encode
+from typing_machines.checkers.backends import Outcome
+from typing_machines.compilers.cost_model import CalibrationPoint, CostModel, Prediction, encoding_metrics
+from typing_machines.examples.families import FAMILIES
+from typing_machines.examples.machines import palindromes
+from typing_machines.experiment.result_store import ResultStore, Measurement, checker_version
+from typing_machines.experiment.stack_size_experiment import measure_stack_size, get_random_palindrome
+from typing_machines.simulators.simulator import SimulationResult, Verdict, simulate
+
+
+def calibration_points(algorithm: Algorithm, machine: TuringMachine, input_words: Iterable[Union[str, List[str]]],
+                       store: Optional[ResultStore] = None, timeout: float = 60) -> List[CalibrationPoint]:
+    """
+    Measures the stack size, CPU time and peak memory mypy requires for the given machine and input words with
+    the given algorithm (see `measure_stack_size`), and returns them with the static metrics of the encodings and
+    the steps of the runs. Measurements are kept in the given store. Checks whose outcome is not the verdict of
+    the simulator are left out, e.g., timeouts, or rejections of queries nested beyond the limit of the parser.
+    """
+    points: List[CalibrationPoint] = []
+    checker: str = checker_version()
+    lower: int = 5
+    for input_word in input_words:
+        key: str = input_word if isinstance(input_word, str) else " ".join(input_word)
+        stored: Optional[Measurement] = None if store is None else store.get(algorithm.name, machine, key, checker)
+        measurement: Measurement = stored if stored is not None else \
+            measure_stack_size(algorithm, input_word, lower=lower, timeout=timeout, machine=machine)
+        if store is not None and stored is None:
+            store.put(algorithm.name, machine, key, checker, measurement)
+        lower = measurement.stack_size
+        result: SimulationResult = simulate(machine, input_word)
+        if measurement.outcome != (Outcome.ACCEPTED if result.verdict == Verdict.ACCEPT else Outcome.REJECTED):
+            continue
+        points.append(CalibrationPoint(algorithm.name, encoding_metrics(encode(algorithm, machine, input_word)),
+                                       result.steps,
+                                       Prediction(measurement.stack_size, measurement.cpu_time, measurement.peak_rss)))
+        print(f"{algorithm.name}\t{len(input_word)}\t{points[-1].steps}\t{points[-1].metrics.bytes}\t"
+              f"{measurement.stack_size}\t{measurement.cpu_time:.2f}\t{measurement.peak_rss}")
+    return points
+
+
+def calibration_workload(algorithm: Algorithm) -> List[Tuple[TuringMachine, List[Union[str, List[str]]]]]:
+    """
+    Returns machines and input words of increasing length for calibrating the given algorithm: palindromes, and
+    the counter and sorted words families, with shorter words for Grigore's construction, which needs more stack.
+    """
+    lengths: List[int] = list(range(4, 33, 4)) if algorithm == Algorithm.Grigore else list(range(4, 81, 8))
+    return [(palindromes, [get_random_palindrome(n // 2) for n in lengths]),
+            (FAMILIES["counter"].machine(2),
+             [FAMILIES["counter"].word(2, digits) for digits in range(1, lengths[-1] // 8 + 2)]),
+            (FAMILIES["sorted_words"].machine(3), [FAMILIES["sorted_words"].word(3, n) for n in lengths])]
+
+
+def calibrate(store: Optional[ResultStore] = None, algorithms: Iterable[Algorithm] = tuple(CONSTRUCTIONS),
+              timeout: float = 60) -> CostModel:
+    """
+    Runs the stack size experiment on the calibration workload of every algorithm and fits the cost model
+    to the results.
+    """
+    points: List[CalibrationPoint] = []
+    for algorithm in algorithms:
+        for machine, input_words in calibration_workload(algorithm):
+            points += calibration_points(algorithm, machine, input_words, store, timeout)
+    return CostModel.calibrate(points)
+
+
+if __name__ == '__main__':
+    print("algorithm\tlength\tsteps\tbytes\tstack size\tCPU time\tpeak RSS")
+    model: CostModel = calibrate(ResultStore("stack_size_results.sqlite"))
+    model.save("cost_model.json")
+    for algorithm_name, coefficients in model.coefficients.items():
+        for quantity, values in coefficients.items():
+            print(f"{algorithm_name}\t{quantity}\t" + "\t".join(f"{value:.4f}" for value in values))
@@ -0,0 +1,150 @@
+import csv
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict, fields
+from os import makedirs, path
+from shutil import which, rmtree
+from tempfile import mkdtemp
+from typing import List, Optional, Sequence, Tuple, TextIO, Union
+
+from typing_machines.abstract_machines.turing_machine import TuringMachine
+from typing_machines.app import Algorithm, write, CONSTRUCTIONS
+from typing_machines.checkers.backends import CheckResult, run_checker
+from typing_machines.examples.machines import palindromes
+from typing_machines.experiment.result_store import checker_version
+from typing_machines.simulators.simulator import simulate
+
+
+@dataclass
+class Checker:
+    """
+    Command line of a type checker. In `command`, "{path}" stands for the
+    module to check and "{directory}" for the directory holding it, which is
+    also the working directory of the checker. The limits are those of
+    `run_checker`, with the timeout in seconds.
+    """
+    name: str
+    command: Tuple[str, ...]
+    timeout: Optional[float] = 60
+    stack_size: Optional[int] = None
+    memory_limit: Optional[int] = None
+    cpu_limit: Optional[int] = None
+
+    @property
+    def installed(self) -> bool:
+        """
+        Returns true iff the checker executable is on the path.
+        """
+        return which(self.command[0]) is not None
+
+    def run(self, directory: str, module_path: str) -> CheckResult:
+        """
+        Checks one module in the given directory.
+        """
+        return run_checker([argument.format(path=module_path, directory=directory) for argument in self.command],
+                           self.timeout, self.stack_size, self.memory_limit, self.cpu_limit, directory)
+
+
+CHECKERS: Tuple[Checker, ...] = (
+    Checker("mypy", ("mypy", "--no-incremental", "--show-traceback", "{path}")),
+    Checker("pyre", ("pyre", "--noninteractive", "--source-directory", "{directory}", "check")),
+    Checker("pyright", ("pyright", "{path}")),
+)
+""" Checkers supporting variance, see the README. """
+
+
+@dataclass
+class BenchmarkRow:
+    """
+    Outcome, latency (seconds) and peak memory (bytes) of one checker on one
+    input word, next to the verdict of the simulator (`expected`, the name
+    of a `Verdict`: ACCEPT, REJECT, or STEP_LIMIT and TAPE_LIMIT for runs
+    the simulator left undecided).
+    """
+    checker: str
+    version: str
+    algorithm: str
+    machine: str
+    input_word: str
+    expected: str
+    outcome: str
+    returncode: int
+    wall_time: float
+    cpu_time: float
+    peak_rss: int
+
+
+def _run_checker(checker: Checker, directory: str, algorithm: Algorithm, machine: TuringMachine,
+                 input_words: Sequence[Union[str, List[str]]], expected: List[str]) -> List[BenchmarkRow]:
+    """
+    Checks the input words one after the other, each in its own subdirectory,
+    so that checkers that analyze whole directories see a single query.
+    """
+    version: str = checker_version(checker.command[0])
+    rows: List[BenchmarkRow] = []
+    for i, input_word in enumerate(input_words):
+        query_directory: str = path.join(directory, checker.name, str(i))
+        makedirs(query_directory)
+        module_path: str = path.join(query_directory, "query.py")
+        with open(module_path, "w") as python_file:
+            write(algorithm, machine, input_word, python_file)
+        result: CheckResult = checker.run(query_directory, module_path)
+        rows.append(BenchmarkRow(checker.name, version, algorithm.name, machine.fingerprint, "".join(input_word),
+                                 expected[i], result.outcome.name, result.returncode, result.wall_time,
+                                 result.cpu_time, result.peak_rss))
+    return rows
+
+
+def run_benchmark(algorithm: Algorithm, machine: TuringMachine, input_words: Sequence[Union[str, List[str]]],
+                  checkers: Sequence[Checker] = CHECKERS, directory: Optional[str] = None) -> List[BenchmarkRow]:
+    """
+    Checks the encoding of every input word with every installed checker.
+    Checkers that are not installed are skipped. The checkers run
+    concurrently, each on its own copy of the modules, while the words of
+    a single checker are checked sequentially so that their latencies do
+    not compete with each other. Modules are written to a fresh
+    subdirectory of `directory` (by default, the temporary directory) and
+    removed afterwards.
+    """
+    expected: List[str] = [simulate(machine, input_word).verdict.name for input_word in input_words]
+    installed: List[Checker] = [checker for checker in checkers if checker.installed]
+    workspace: str = mkdtemp(prefix="checker_benchmark_", dir=directory)
+    try:
+        with ThreadPoolExecutor(max(len(installed), 1)) as pool:
+            jobs = [pool.submit(_run_checker, checker, workspace, algorithm, machine, input_words, expected)
+                    for checker in installed]
+            return [row for job in jobs for row in job.result()]
+    finally:
+        rmtree(workspace, ignore_errors=True)
+
+
+def write_csv(rows: List[BenchmarkRow], output: TextIO) -> None:
+    """
+    Writes benchmark rows as CSV with a header line.
+    """
+    writer = csv.writer(output)
+    writer.writerow([f.name for f in fields(BenchmarkRow)])
+    for row in rows:
+        writer.writerow(asdict(row).values())
+
+
+def write_json(rows: List[BenchmarkRow], output: TextIO) -> None:
+    """
+    Writes benchmark rows as a JSON list of objects.
+    """
+    json.dump([asdict(row) for row in rows], output, indent=2)
+    output.write("\n")
+
+
+if __name__ == '__main__':
+    benchmark_rows: List[BenchmarkRow] = []
+    for benchmark_algorithm in CONSTRUCTIONS:
+        benchmark_rows += run_benchmark(benchmark_algorithm, palindromes, ["abba", "abbabba", "abab", "ab" * 10])
+    with open("checker_benchmark.csv", "w", newline="") as csv_file:
+        write_csv(benchmark_rows, csv_file)
+    with open("checker_benchmark.json", "w") as json_file:
+        write_json(benchmark_rows, json_file)
+    for benchmark_row in benchmark_rows:
+        print(f"{benchmark_row.checker}\t{benchmark_row.algorithm}\t{benchmark_row.input_word}\t"
+              f"{benchmark_row.expected}\t{benchmark_row.outcome}\t{benchmark_row.wall_time:.2f}\t"
+              f"{benchmark_row.peak_rss}")
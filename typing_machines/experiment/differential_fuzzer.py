@@ -0,0 +1,234 @@
+"""
+Differential fuzzing of the compilers. Random deterministic machines and
+input words are encoded, checked by a type checker in a process pool, and
+compared with the verdict of direct simulation. With a transformation, the
+transformed machine and translated word are encoded instead, but compared
+with the simulation of the original machine. Disagreements are shrunk
+to a minimal machine and word before they are reported. A run is
+reproducible from its seed: case `i` only depends on the seed and `i`.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from os import cpu_count, path
+from random import Random
+from tempfile import TemporaryDirectory
+from functools import partial
+from time import perf_counter
+from typing import List, Optional, Set, Callable, Dict
+
+from typing_machines.abstract_machines.turing_machine import TuringMachine, Transition, Direction
+from typing_machines.app import Algorithm, write, CONSTRUCTIONS, Transformation
+from typing_machines.checkers.backends import CheckerBackend, CheckResult, Outcome, MypySubprocessBackend, \
+    SubtypingEngineBackend
+from typing_machines.simulators.simulator import simulate, Verdict
+from typing_machines.transformations.binary_alphabet import binary_alphabet
+from typing_machines.transformations.block_machine import block_machine
+
+CHECKERS: Dict[str, Callable[[float], CheckerBackend]] = {
+    "engine": lambda timeout: SubtypingEngineBackend(max_steps=10000000),
+    "mypy": lambda timeout: MypySubprocessBackend(timeout=timeout, arguments=("--no-incremental",)),
+}
+""" Checkers the fuzzer can run, by name, given a timeout in seconds. """
+
+
+@dataclass
+class Case:
+    """
+    Machine and input word of a fuzzing case, with the verdict of the simulator.
+    """
+    index: int
+    machine: TuringMachine
+    input_word: List[str]
+    expected: Verdict
+
+
+@dataclass
+class Disagreement:
+    """
+    Case on which the checker disagrees with the simulator, and its minimized machine and word.
+    """
+    case: Case
+    outcome: Outcome
+    machine: TuringMachine
+    input_word: List[str]
+
+    def __str__(self) -> str:
+        transitions: str = "\n".join(f"  {t.source_state}, {t.read_letter} -> {t.target_state}, {t.write_letter}, "
+                                     f"{t.move_direction.name}" for t in self.machine.transitions)
+        return f"case {self.case.index}: expected {self.case.expected.name}, checker {self.outcome.name}\n" \
+               f"minimized word {self.input_word}, initial state {self.machine.initial_state}, " \
+               f"termination state {self.machine.termination_state}, transitions:\n{transitions}"
+
+
+@dataclass
+class FuzzReport:
+    """
+    Summary of a fuzzing run with the named checker. Cases the simulator does
+    not decide within the step bound are skipped, and cases on which the
+    checker neither accepts nor rejects (e.g., timeouts) are inconclusive.
+    """
+    seed: int
+    checker: str
+    cases: int = 0
+    skipped: int = 0
+    agreements: int = 0
+    inconclusive: int = 0
+    disagreements: List[Disagreement] = field(default_factory=list)
+
+
+def random_machine(random: Random, states: int, letters: int, density: float = 0.8) -> TuringMachine:
+    """
+    Returns a random deterministic machine with the given numbers of
+    (non-accepting) states and letters, in which every state has a
+    transition on every letter (and the blank) with probability `density`.
+    """
+    names: List[str] = [f"q{i}" for i in range(states)]
+    alphabet: List[str] = [f"l{i}" for i in range(letters)]
+    transitions: List[Transition] = []
+    for state in names:
+        for letter in alphabet + [TuringMachine.BLANK]:
+            if random.random() < density:
+                target: str = "accept" if random.random() < 1 / (states + 1) else random.choice(names)
+                transitions.append(Transition(state, letter, target, random.choice(alphabet),
+                                              random.choice([Direction.LEFT, Direction.RIGHT])))
+    return TuringMachine(names[0], "accept", transitions)
+
+
+def generate_case(seed: int, index: int, max_states: int = 5, max_letters: int = 3, max_length: int = 6,
+                  max_steps: int = 200) -> Case:
+    """
+    Returns fuzzing case `index` of the given seed, with the verdict of the
+    simulator within `max_steps` steps (`STEP_LIMIT` if it does not decide).
+    """
+    random: Random = Random(f"{seed}:{index}")
+    machine: TuringMachine = random_machine(random, random.randint(1, max_states), random.randint(1, max_letters))
+    input_word: List[str] = [random.choice(machine.alphabet) for _ in range(random.randint(0, max_length))] \
+        if machine.alphabet else []
+    return Case(index, machine, input_word, simulate(machine, input_word, max_steps=max_steps).verdict)
+
+
+def check(algorithm: Algorithm, machine: TuringMachine, input_word: List[str], checker: str,
+          timeout: float = 60, transform: Optional[Transformation] = None) -> Outcome:
+    """
+    Checks the encoded machine and word (transformed with `transform`, if given) with the named checker in a
+    fresh directory.
+    """
+    with TemporaryDirectory(prefix="fuzz_") as directory:
+        module_path: str = path.join(directory, "case.py")
+        with open(module_path, "w") as python_file:
+            write(algorithm, machine, input_word, python_file, transform)
+        result: CheckResult = CHECKERS[checker](timeout).check([module_path], path.join(directory, ".mypy_cache"))
+    return result.outcome
+
+
+def _disagrees(expected: Verdict, outcome: Outcome) -> bool:
+    return outcome in (Outcome.ACCEPTED, Outcome.REJECTED) and \
+        (outcome == Outcome.ACCEPTED) != (expected == Verdict.ACCEPT)
+
+
+def minimize_case(algorithm: Algorithm, case: Case, checker: str, timeout: float = 60,
+                  max_steps: int = 200, transform: Optional[Transformation] = None) -> Disagreement:
+    """
+    Shrinks a case on which the checker disagrees with the simulator, greedily
+    removing transitions and letters of the word as long as the checker
+    still disagrees with the simulator, which must still decide the case.
+    """
+    machine: TuringMachine = case.machine
+    input_word: List[str] = case.input_word
+    outcome: Outcome = check(algorithm, machine, input_word, checker, timeout, transform)
+
+    def attempt(candidate_machine: TuringMachine, candidate_word: List[str]) -> bool:
+        nonlocal machine, input_word, outcome
+        if not set(candidate_word) <= set(candidate_machine.alphabet):
+            return False
+        verdict: Verdict = simulate(candidate_machine, candidate_word, max_steps=max_steps).verdict
+        if verdict not in (Verdict.ACCEPT, Verdict.REJECT):
+            return False
+        candidate_outcome: Outcome = check(algorithm, candidate_machine, candidate_word, checker, timeout,
+                                           transform)
+        if not _disagrees(verdict, candidate_outcome):
+            return False
+        machine, input_word, outcome = candidate_machine, candidate_word, candidate_outcome
+        return True
+
+    # a shorter word may need fewer letters, and thus fewer transitions, so repeat until neither shrinks
+    size: int = -1
+    while size != len(machine.transitions) + len(input_word):
+        size = len(machine.transitions) + len(input_word)
+        i: int = 0
+        while i < len(machine.transitions):
+            transitions: List[Transition] = machine.transitions[:i] + machine.transitions[i + 1:]
+            if not attempt(TuringMachine(machine.initial_state, machine.termination_state, transitions), input_word):
+                i += 1
+        i = 0
+        while i < len(input_word):
+            if not attempt(machine, input_word[:i] + input_word[i + 1:]):
+                i += 1
+    return Disagreement(case, outcome, machine, input_word)
+
+
+def run_fuzzer(algorithm: Algorithm, seed: int = 0, budget: float = 60, checker: str = "mypy",
+               workers: Optional[int] = None, timeout: float = 60, max_cases: Optional[int] = None,
+               max_steps: int = 200, transform: Optional[Transformation] = None) -> FuzzReport:
+    """
+    Fuzzes the compiler of the given algorithm with cases 0, 1, ... of the
+    given seed, checking them in `workers` processes (by default, one per
+    core), until `budget` seconds have passed or `max_cases` cases were
+    generated. Disagreements are minimized once the budget is used up.
+    By default, the cases are checked by mypy; `checker="engine"` checks
+    them much faster with the subtyping engine, which models mypy's
+    subtyping rather than running it.
+    With `transform` (which must be picklable, e.g., a module function or
+    a `functools.partial` of one), fuzzes the transformation as well.
+    """
+    report: FuzzReport = FuzzReport(seed, checker)
+    deadline: float = perf_counter() + budget
+    workers = workers or cpu_count() or 1
+    found: List[Case] = []
+    pending: Set[Future] = set()
+    cases: Dict[Future, Case] = {}
+
+    def record(done: Future) -> None:
+        outcome: Outcome = done.result()
+        if outcome not in (Outcome.ACCEPTED, Outcome.REJECTED):
+            report.inconclusive += 1
+        elif _disagrees(cases[done].expected, outcome):
+            found.append(cases[done])
+        else:
+            report.agreements += 1
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while perf_counter() < deadline and (max_cases is None or report.cases < max_cases):
+            case: Case = generate_case(seed, report.cases, max_steps=max_steps)
+            report.cases += 1
+            if case.expected not in (Verdict.ACCEPT, Verdict.REJECT):
+                report.skipped += 1
+                continue
+            future: Future = executor.submit(check, algorithm, case.machine, case.input_word, checker, timeout,
+                                             transform)
+            cases[future] = case
+            pending.add(future)
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, timeout=max(0.0, deadline - perf_counter()),
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(future)
+        for future in pending:
+            record(future)
+    report.disagreements = [minimize_case(algorithm, case, checker, timeout, max_steps, transform)
+                            for case in sorted(found, key=lambda found_case: found_case.index)]
+    return report
+
+
+if __name__ == '__main__':
+    transforms: Dict[str, Optional[Transformation]] = {"": None, " (binary)": binary_alphabet,
+                                                      " (blocks of 2)": partial(block_machine, k=2)}
+    for fuzzed_algorithm, (name, fuzzed_transform) in [(algorithm, item) for algorithm in CONSTRUCTIONS
+                                                       for item in transforms.items()]:
+        fuzz_report: FuzzReport = run_fuzzer(fuzzed_algorithm, seed=0, budget=30, transform=fuzzed_transform)
+        print(f"{fuzzed_algorithm.name}{name} ({fuzz_report.checker}): {fuzz_report.cases} cases, {fuzz_report.skipped} skipped, "
+              f"{fuzz_report.agreements} agreements, {fuzz_report.inconclusive} inconclusive, "
+              f"{len(fuzz_report.disagreements)} disagreements")
+        for disagreement in fuzz_report.disagreements:
+            print(disagreement)
@@ -0,0 +1,69 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed, Future
+from os import cpu_count
+from tempfile import TemporaryDirectory
+from typing import Dict, Iterable, List, Optional, Tuple, TextIO
+
+from typing_machines.app import Algorithm
+from typing_machines.examples.machines import palindromes
+from typing_machines.experiment.result_store import ResultStore, Measurement, checker_version
+from typing_machines.experiment.stack_size_experiment import measure_stack_size, get_random_palindrome
+
+
+def _measure(algorithm: Algorithm, n: int, lower: int) -> Measurement:
+    """
+    Measures the stack size for one algorithm and palindrome length in a fresh workspace,
+    so that concurrent jobs never share modules or mypy caches.
+    """
+    with TemporaryDirectory(prefix=f"stack_size_{algorithm.name.lower()}_{n}_") as directory:
+        return measure_stack_size(algorithm, get_random_palindrome(n), directory, lower)
+
+
+def run_parallel_experiment(input_lengths: Dict[Algorithm, Iterable[int]], workers: Optional[int] = None,
+                            store: Optional[ResultStore] = None,
+                            progress: Optional[TextIO] = None) -> Dict[Algorithm, List[Tuple[int, Measurement]]]:
+    """
+    Find mypy stack sizes for the given algorithms and input lengths, measuring
+    every (algorithm, input length) pair in its own process and workspace.
+    The stack size probes of a single pair depend on each other, so they run
+    sequentially within their job. Uses `workers` processes (by default, one per core).
+    Points already in the given store are not measured again, and every search
+    starts from the largest stored result for a shorter input. A progress line
+    is printed to `progress` (by default, the standard output) per measurement.
+    """
+    results: Dict[Algorithm, List[Tuple[int, Measurement]]] = {algorithm: [] for algorithm in input_lengths}
+    checker: str = checker_version()
+    with ProcessPoolExecutor(workers or cpu_count()) as pool:
+        jobs: Dict[Future, Tuple[Algorithm, int]] = {}
+        for algorithm, lengths in input_lengths.items():
+            lower: int = 5
+            for n in sorted(lengths):
+                stored: Optional[Measurement] = None if store is None else \
+                    store.get(algorithm.name, palindromes, get_random_palindrome(n), checker)
+                if stored is not None:
+                    results[algorithm].append((n * 2, stored))
+                    lower = stored.stack_size
+                else:
+                    jobs[pool.submit(_measure, algorithm, n, lower)] = (algorithm, n)
+        for job in as_completed(jobs):
+            algorithm, n = jobs[job]
+            measurement: Measurement = job.result()
+            if store is not None:
+                store.put(algorithm.name, palindromes, get_random_palindrome(n), checker, measurement)
+            results[algorithm].append((n * 2, measurement))
+            print(f"mypy requires {measurement.stack_size}M stack size with algorithm {algorithm.name} "
+                  f"and palindrome of length {n * 2} ({measurement.outcome.name.lower()})", file=progress)
+    for algorithm_results in results.values():
+        algorithm_results.sort(key=lambda result: result[0])
+    return results
+
+
+if __name__ == '__main__':
+    all_results: Dict[Algorithm, List[Tuple[int, Measurement]]] = run_parallel_experiment({
+        Algorithm.Grigore: range(5, 9),
+        Algorithm.Roth: range(5, 46, 5),
+    }, store=ResultStore("stack_size_results.sqlite"))
+    for algorithm, algorithm_results in all_results.items():
+        print(f"{algorithm.name}'s results:")
+        for n, m in algorithm_results:
+            print(f"{algorithm.name}\t{n}\t{m.stack_size}\t{m.outcome.name}\t{m.wall_time:.2f}\t{m.cpu_time:.2f}\t"
+                  f"{m.peak_rss}")
@@ -0,0 +1,49 @@
+import os
+from typing import Iterable, List, Tuple, Optional
+
+from typing_machines.app import encode, Algorithm
+from typing_machines.checkers.backends import CheckResult
+from typing_machines.checkers.profiling import MypyProfilingBackend, ProfileSummary, summarize, STATS_SUFFIX, \
+    STACKS_SUFFIX
+from typing_machines.examples.machines import palindromes
+from typing_machines.experiment.stack_size_experiment import get_random_palindrome
+
+
+def profile_palindromes(algorithm: Algorithm, input_lengths: Iterable[int], directory: str = "profiles",
+                        timeout: float = 600, prefix: str = "mypy.subtypes",
+                        top: int = 10) -> List[Tuple[int, CheckResult, Optional[ProfileSummary]]]:
+    """
+    Profiles mypy checking the palindromes typing machine with the given
+    algorithm and random palindromes of twice the given lengths, and prints
+    the summary of every profile, with the hot spots among the functions of
+    the modules starting with `prefix`. The profiles are kept in the given
+    directory, named after the algorithm and input length. Checks that wrote
+    no profile, e.g., because they timed out or the profiled process died,
+    have no summary; their outcome is printed instead.
+    """
+    backend: MypyProfilingBackend = MypyProfilingBackend(directory, timeout, arguments=("--no-incremental",))
+    test_path: str = os.path.join(directory, "test.py")
+    results: List[Tuple[int, CheckResult, Optional[ProfileSummary]]] = []
+    for n in input_lengths:
+        with open(test_path, "w") as python_file:
+            python_file.write(encode(algorithm, palindromes, get_random_palindrome(n)))
+        result: CheckResult = backend.check([test_path])
+        os.remove(test_path)
+        description: str = f"{algorithm.name}, palindrome of length {n * 2} ({result.outcome.name.lower()}, " \
+                           f"{result.wall_time:.2f}s wall under the profiler)"
+        if not all(os.path.exists(backend.profiles[-1] + suffix) for suffix in (STATS_SUFFIX, STACKS_SUFFIX)):
+            results.append((n * 2, result, None))
+            print(f"{description}, no profile written")
+            continue
+        base_path: str = os.path.join(directory, f"{algorithm.name.lower()}_{n * 2}")
+        for suffix in (STATS_SUFFIX, STACKS_SUFFIX):
+            os.replace(backend.profiles[-1] + suffix, base_path + suffix)
+        summary: ProfileSummary = summarize(base_path, top, prefix)
+        results.append((n * 2, result, summary))
+        print(f"{description}, {summary}")
+    return results
+
+
+if __name__ == '__main__':
+    profile_palindromes(Algorithm.Grigore, range(2, 7, 2))
+    profile_palindromes(Algorithm.Roth, range(5, 21, 5))
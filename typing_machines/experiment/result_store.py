@@ -0,0 +1,108 @@
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from subprocess import run, PIPE, DEVNULL
+from typing import Optional, List, Tuple, Iterator
+
+from typing_machines.abstract_machines.turing_machine import TuringMachine
+from typing_machines.checkers.backends import Outcome
+
+
+@lru_cache()
+def checker_version(command: str = "mypy") -> str:
+    """
+    Returns the version string of the given checker, or "unknown" if it cannot be run.
+    """
+    try:
+        return run([command, "--version"], stdout=PIPE, stderr=DEVNULL, text=True, timeout=60).stdout.strip() \
+               or "unknown"
+    except OSError:
+        return "unknown"
+
+
+@dataclass
+class Measurement:
+    """
+    Stack size (in megabytes) a checker requires for one query, with the outcome
+    and resource usage of the check at the smallest stack size that did not overflow.
+    """
+    stack_size: int
+    outcome: Outcome
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    peak_rss: int = 0
+
+
+_COLUMNS: Tuple[Tuple[str, str], ...] = (("outcome", "TEXT"), ("wall_time", "REAL"), ("cpu_time", "REAL"),
+                                         ("peak_rss", "INTEGER"))
+""" Columns added to the stack size table after its first version. """
+
+
+def _measurement(row: Tuple) -> Measurement:
+    stack_size, outcome, wall_time, cpu_time, peak_rss = row
+    return Measurement(stack_size, Outcome[outcome] if outcome is not None else Outcome.ACCEPTED,
+                       wall_time or 0.0, cpu_time or 0.0, peak_rss or 0)
+
+
+class ResultStore:
+    """
+    SQLite store of measured stack sizes, keyed by algorithm, machine
+    fingerprint, input word and checker version. Several processes may
+    share one store. Stores written before outcomes and resource usage were
+    recorded are migrated, and their old rows read as accepted with no usage.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS stack_sizes ("
+                               "algorithm TEXT, machine TEXT, word TEXT, checker TEXT, stack_size INTEGER, "
+                               "PRIMARY KEY (algorithm, machine, word, checker))")
+            existing: List[str] = [row[1] for row in connection.execute("PRAGMA table_info(stack_sizes)")]
+            for column, column_type in _COLUMNS:
+                if column not in existing:
+                    connection.execute(f"ALTER TABLE stack_sizes ADD COLUMN {column} {column_type}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection: sqlite3.Connection = sqlite3.connect(self.path, timeout=60)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get(self, algorithm: str, machine: TuringMachine, word: str, checker: str) -> Optional[Measurement]:
+        """
+        Returns the stored measurement, or `None` if the point was not measured.
+        """
+        with self._connect() as connection:
+            row: Optional[Tuple] = connection.execute(
+                "SELECT stack_size, outcome, wall_time, cpu_time, peak_rss FROM stack_sizes "
+                "WHERE algorithm = ? AND machine = ? AND word = ? AND checker = ?",
+                (algorithm, machine.fingerprint, word, checker)).fetchone()
+        return None if row is None else _measurement(row)
+
+    def put(self, algorithm: str, machine: TuringMachine, word: str, checker: str, measurement: Measurement) -> None:
+        """
+        Stores a measurement, replacing any previous measurement of the same point.
+        """
+        with self._connect() as connection:
+            connection.execute("INSERT OR REPLACE INTO stack_sizes "
+                               "(algorithm, machine, word, checker, stack_size, outcome, wall_time, cpu_time, peak_rss) "
+                               "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               (algorithm, machine.fingerprint, word, checker, measurement.stack_size,
+                                measurement.outcome.name, measurement.wall_time, measurement.cpu_time,
+                                measurement.peak_rss))
+
+    def all(self, algorithm: str, machine: TuringMachine, checker: str) -> List[Tuple[str, Measurement]]:
+        """
+        Returns all measured words and their measurements for an algorithm, machine and checker.
+        """
+        with self._connect() as connection:
+            rows: List[Tuple] = connection.execute(
+                "SELECT word, stack_size, outcome, wall_time, cpu_time, peak_rss FROM stack_sizes "
+                "WHERE algorithm = ? AND machine = ? AND checker = ?",
+                (algorithm, machine.fingerprint, checker)).fetchall()
+        return [(row[0], _measurement(row[1:])) for row in rows]
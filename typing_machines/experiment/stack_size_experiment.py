@@ -1,13 +1,11 @@
-from os import remove
+from os import remove, path
 from random import Random
-from resource import RLIMIT_STACK, setrlimit
-from subprocess import Popen, DEVNULL
-from time import sleep
-from typing import Callable, List, Tuple, Iterable
-
-import matplotlib.pyplot as plt
+from typing import Callable, List, Tuple, Iterable, Optional, Dict, Union
 
+from typing_machines.abstract_machines.turing_machine import TuringMachine
 from typing_machines.app import encode, Algorithm
+from typing_machines.checkers.backends import MypySubprocessBackend, CheckResult, Outcome
+from typing_machines.experiment.result_store import ResultStore, Measurement, checker_version
 from typing_machines.examples.machines import palindromes
 
 
@@ -31,6 +29,29 @@ def binary_search(le: Callable[[int], bool]) -> int:
     return l
 
 
+def galloping_search(le: Callable[[int], bool], lower: int = -1) -> int:
+    """
+    Finds a natural number according to the given "lower equals" predicate,
+    assuming it holds for `lower`. Gallops upwards from `lower` in doubling
+    steps and then binary searches the last step.
+    Returns `lower` if the predicate does not hold for `lower + 1`.
+    """
+    step: int = 1
+    u: int = lower + step
+    while le(u):
+        lower = u
+        step *= 2
+        u = lower + step
+    u -= 1
+    while lower < u:
+        m: int = (lower + u) // 2 + (lower + u) % 2
+        if le(m):
+            lower = m
+        else:
+            u = m - 1
+    return lower
+
+
 def get_random_palindrome(n: int) -> str:
     """
     Returns a random palindrome over {a, b} of length n.
@@ -45,52 +66,105 @@ def get_random_palindrome(n: int) -> str:
     return palindrome
 
 
-def get_stack_size(algorithm: Algorithm, input_word: str) -> int:
+def measure_stack_size(algorithm: Algorithm, input_word: Union[str, List[str]], directory: str = ".", lower: int = 5,
+                       timeout: Optional[float] = 10, memory_limit: Optional[int] = None,
+                       cpu_limit: Optional[int] = None, machine: TuringMachine = palindromes) -> Measurement:
     """
-    Get the call stack size mypy requires to compile the palindromes typing machine with the given
-    algorithm and input palindrome.
+    Measure the call stack size mypy requires to compile the given typing machine (by default, palindromes)
+    with the given algorithm and input word. The probes write their module and mypy cache to the given directory.
+    The search starts from `lower`, a stack size known not to be enough unless it is the minimal 5M,
+    e.g., the result for a shorter input. Only stack overflows count as "not enough": a probe that is
+    rejected, times out or runs out of memory ends the search, and its outcome is part of the measurement.
+    Every probe runs under the given wall time (seconds), memory (bytes) and CPU time (seconds) limits.
     """
+    test_path: str = path.join(directory, "test.py")
+    cache_directory: str = path.join(directory, ".mypy_cache")
+    probes: Dict[int, CheckResult] = {}
 
     def compiles(n: int) -> bool:
-        with open("test.py", "w") as python_file:
-            python_file.write(encode(algorithm, palindromes, input_word))
-        sleep(1)
+        with open(test_path, "w") as python_file:
+            python_file.write(encode(algorithm, machine, input_word))
         stack_size: int = (n + 5) * 1000000
-        with Popen(["mypy", "test.py"], preexec_fn=lambda: setrlimit(RLIMIT_STACK, (stack_size, stack_size)),
-                   stdout=DEVNULL, stderr=DEVNULL) as p:
-            retcode = p.wait(timeout=10)
-        remove("test.py")
-        return retcode != 0
+        # every probe checks the module from scratch rather than from the incremental cache
+        probes[n] = MypySubprocessBackend(stack_size=stack_size, timeout=timeout, arguments=("--no-incremental",),
+                                          memory_limit=memory_limit, cpu_limit=cpu_limit) \
+            .check([test_path], cache_directory)
+        remove(test_path)
+        return probes[n].outcome == Outcome.STACK_OVERFLOW
 
-    depth: int = binary_search(compiles)
+    depth: int = binary_search(compiles) if lower <= 5 else galloping_search(compiles, lower - 5)
+    probe: CheckResult = probes[min(n for n in probes if n > depth)]
     depth = 5 if depth == -1 else depth + 5
-    return depth
+    return Measurement(depth, probe.outcome, probe.wall_time, probe.cpu_time, probe.peak_rss)
+
 
+def get_stack_size(algorithm: Algorithm, input_word: str, directory: str = ".", lower: int = 5) -> int:
+    """
+    Get the call stack size mypy requires to compile the palindromes typing machine with the given
+    algorithm and input palindrome. See `measure_stack_size`.
+    """
+    return measure_stack_size(algorithm, input_word, directory, lower).stack_size
 
-def run_experiment(algorithm: Algorithm, input_lengths: Iterable[int]) -> List[Tuple[int, int]]:
+
+def run_experiment(algorithm: Algorithm, input_lengths: Iterable[int],
+                   store: Optional[ResultStore] = None) -> List[Tuple[int, Measurement]]:
     """
     Find mypy stack sizes for given algorithm and input lengths.
+    The required stack size only grows with the input length, so every search
+    starts from the result for the previous length. Results are kept in the
+    given store, and points it already holds are not measured again.
     """
-    results: List[Tuple[int, int]] = []
-    for n in input_lengths:
-        s: int = get_stack_size(algorithm, get_random_palindrome(n))
-        results.append((n * 2, s))
-        print(f"mypy requires {s}M stack size with algorithm {algorithm.name} and palindrome of length {n * 2}")
+    results: List[Tuple[int, Measurement]] = []
+    checker: str = checker_version()
+    s: int = 5
+    for n in sorted(input_lengths):
+        word: str = get_random_palindrome(n)
+        stored: Optional[Measurement] = None if store is None else \
+            store.get(algorithm.name, palindromes, word, checker)
+        measurement: Measurement = stored if stored is not None else measure_stack_size(algorithm, word, lower=s)
+        if store is not None and stored is None:
+            store.put(algorithm.name, palindromes, word, checker, measurement)
+        s = measurement.stack_size
+        results.append((n * 2, measurement))
+        print(f"mypy requires {s}M stack size with algorithm {algorithm.name} and palindrome of length {n * 2} "
+              f"({measurement.outcome.name.lower()}, {measurement.wall_time:.2f}s wall, "
+              f"{measurement.cpu_time:.2f}s CPU, {measurement.peak_rss // 1000000}MB peak RSS)")
     return results
 
 
+_STYLES: Dict[Algorithm, Tuple[str, str]] = {Algorithm.Grigore: ("blue", "o"), Algorithm.Roth: ("green", "x")}
+
+
+def plot_results(results: Dict[Algorithm, List[Tuple[int, Measurement]]]) -> None:
+    """
+    Plots the stack size, CPU time and peak memory of the results of every algorithm by input length.
+    Imports matplotlib only when called, so computing results does not require it.
+    """
+    import matplotlib.pyplot as plt
+    figure, axes = plt.subplots(1, 3, figsize=(15, 4))
+    for (name, values), axis in zip([("stack size (MB)", lambda m: m.stack_size),
+                                     ("CPU time (s)", lambda m: m.cpu_time),
+                                     ("peak RSS (MB)", lambda m: m.peak_rss / 1000000)], axes):
+        for algorithm, algorithm_results in results.items():
+            color, marker = _STYLES.get(algorithm, ("gray", "+"))
+            axis.plot([n for n, _ in algorithm_results], [values(m) for _, m in algorithm_results], color=color,
+                      label=algorithm.name)
+            axis.scatter([n for n, _ in algorithm_results], [values(m) for _, m in algorithm_results], color=color,
+                         marker=marker)
+        axis.set_xlabel("input length")
+        axis.set_ylabel(name)
+        axis.legend(loc="upper left")
+    plt.show()
+
+
 if __name__ == '__main__':
-    grigore_results: List[Tuple[int, int]] = run_experiment(Algorithm.Grigore, range(5, 9))
+    result_store: ResultStore = ResultStore("stack_size_results.sqlite")
+    grigore_results: List[Tuple[int, Measurement]] = run_experiment(Algorithm.Grigore, range(5, 9), result_store)
     print("Grigore's results:")
-    for n, s in grigore_results:
-        print(f"Grigore\t{n}\t{s}")
-    roth_results: List[Tuple[int, int]] = run_experiment(Algorithm.Roth, range(5, 46, 5))
+    for n, m in grigore_results:
+        print(f"Grigore\t{n}\t{m.stack_size}\t{m.outcome.name}\t{m.wall_time:.2f}\t{m.cpu_time:.2f}\t{m.peak_rss}")
+    roth_results: List[Tuple[int, Measurement]] = run_experiment(Algorithm.Roth, range(5, 46, 5), result_store)
     print("Roth's results:")
-    for n, s in roth_results:
-        print(f"Roth\t{n}\t{s}")
-    plt.plot([n for n, _ in grigore_results], [s for _, s in grigore_results], color="blue", label="Grigore")
-    plt.scatter([n for n, _ in grigore_results], [s for _, s in grigore_results], color="blue", marker="o")
-    plt.plot([n for n, _ in roth_results], [s for _, s in roth_results], color="green", label="Roth")
-    plt.scatter([n for n, _ in roth_results], [s for _, s in roth_results], color="green", marker="x")
-    plt.legend(loc="upper right")
-    plt.show()
+    for n, m in roth_results:
+        print(f"Roth\t{n}\t{m.stack_size}\t{m.outcome.name}\t{m.wall_time:.2f}\t{m.cpu_time:.2f}\t{m.peak_rss}")
+    plot_results({Algorithm.Grigore: grigore_results, Algorithm.Roth: roth_results})
@@ -0,0 +1,154 @@
+from dataclasses import dataclass
+from itertools import product, chain
+from typing import List, Union, Sequence, Iterator, Tuple, Dict, cast
+
+import numpy as np
+
+from typing_machines.abstract_machines.turing_machine import TuringMachine, Direction
+from typing_machines.simulators.simulator import Verdict
+
+
+@dataclass
+class BatchSimulationResult:
+    """
+    Verdicts and step counts of simulating a Turing machine on many input words,
+    in the order of the input words.
+    """
+    verdicts: List[Verdict]
+    steps: np.ndarray
+
+
+def _transition_arrays(turing_machine: TuringMachine) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns dense arrays indexed by state id and letter id holding the target
+    state id (-1 where no transition applies), written letter id and head move
+    of every transition.
+    """
+    shape: Tuple[int, int] = (len(turing_machine.state_ids), len(turing_machine.letter_ids))
+    targets: np.ndarray = np.full(shape, -1, dtype=np.int32)
+    writes: np.ndarray = np.zeros(shape, dtype=np.uint8 if shape[1] <= 256 else np.uint32)
+    moves: np.ndarray = np.zeros(shape, dtype=np.int64)
+    for (state, letter), transition in turing_machine.transition_index.items():
+        index: Tuple[int, int] = (turing_machine.state_ids[state], turing_machine.letter_ids[letter])
+        targets[index] = turing_machine.state_ids[transition.target_state]
+        writes[index] = turing_machine.letter_ids[transition.write_letter]
+        moves[index] = -1 if transition.move_direction == Direction.LEFT else 1
+    return targets, writes, moves
+
+
+def _tape_matrix(turing_machine: TuringMachine, input_words: Sequence[Union[str, List[str]]],
+                 dtype: np.dtype) -> np.ndarray:
+    """
+    Returns a matrix holding the letter ids of every input word in its own row,
+    padded with blanks. Raises `ValueError` for letters outside the machine alphabet.
+    """
+    lengths: np.ndarray = np.fromiter(map(len, input_words), dtype=np.int64, count=len(input_words))
+    letters: List[str] = [TuringMachine.BLANK] + turing_machine.alphabet
+    if all(len(letter) == 1 for letter in letters) and all(isinstance(word, str) for word in input_words):
+        # map code points to letter ids in bulk, with id -1 for letters outside the alphabet
+        code_points: np.ndarray = np.frombuffer("".join(cast(Sequence[str], input_words)).encode("utf-32-le"),
+                                                dtype=np.uint32)
+        alphabet: np.ndarray = np.array([ord(letter) for letter in letters], dtype=np.uint32)
+        order: np.ndarray = np.argsort(alphabet)
+        positions: np.ndarray = np.minimum(np.searchsorted(alphabet[order], code_points), len(letters) - 1)
+        ids: np.ndarray = np.where(alphabet[order][positions] == code_points, order[positions], -1)
+    else:
+        letter_ids: Dict[str, int] = turing_machine.letter_ids
+        ids = np.fromiter((letter_ids.get(letter, -1) for letter in chain.from_iterable(input_words)),
+                          dtype=np.int64, count=int(lengths.sum()))
+    invalid: np.ndarray = ids <= 0
+    if invalid.any():
+        letter: str = list(chain.from_iterable(input_words))[int(np.argmax(invalid))]
+        raise ValueError(f"invalid Turing machine: input letter {letter!r} is not in the machine alphabet")
+    tape: np.ndarray = np.zeros((len(input_words), int(lengths.max(initial=0)) or 1), dtype=dtype)
+    starts: np.ndarray = np.cumsum(lengths) - lengths
+    rows: np.ndarray = np.repeat(np.arange(len(input_words)), lengths)
+    tape[rows, np.arange(len(ids)) - np.repeat(starts, lengths)] = ids
+    return tape
+
+
+def simulate_batch(turing_machine: TuringMachine, input_words: Sequence[Union[str, List[str]]],
+                   max_steps: int = 1000000, max_tape: int = 1000000) -> BatchSimulationResult:
+    """
+    Runs a Turing machine on many input words at once, with the semantics of
+    `simulate`. The tapes are the rows of one matrix, and a single step moves
+    the heads of all running simulations, while every simulation keeps track of
+    the tape segment `simulate` would have allocated, so that the verdicts and
+    step counts are the same. The matrix grows (on both sides) as these
+    segments reach its ends. Raises `ValueError` for machines
+    that fail `TuringMachine.validate`.
+    """
+    turing_machine.validate()
+    targets, writes, moves = _transition_arrays(turing_machine)
+    tape: np.ndarray = _tape_matrix(turing_machine, input_words, writes.dtype)
+    halt: int = turing_machine.state_ids[turing_machine.termination_state]
+    initial: int = turing_machine.state_ids[turing_machine.initial_state]
+    verdicts: np.ndarray = np.full(len(input_words), Verdict.ACCEPT.value if initial == halt else 0, dtype=np.int8)
+    steps: np.ndarray = np.zeros(len(input_words), dtype=np.int64)
+    # state, head and tape segment (as in `simulate`) of the running simulations, whose tape rows are `rows`
+    rows: np.ndarray = np.flatnonzero(verdicts == 0)
+    state: np.ndarray = np.full(len(rows), initial, dtype=np.int32)
+    head: np.ndarray = np.zeros(len(rows), dtype=np.int64)
+    low: np.ndarray = np.zeros(len(rows), dtype=np.int64)
+    high: np.ndarray = np.maximum(np.fromiter(map(len, input_words), dtype=np.int64, count=len(input_words)), 1)[rows]
+    step: int = 0
+    while len(rows) > 0 and step < max_steps:
+        letter: np.ndarray = tape[rows, head]
+        target: np.ndarray = targets[state, letter]
+        stuck: np.ndarray = target < 0
+        if stuck.any():
+            verdicts[rows[stuck]] = Verdict.REJECT.value
+            steps[rows[stuck]] = step
+            running: np.ndarray = ~stuck
+            rows, state, head, low, high, letter, target = \
+                rows[running], state[running], head[running], low[running], high[running], letter[running], \
+                target[running]
+        tape[rows, head] = writes[state, letter]
+        move: np.ndarray = moves[state, letter]
+        head += move
+        state = target
+        step += 1
+        outside: np.ndarray = (head < low) | (head >= high)
+        if outside.any():
+            size: np.ndarray = high - low
+            limit: np.ndarray = outside & (size >= max_tape)
+            if limit.any():
+                verdicts[rows[limit]] = Verdict.TAPE_LIMIT.value
+                steps[rows[limit]] = step
+                running = ~limit
+                rows, state, head, low, high, outside, size = \
+                    rows[running], state[running], head[running], low[running], high[running], outside[running], \
+                    size[running]
+            blanks: np.ndarray = np.where(outside, np.minimum(size, max_tape - size), 0)
+            low -= np.where(head < low, blanks, 0)
+            high += np.where(head >= high, blanks, 0)
+            left: int = max(-int(low.min(initial=0)), 0)
+            right: int = max(int(high.max(initial=0)) - tape.shape[1] + left, 0)
+            if left > 0 or right > 0:
+                # grow the matrix at least twofold, so that growing it takes amortized constant time
+                left = max(left, tape.shape[1]) if left > 0 else 0
+                right = max(right, tape.shape[1]) if right > 0 else 0
+                tape = np.pad(tape, ((0, 0), (left, right)))
+                head += left
+                low += left
+                high += left
+        accepted: np.ndarray = state == halt
+        if accepted.any():
+            verdicts[rows[accepted]] = Verdict.ACCEPT.value
+            steps[rows[accepted]] = step
+            running = ~accepted
+            rows, state, head, low, high = rows[running], state[running], head[running], low[running], high[running]
+    verdicts[rows] = Verdict.STEP_LIMIT.value
+    steps[rows] = step
+    members: List[Verdict] = list(Verdict)
+    return BatchSimulationResult([members[verdict - 1] for verdict in verdicts.tolist()], steps)
+
+
+def words_up_to(alphabet: Sequence[str], max_length: int) -> Iterator[str]:
+    """
+    Yields all words over the given alphabet (of single-character letters)
+    up to the given length, shortest first.
+    """
+    for length in range(max_length + 1):
+        for letters in product(alphabet, repeat=length):
+            yield "".join(letters)
@@ -0,0 +1,156 @@
+from array import array
+from dataclasses import dataclass
+from enum import Enum
+from typing import List, Union, Optional, Tuple, Dict, Sequence
+
+from typing_machines.abstract_machines.turing_machine import TuringMachine, Direction
+
+
+class Verdict(Enum):
+    """
+    Outcome of a Turing machine simulation.
+    """
+    ACCEPT = 1
+    REJECT = 2
+    STEP_LIMIT = 3
+    TAPE_LIMIT = 4
+
+
+@dataclass
+class Configuration:
+    """
+    Turing machine configuration.
+    `tape` holds the written part of the tape (blanks beyond it are implicit)
+    and `head` is the head position relative to `tape[0]`, so it may lie
+    just outside the written part.
+    """
+    state: str
+    tape: List[str]
+    head: int
+
+
+@dataclass
+class SimulationResult:
+    """
+    Result of simulating a Turing machine on an input word.
+    """
+    verdict: Verdict
+    steps: int
+    configuration: Configuration
+
+
+_Entry = Optional[Tuple[int, int, int]]
+
+
+def _transition_table(turing_machine: TuringMachine) -> List[_Entry]:
+    """
+    Returns a flat transition table indexed by `state_id * len(letter_ids) + letter_id`
+    holding the target state id, written letter id and head move of every transition.
+    """
+    width: int = len(turing_machine.letter_ids)
+    table: List[_Entry] = [None] * (len(turing_machine.state_ids) * width)
+    for (state, letter), transition in turing_machine.transition_index.items():
+        move: int = -1 if transition.move_direction == Direction.LEFT else 1
+        table[turing_machine.state_ids[state] * width + turing_machine.letter_ids[letter]] = \
+            (turing_machine.state_ids[transition.target_state], turing_machine.letter_ids[transition.write_letter], move)
+    return table
+
+
+def simulate(turing_machine: TuringMachine, input_word: Union[str, List[str]],
+             max_steps: int = 1000000, max_tape: int = 1000000) -> SimulationResult:
+    """
+    Runs a Turing machine on an input word, starting with the head on the
+    first input letter. The machine accepts when reaching its termination
+    state and rejects when no transition applies. Stops with `STEP_LIMIT`
+    after `max_steps` steps and with `TAPE_LIMIT` when the head leaves a
+    tape segment of `max_tape` cells. Raises `ValueError` for machines
+    that fail `TuringMachine.validate`.
+    """
+    turing_machine.validate(input_word)
+    return _run(turing_machine, turing_machine.initial_state, input_word, 0, max_steps, max_tape)
+
+
+def resume(turing_machine: TuringMachine, configuration: Configuration,
+           max_steps: int = 1000000, max_tape: int = 1000000) -> SimulationResult:
+    """
+    Runs a Turing machine from a configuration, e.g., one returned by
+    `simulate` when stopping with `STEP_LIMIT`, with the same verdicts and
+    limits as `simulate`. The steps of the result count from the given
+    configuration. Raises `ValueError` for machines that fail
+    `TuringMachine.validate`, and for configurations with unknown letters
+    or states, or with the head off the tape and its neighboring cells.
+    """
+    turing_machine.validate(letter for letter in configuration.tape if letter != TuringMachine.BLANK)
+    if configuration.state not in turing_machine.state_ids:
+        raise ValueError(f"unknown state {configuration.state}")
+    if not -1 <= configuration.head <= len(configuration.tape):
+        raise ValueError(f"head position {configuration.head} is not on the tape or next to it")
+    tape: List[str] = configuration.tape
+    head: int = configuration.head
+    if head < 0:
+        tape, head = [TuringMachine.BLANK] + tape, 0
+    elif head == len(tape):
+        tape = tape + [TuringMachine.BLANK]
+    return _run(turing_machine, configuration.state, tape, head, max_steps, max_tape)
+
+
+def _run(turing_machine: TuringMachine, initial_state: str, cells: Sequence[str], head: int,
+         max_steps: int, max_tape: int) -> SimulationResult:
+    """
+    Runs a Turing machine from a state and a head position on the given
+    tape cells, which the head lies on.
+    """
+    table: List[_Entry] = _transition_table(turing_machine)
+    letter_ids: Dict[str, int] = turing_machine.letter_ids
+    state_ids: Dict[str, int] = turing_machine.state_ids
+    width: int = len(letter_ids)
+    tape: array = array("B" if width <= 256 else "I", [letter_ids[letter] for letter in cells] or [0])
+    state: int = state_ids[initial_state]
+    halt: int = state_ids[turing_machine.termination_state]
+    steps: int = 0
+    verdict: Verdict = Verdict.ACCEPT
+    while state != halt:
+        if steps >= max_steps:
+            verdict = Verdict.STEP_LIMIT
+            break
+        entry: _Entry = table[state * width + tape[head]]
+        if entry is None:
+            verdict = Verdict.REJECT
+            break
+        state, tape[head], move = entry
+        head += move
+        steps += 1
+        if head < 0 or head == len(tape):
+            if len(tape) >= max_tape:
+                head -= move
+                verdict = Verdict.TAPE_LIMIT
+                break
+            blanks: array = array(tape.typecode, [0]) * min(len(tape), max_tape - len(tape))
+            if head < 0:
+                tape = blanks + tape
+                head += len(blanks)
+            else:
+                tape.extend(blanks)
+    return SimulationResult(verdict, steps, _configuration(turing_machine, state, tape, head))
+
+
+def _configuration(turing_machine: TuringMachine, state: int, tape: array, head: int) -> Configuration:
+    """
+    Decodes the simulator's tape into a configuration trimmed of surrounding blanks.
+    """
+    cells: List[int] = tape.tolist()
+    start: int = 0
+    while start < len(cells) and cells[start] == 0:
+        start += 1
+    end: int = len(cells)
+    while end > start and cells[end - 1] == 0:
+        end -= 1
+    letters: List[str] = [TuringMachine.BLANK] + turing_machine.alphabet
+    return Configuration(turing_machine.states[state], [letters[cell] for cell in cells[start:end]], head - start)
+
+
+def accepts(turing_machine: TuringMachine, input_word: Union[str, List[str]], max_steps: int = 1000000) -> bool:
+    """
+    Returns true iff the machine accepts the input word within `max_steps` steps.
+    """
+    return simulate(turing_machine, input_word, max_steps=max_steps).verdict == Verdict.ACCEPT
@@ -0,0 +1,191 @@
+"""
+Reduction of Turing machines to the binary alphabet {0, 1}. Every letter is
+encoded as a block of bits, and every step of the original machine becomes a
+pass over one block that reads its code, followed by a pass that writes the
+code of the new letter and leaves the head on the neighboring block.
+"""
+
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Iterable, Optional, Set, Deque
+from collections import deque
+
+from typing_machines.abstract_machines.turing_machine import TuringMachine, Transition, Direction
+from typing_machines.transformations.transformation import TransformedMachine
+
+BITS: Tuple[str, str] = ("0", "1")
+""" Alphabet of the reduced machines. """
+
+
+@dataclass
+class BinaryMachine(TransformedMachine):
+    """
+    Turing machine reduced to the binary alphabet. `codes` maps every letter
+    of the original machine to its block of bits, from left to right.
+    """
+    codes: Dict[str, str]
+
+    def translate_word(self, input_word: Iterable[str]) -> List[str]:
+        return [bit for letter in input_word for bit in self.codes[letter]]
+
+
+_Action = Tuple[str, str, Direction]
+""" Target state, written letter and head move of a transition. """
+
+
+class _Reduction:
+    """
+    Builds the transitions of the reduced machine, creating the states of the
+    reading, writing and skipping passes only when some transition needs them.
+
+    A block of `width` cells is entered from its left end (after moving right)
+    or from its right end (after moving left), and read from that end. Blocks
+    are either blank or hold a code, since the original machine never writes
+    blanks: reading a blank at the entered end means the whole block is blank.
+    """
+
+    def __init__(self, turing_machine: TuringMachine):
+        self.machine: TuringMachine = turing_machine
+        self.width: int = max(1, (len(turing_machine.alphabet) - 1).bit_length())
+        self.codes: Dict[str, str] = {letter: format(i, f"0{self.width}b")
+                                      for i, letter in enumerate(turing_machine.alphabet)}
+        self.letters: Dict[str, str] = {code: letter for letter, code in self.codes.items()}
+        self.transitions: List[Transition] = []
+        self.states: Set[str] = set()
+        self.pending: Deque[Tuple[str, ...]] = deque()
+
+    def _state(self, *key: str) -> str:
+        """
+        Returns the name of a pass state, scheduling its transitions on first use.
+        """
+        name: str = "__".join(key)
+        if name not in self.states:
+            self.states.add(name)
+            self.pending.append(key)
+        return name
+
+    def enter(self, state: str, move: Direction) -> str:
+        """
+        Returns the state reading the block entered with the given move in the given original state.
+        """
+        if state == self.machine.termination_state:
+            return state
+        return self._state(state, "readL" if move == Direction.RIGHT else "readR", "")
+
+    def leave(self, state: str, step: Direction, move: Direction) -> Tuple[str, Direction]:
+        """
+        Returns the target state and head move at the last cell of a pass in
+        direction `step`, going on to the next block in direction `move`.
+        Turning back crosses the rest of the block first.
+        """
+        if self.width == 1 or step == move:
+            return self.enter(state, move), move
+        return self._state(state, "skip" + move.name[0], str(self.width - 1)), move
+
+    def write(self, state: str, bits: str, step: Direction, move: Direction, blank: bool) -> _Action:
+        """
+        Returns the action writing `bits` from the current cell on in direction
+        `step`, on a blank block (or one holding a code), and then going on to
+        the next block in direction `move`. Passes writing the same bits share
+        their states.
+        """
+        if len(bits) > 1:
+            return self._state(state, ("writeB" if blank else "writeC") + step.name[0] + move.name[0], bits[1:]), \
+                bits[0], step
+        target, direction = self.leave(state, step, move)
+        return target, bits[0], direction
+
+    def _actions(self, key: Tuple[str, ...]) -> List[Tuple[str, _Action]]:
+        """
+        Returns the transitions (read letter and action) of a pass state.
+        """
+        state, kind, argument = key
+        if kind.startswith("read"):
+            return self._read(state, Direction.RIGHT if kind == "readL" else Direction.LEFT, argument)
+        move: Direction = Direction.RIGHT if kind[-1] == "R" else Direction.LEFT
+        if kind.startswith("write"):
+            step: Direction = Direction.RIGHT if kind[-2] == "R" else Direction.LEFT
+            action: _Action = self.write(state, argument, step, move, kind.startswith("writeB"))
+            return [(TuringMachine.BLANK, action)] if kind.startswith("writeB") else [(bit, action) for bit in BITS]
+        remaining: int = int(argument)
+        target: str = self.enter(state, move) if remaining == 1 else self._state(state, kind, str(remaining - 1))
+        return [(bit, (target, bit, move)) for bit in BITS]
+
+    def _read(self, state: str, step: Direction, prefix: str) -> List[Tuple[str, _Action]]:
+        """
+        Returns the transitions of the state that read the bits `prefix` of a
+        block entered in direction `step` in the given original state.
+        """
+        back: Direction = Direction.LEFT if step == Direction.RIGHT else Direction.RIGHT
+        actions: List[Tuple[str, _Action]] = []
+        if not prefix:
+            transition: Optional[Transition] = self.machine.transition_index.get((state, TuringMachine.BLANK))
+            if transition is not None:
+                # a blank block: write the new code on the way in
+                actions.append((TuringMachine.BLANK, self._act(transition, step, BITS[0], True)))
+        for bit in BITS:
+            cells: str = self._cells(prefix + bit, step)
+            if len(prefix) + 1 < self.width:
+                if any(code.startswith(cells) if step == Direction.RIGHT else code.endswith(cells)
+                       for code in self.letters):
+                    reading: str = self._state(state, "readL" if step == Direction.RIGHT else "readR", prefix + bit)
+                    actions.append((bit, (reading, bit, step)))
+                continue
+            letter: Optional[str] = self.letters.get(cells)
+            transition = None if letter is None else self.machine.transition_index.get((state, letter))
+            if transition is None:
+                continue
+            if transition.write_letter == letter and transition.target_state != self.machine.termination_state:
+                # the code stays, so the pass over the block is over
+                target, move = self.leave(transition.target_state, step, transition.move_direction)
+                actions.append((bit, (target, bit, move)))
+            else:
+                # the whole code is read: write the new code on the way back
+                actions.append((bit, self._act(transition, back, bit, False)))
+        return actions
+
+    def _act(self, transition: Transition, step: Direction, kept_bit: str, blank: bool) -> _Action:
+        """
+        Returns the first action of the pass in direction `step` writing the code of the letter
+        written by the transition, or accepts right away (writing `kept_bit`) if the transition accepts.
+        """
+        if transition.target_state == self.machine.termination_state:
+            return transition.target_state, kept_bit, step
+        return self.write(transition.target_state, self._cells(self.codes[transition.write_letter], step), step,
+                          transition.move_direction, blank)
+
+    @staticmethod
+    def _cells(bits: str, step: Direction) -> str:
+        """
+        Returns bits read in direction `step` in the left-to-right order of
+        their cells, or the other way around.
+        """
+        return bits if step == Direction.RIGHT else bits[::-1]
+
+    def reduce(self) -> TuringMachine:
+        initial: str = self.enter(self.machine.initial_state, Direction.RIGHT)
+        while self.pending:
+            key: Tuple[str, ...] = self.pending.popleft()
+            source: str = "__".join(key)
+            for read_letter, (target, write_letter, move) in self._actions(key):
+                self.transitions.append(Transition(source, read_letter, target, write_letter, move))
+        return TuringMachine(initial, self.machine.termination_state, self.transitions, ["0", "1"])
+
+
+def binary_alphabet(turing_machine: TuringMachine) -> BinaryMachine:
+    """
+    Reduces a Turing machine to the binary alphabet {0, 1}, encoding its
+    letters as blocks of ceil(log2(len(alphabet))) bits. Every class then has
+    narrow base lists, over three letters, but the reduced machine has about
+    as many states as the original one has pairs of states and letters, and
+    takes up to three times the block width steps per original step (see
+    `typing_machines/experiment/binary_alphabet_benchmark.py`). Raises
+    `ValueError` for machines that fail `TuringMachine.validate`, or whose
+    state names clash with the names of the reduction.
+    """
+    turing_machine.validate()
+    reduction: _Reduction = _Reduction(turing_machine)
+    machine: TuringMachine = reduction.reduce()
+    clashes: Set[str] = reduction.states & set(turing_machine.states)
+    if clashes:
+        raise ValueError(f"state names {sorted(clashes)} are used by the binary alphabet reduction")
+    return BinaryMachine(turing_machine, machine, reduction.codes)
@@ -0,0 +1,147 @@
+"""
+Macro-step compilation. The block machine of a Turing machine reads and
+writes blocks of k cells as single letters, and its states carry the
+position of the head within the block. One step of the block machine
+simulates the original machine on a block until the head leaves the block,
+i.e., at least one and often up to k original steps, so checking its
+encoding takes fewer (but larger) subtyping steps, at the cost of an
+alphabet of up to (letters + 1) ** k blocks.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from itertools import product
+from typing import List, Dict, Tuple, Iterable, Optional, Set, Deque
+
+from typing_machines.abstract_machines.turing_machine import TuringMachine, Transition, Direction
+from typing_machines.transformations.transformation import TransformedMachine
+
+_Block = Tuple[str, ...]
+""" Cells of a block, from left to right, with `TuringMachine.BLANK` for blank cells. """
+
+
+@dataclass
+class BlockMachine(TransformedMachine):
+    """
+    Block machine of a Turing machine, with blocks of `k` cells. `blocks`
+    maps the cells of every block letter to its name.
+    """
+    k: int
+    blocks: Dict[_Block, str]
+
+    def translate_word(self, input_word: Iterable[str]) -> List[str]:
+        cells: List[str] = list(input_word)
+        cells += [TuringMachine.BLANK] * (-len(cells) % self.k)
+        letters: List[str] = []
+        for start in range(0, len(cells), self.k):
+            block: _Block = tuple(cells[start:start + self.k])
+            if block not in self.blocks:
+                raise ValueError(f"block {block} of the input word is not over the input alphabet")
+            letters.append(self.blocks[block])
+        return letters
+
+
+class _Construction:
+    """
+    Builds the transitions of the block machine for the pairs of states and
+    blocks that can occur together, starting from the initial state and
+    the blocks of input words.
+    """
+
+    def __init__(self, turing_machine: TuringMachine, k: int, input_alphabet: List[str]):
+        self.machine: TuringMachine = turing_machine
+        self.k: int = k
+        self.blank: _Block = (TuringMachine.BLANK,) * k
+        self.blocks: Dict[_Block, str] = {}
+        self.states: Dict[Tuple[str, int], str] = {}
+        self.pending: Deque[Tuple[Tuple[str, int], _Block]] = deque()
+        for length in range(k, 0, -1):
+            for letters in product(input_alphabet, repeat=length):
+                self._block(tuple(letters) + (TuringMachine.BLANK,) * (k - length))
+
+    def _block(self, block: _Block) -> str:
+        """
+        Returns the letter of a block, scheduling its pairs with the known states on first use.
+        """
+        if block == self.blank:
+            return TuringMachine.BLANK
+        if block not in self.blocks:
+            self.blocks[block] = f"block{len(self.blocks)}"
+            self.pending.extend((state, block) for state in self.states)
+        return self.blocks[block]
+
+    def _state(self, state: str, offset: int) -> str:
+        """
+        Returns the block machine state of an original state and head offset, scheduling its pairs with the
+        known blocks (and the blank block) on first use.
+        """
+        if state == self.machine.termination_state:
+            return state
+        if (state, offset) not in self.states:
+            self.states[(state, offset)] = f"{state}__{offset}"
+            self.pending.extend(((state, offset), block) for block in [self.blank, *self.blocks])
+        return self.states[(state, offset)]
+
+    def macro_step(self, state: str, offset: int, block: _Block) -> Optional[Tuple[str, _Block, Direction]]:
+        """
+        Simulates the original machine from the given state and head offset
+        on a block until it accepts or its head leaves the block, and returns
+        the block machine state, the new block and the move. Returns `None` if
+        the original machine rejects, or runs forever, within the block.
+        """
+        cells: List[str] = list(block)
+        visited: Set[Tuple[str, int, _Block]] = set()
+        while True:
+            key: Tuple[str, int, _Block] = (state, offset, tuple(cells))
+            transition: Optional[Transition] = self.machine.transition_index.get((state, cells[offset]))
+            if transition is None or key in visited:
+                return None
+            visited.add(key)
+            cells[offset] = transition.write_letter
+            state = transition.target_state
+            offset += -1 if transition.move_direction == Direction.LEFT else 1
+            if state == self.machine.termination_state:
+                return state, tuple(cells), transition.move_direction
+            if offset < 0:
+                return self._state(state, self.k - 1), tuple(cells), Direction.LEFT
+            if offset == self.k:
+                return self._state(state, 0), tuple(cells), Direction.RIGHT
+
+    def construct(self) -> TuringMachine:
+        initial: str = self._state(self.machine.initial_state, 0)
+        transitions: List[Transition] = []
+        while self.pending:
+            (state, offset), block = self.pending.popleft()
+            step: Optional[Tuple[str, _Block, Direction]] = self.macro_step(state, offset, block)
+            if step is not None:
+                target, written, move = step
+                transitions.append(Transition(self.states[(state, offset)], self._block(block), target,
+                                              self._block(written), move))
+        # input blocks the machine never reads still occur in translated words
+        return TuringMachine(initial, self.machine.termination_state, transitions, list(self.blocks.values()))
+
+
+def block_machine(turing_machine: TuringMachine, k: int = 2,
+                  input_alphabet: Optional[Iterable[str]] = None) -> BlockMachine:
+    """
+    Returns the block machine of a Turing machine with blocks of `k`
+    cells, for input words over the given letters (by default, the whole
+    alphabet). It accepts the translated input word iff the machine accepts
+    the input word; a machine running forever within one block is turned
+    into one that rejects. Fewer input letters mean fewer blocks, e.g.,
+    without the marker letters a machine only writes. Pass it to `encode`
+    as `transform=partial(block_machine, k=k)`; see
+    `typing_machines/experiment/block_machine_benchmark.py` for the
+    trade-off between derivation depth and class table size. Raises
+    `ValueError` for machines that fail `TuringMachine.validate`, or whose
+    state names clash with the names of the construction.
+    """
+    if k < 1:
+        raise ValueError("blocks must have at least one cell")
+    turing_machine.validate()
+    letters: List[str] = turing_machine.alphabet if input_alphabet is None else list(input_alphabet)
+    construction: _Construction = _Construction(turing_machine, k, letters)
+    machine: TuringMachine = construction.construct()
+    if turing_machine.termination_state in construction.states.values():
+        raise ValueError(f"state name {turing_machine.termination_state} is used by the block machine construction")
+    return BlockMachine(turing_machine, machine, k, construction.blocks)
@@ -0,0 +1,163 @@
+"""
+Minimization of Turing machines. Removes the states that are unreachable or
+cannot reach the termination state, and merges states and letters that the
+machine cannot tell apart, so that the class tables get smaller.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import List, Dict, Set, Tuple, Iterable, Optional, Callable, Hashable, Deque
+
+from typing_machines.abstract_machines.turing_machine import TuringMachine, Transition, Direction
+from typing_machines.transformations.transformation import TransformedMachine
+
+
+@dataclass
+class MinimizedMachine(TransformedMachine):
+    """
+    Minimized Turing machine. `state_map` maps every kept state of the
+    original machine to the state representing it, and `letter_map` maps
+    every input letter of the original machine to the letter representing it.
+    """
+    state_map: Dict[str, str]
+    letter_map: Dict[str, str]
+
+    def translate_word(self, input_word: Iterable[str]) -> List[str]:
+        return [self.letter_map[letter] for letter in input_word]
+
+
+def _closure(start: Iterable[str], edges: Dict[str, List[str]]) -> Set[str]:
+    """
+    Returns the states reachable from the given states along the given edges.
+    """
+    reached: Set[str] = set(start)
+    pending: Deque[str] = deque(reached)
+    while pending:
+        for state in edges.get(pending.popleft(), []):
+            if state not in reached:
+                reached.add(state)
+                pending.append(state)
+    return reached
+
+
+def _refine(items: List[str], signature: Callable[[str, Dict[str, int]], Hashable],
+            blocks: Dict[str, int]) -> Dict[str, int]:
+    """
+    Refines a partition of the items, given as a block number per item,
+    until the items of every block have equal signatures.
+    """
+    while True:
+        signatures: Dict[Tuple[int, Hashable], int] = {}
+        refined: Dict[str, int] = {item: signatures.setdefault((blocks[item], signature(item, blocks)), len(signatures))
+                                   for item in items}
+        if len(signatures) == len(set(blocks.values())):
+            return refined
+        blocks = refined
+
+
+def _representatives(items: List[str], blocks: Dict[str, int]) -> Dict[str, str]:
+    """
+    Maps every item to the first item of its block.
+    """
+    first: Dict[int, str] = {}
+    return {item: first.setdefault(blocks[item], item) for item in items}
+
+
+def _merge_states(machine: TuringMachine) -> Dict[str, str]:
+    """
+    Merges states that take the same transitions (up to merged targets) on every letter.
+    """
+    def signature(state: str, blocks: Dict[str, int]) -> Hashable:
+        return tuple((transition.read_letter, blocks[transition.target_state], transition.write_letter,
+                      transition.move_direction) for transition in outgoing[state])
+
+    outgoing: Dict[str, List[Transition]] = {state: sorted(transitions, key=lambda t: machine.letter_ids[t.read_letter])
+                                             for state, transitions in machine.outgoing_transitions.items()}
+    return _representatives(machine.states, _refine(machine.states, signature, {
+        state: int(state == machine.termination_state) for state in machine.states}))
+
+
+def _merge_letters(machine: TuringMachine) -> Dict[str, str]:
+    """
+    Merges letters on which every state takes the same transition (up to merged
+    written letters). The machine cannot tell such letters apart, so they may
+    be replaced by each other anywhere on the tape.
+    """
+    def signature(letter: str, blocks: Dict[str, int]) -> Hashable:
+        return tuple((transition.source_state, transition.target_state, blocks[transition.write_letter],
+                      transition.move_direction) for transition in incoming[letter])
+
+    incoming: Dict[str, List[Transition]] = {letter: [] for letter in machine.alphabet}
+    for transition in machine.transitions:
+        if transition.read_letter != TuringMachine.BLANK:
+            incoming[transition.read_letter].append(transition)
+    return _representatives(machine.alphabet, _refine(machine.alphabet, signature,
+                                                      {letter: 0 for letter in machine.alphabet}))
+
+
+def _rename(machine: TuringMachine, state_map: Dict[str, str], letter_map: Dict[str, str]) -> TuringMachine:
+    """
+    Replaces states and letters by their representatives, keeping a single copy of every transition.
+    """
+    letter_map = {TuringMachine.BLANK: TuringMachine.BLANK, **letter_map}
+    return TuringMachine(state_map[machine.initial_state], state_map[machine.termination_state], [
+        Transition(transition.source_state, transition.read_letter, state_map[transition.target_state],
+                   letter_map[transition.write_letter], transition.move_direction)
+        for transition in machine.transitions
+        if state_map[transition.source_state] == transition.source_state and
+        letter_map[transition.read_letter] == transition.read_letter])
+
+
+def minimize(turing_machine: TuringMachine, input_alphabet: Optional[Iterable[str]] = None) -> MinimizedMachine:
+    """
+    Minimizes a Turing machine:
+    1. removes the states that are unreachable from the initial state or
+       cannot reach the termination state, along with their transitions
+       (so runs that could only get stuck or loop there are rejected sooner),
+    2. merges equivalent states and letters that no state tells apart,
+       including letters that are written but never read, until no more
+       states or letters merge.
+    `input_alphabet` holds the letters that may appear in input words (by
+    default, the whole alphabet). An input letter that no kept transition
+    mentions is kept by a transition of a fresh unreachable state.
+    Raises `ValueError` for machines that fail `TuringMachine.validate`.
+    """
+    turing_machine.validate()
+    forward: Dict[str, List[str]] = {}
+    backward: Dict[str, List[str]] = {}
+    for transition in turing_machine.transitions:
+        forward.setdefault(transition.source_state, []).append(transition.target_state)
+        backward.setdefault(transition.target_state, []).append(transition.source_state)
+    kept: Set[str] = _closure([turing_machine.initial_state], forward) & \
+        _closure([turing_machine.termination_state], backward)
+    machine: TuringMachine = TuringMachine(turing_machine.initial_state, turing_machine.termination_state, [
+        transition for transition in turing_machine.transitions
+        if transition.source_state in kept and transition.target_state in kept])
+    state_map: Dict[str, str] = {state: state for state in machine.states}
+    letter_map: Dict[str, str] = {letter: letter for letter in turing_machine.alphabet}
+    while True:
+        states: Dict[str, str] = _merge_states(machine)
+        machine = _rename(machine, states, {letter: letter for letter in machine.alphabet})
+        letters: Dict[str, str] = _merge_letters(machine)
+        machine = _rename(machine, {state: state for state in machine.states}, letters)
+        state_map = {state: states[representative] for state, representative in state_map.items()}
+        letter_map = {letter: letters.get(representative, representative)
+                      for letter, representative in letter_map.items()}
+        if all(state == representative for state, representative in states.items()) and \
+                all(letter == representative for letter, representative in letters.items()):
+            break
+    # input letters that no kept transition mentions are never read, like the letters no kept transition reads
+    unread: List[str] = [letter for letter in machine.alphabet
+                         if all((state, letter) not in machine.transition_index for state in machine.states)]
+    inert: Optional[str] = None
+    for letter in turing_machine.alphabet if input_alphabet is None else input_alphabet:
+        if letter_map.get(letter) not in machine.letter_ids:
+            inert = inert or letter
+            letter_map[letter] = unread[0] if unread else inert
+    if inert is not None and not unread:
+        sink: str = "sink"
+        while sink in machine.state_ids:
+            sink += "_"
+        machine = TuringMachine(machine.initial_state, machine.termination_state,
+                                machine.transitions + [Transition(sink, inert, sink, inert, Direction.RIGHT)])
+    return MinimizedMachine(turing_machine, machine, state_map, letter_map)
@@ -0,0 +1,52 @@
+"""
+Transformations of Turing machines applied before compilation.
+"""
+
+from dataclasses import dataclass
+from typing import List, Tuple, Iterable
+
+from typing_machines.abstract_machines.turing_machine import TuringMachine
+from typing_machines.compilers.compiler_g import compile_g
+from typing_machines.compilers.compiler_r import compile_r
+
+
+@dataclass
+class SizeReport:
+    """
+    Sizes of a machine and of its class tables (in characters) before and after a transformation.
+    """
+    states: Tuple[int, int]
+    letters: Tuple[int, int]
+    transitions: Tuple[int, int]
+    grigore_size: Tuple[int, int]
+    roth_size: Tuple[int, int]
+
+    def __str__(self) -> str:
+        return "\n".join(f"{name}: {before} -> {after} ({(after - before) / max(before, 1):+.0%})"
+                         for name, (before, after) in self.__dict__.items())
+
+
+@dataclass
+class TransformedMachine:
+    """
+    Result of transforming a Turing machine. The transformed machine accepts
+    a translated input word iff the original machine accepts the input word.
+    """
+    original: TuringMachine
+    machine: TuringMachine
+
+    def translate_word(self, input_word: Iterable[str]) -> List[str]:
+        """
+        Translates an input word of the original machine to an input word of the transformed machine.
+        """
+        raise NotImplementedError()
+
+    def report(self) -> SizeReport:
+        """
+        Compares the sizes of the original and the transformed machines, and of their class tables.
+        """
+        return SizeReport((len(self.original.states), len(self.machine.states)),
+                          (len(self.original.alphabet), len(self.machine.alphabet)),
+                          (len(self.original.transitions), len(self.machine.transitions)),
+                          (len(compile_g(self.original)), len(compile_g(self.machine))),
+                          (len(compile_r(self.original)), len(compile_r(self.machine))))